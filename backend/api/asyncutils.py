@@ -0,0 +1,291 @@
+"""
+Asyncio versions of the Redis helpers in api.utils, for use in the API's
+request handlers, SSE generators and GraphQL resolvers. These await Redis
+round trips instead of blocking the event loop, so one server process can
+hold many more streaming clients.
+
+The synchronous helpers in api.utils are still used by the worker threads.
+Both share the Redis circuit breaker and fallback store from api.utils.
+"""
+
+from os import getenv
+import asyncio
+import json
+
+from redis import asyncio as aioredis
+
+from database import schemas
+from api.framestore import get_frame_store
+from api.notifier import notifier
+from api.utils import (
+    REDIS_ERRORS,
+    NOTIFY_CHANNEL,
+    NOTIFY_ORIGIN,
+    driver_listeners,
+    frame_decoder,
+    redis_breaker,
+    fallback_store,
+    mirror_values,
+    load_active_driver,
+)
+from api.fallbackstore import AsyncFallbackStore
+from api.frames import select_frames, stream_bounds, frames_from_stream
+
+# Async connections belong to the event loop they were opened on, so the
+# shared client is recreated if it is used from a different loop
+shared_redis_store = None
+shared_redis_loop = None
+
+async_fallback_store = AsyncFallbackStore(fallback_store)
+
+# Passes on notifications from other processes, on the shared store's loop
+relay_task = None
+
+
+def get_redis_pool():
+    """
+    Create an asyncio Redis connection pool, configured like the synchronous
+    pool in api.utils
+    """
+    return aioredis.BlockingConnectionPool(
+        host=getenv("REDIS_HOST", "127.0.0.1"),
+        max_connections=int(getenv("REDIS_POOL_SIZE", 20)),
+        health_check_interval=int(getenv("REDIS_HEALTH_CHECK_INTERVAL", 30)),
+        socket_connect_timeout=float(getenv("REDIS_CONNECT_TIMEOUT", 1)),
+        timeout=5,
+        encoding="utf-8",
+        decode_responses=True,
+    )
+
+
+def get_redis_store():
+    """
+    Get the process-wide asyncio Redis client for the running event loop
+    """
+    global shared_redis_store, shared_redis_loop
+
+    loop = asyncio.get_running_loop()
+
+    if shared_redis_store is None or shared_redis_loop is not loop:
+        shared_redis_store = aioredis.Redis(connection_pool=get_redis_pool())
+        shared_redis_loop = loop
+
+    return shared_redis_store
+
+
+async def reset_redis_store():
+    """
+    Close all pooled connections, so the next call to get_redis_store()
+    creates a new pool
+    """
+    global shared_redis_store, shared_redis_loop
+
+    if shared_redis_store is not None:
+        store = shared_redis_store
+        shared_redis_store = shared_redis_loop = None
+        await store.connection_pool.disconnect()
+
+
+async def call_redis(command, mirror=None):
+    """
+    Await command(store) on Redis through the circuit breaker, or on the
+    fallback store while Redis is unavailable (see api.utils.call_redis)
+    """
+    if redis_breaker.allow():
+        try:
+            result = await command(get_redis_store())
+        except REDIS_ERRORS:
+            redis_breaker.record_failure()
+        else:
+            redis_breaker.record_success()
+
+            if mirror:
+                mirror_values(mirror)
+
+            return result
+
+    return await command(async_fallback_store)
+
+
+async def read_redis_key(key):
+    """
+    Read and decode a JSON value from Redis, or None if it is missing
+    """
+    value = await call_redis(lambda store: store.get(key))
+
+    return json.loads(value) if value is not None else None
+
+
+async def set_redis_key(key, value):
+    """
+    Set a value in Redis. Returns False if Redis is unavailable.
+    """
+    await call_redis(lambda store: store.set(key, value), mirror={key: value})
+
+    return redis_breaker.available
+
+
+async def get_frame():
+    """
+    Get the latest Frame of iRacing data from the frame store or Redis. The
+    Frame is shared with every other caller until the data changes.
+    """
+    frame_store = get_frame_store()
+
+    if frame_store:
+        return frame_store.get()
+
+    # One round trip. The data is only decoded when there is a new frame.
+    values = await call_redis(
+        lambda store: store.mget(["session_sequence", "session_data"])
+    )
+
+    return frame_decoder.decode(*values)
+
+
+async def get_frames(after=None, since=None, until=None, limit=None):
+    """
+    Get recent frames of iRacing data from the frame store or Redis, oldest
+    first (see api.utils.get_frames)
+    """
+    frame_store = get_frame_store()
+
+    if frame_store:
+        return frame_store.get_range(after, since, until, limit)
+
+    low, high = stream_bounds(since, until)
+
+    async def fetch(store):
+        if after is None:
+            entries = await store.xrange("session_stream", low, high, count=limit)
+            return entries, await store.get("session_info")
+
+        # Sequence numbers are contiguous, so the frames after one are the
+        # newest (latest - after) entries
+        latest, session_info = await store.mget(["session_sequence", "session_info"])
+        latest = int(latest or 0)
+
+        if latest <= after:
+            return [], None
+
+        entries = await store.xrevrange(
+            "session_stream", high, low, count=latest - after
+        )
+
+        return entries[::-1], session_info
+
+    entries, session_info = await call_redis(fetch)
+
+    return select_frames(frames_from_stream(entries, session_info), after, limit=limit)
+
+
+async def get_iracing_data():
+    """
+    Get the latest iRacing data from the frame store or Redis
+    """
+    return (await get_frame()).model or {}
+
+
+async def get_active_driver_from_cache():
+    """
+    Get the active driver from the Redis cache, falling back to the database
+    """
+    active_driver_dict = await read_redis_key("active_driver")
+
+    try:
+        return schemas.Driver(**active_driver_dict)
+    except TypeError:
+        return await asyncio.to_thread(load_active_driver)
+
+
+async def update_driver_cache(driver):
+    """
+    Update the active driver in the Redis cache
+    """
+    driver_json = schemas.Driver.from_orm(driver).json()
+    result = await set_redis_key("active_driver", driver_json)
+
+    for listener in driver_listeners:
+        listener(driver)
+
+    await notify("active_driver", driver_json)
+
+    return result
+
+
+async def get_session_best_lap():
+    """
+    Get the session best lap time from Redis
+    """
+    return await read_redis_key("session_best_lap")
+
+
+async def set_session_best_lap(laptime):
+    """
+    Set the session best lap time in Redis
+    """
+    laptime_json = schemas.LapTime.from_orm(laptime).json()
+    result = await set_redis_key("session_best_lap", laptime_json)
+
+    await notify("laptimes", laptime_json)
+
+    return result
+
+
+async def notify(topic, value=None):
+    """
+    Notify streams of a change, in this process and (through Redis pub/sub)
+    any others (see api.utils.notify)
+    """
+    notifier.notify(topic, value)
+
+    await call_redis(
+        lambda store: store.publish(
+            NOTIFY_CHANNEL + topic, f"{NOTIFY_ORIGIN}:{value or ''}"
+        )
+    )
+
+
+def subscribe(topic):
+    """
+    Subscribe to change notifications on a topic (see api.notifier), from
+    this process or, through Redis, others
+    """
+    global relay_task
+
+    loop = asyncio.get_running_loop()
+
+    if relay_task is None or relay_task.done() or relay_task.get_loop() is not loop:
+        relay_task = loop.create_task(relay_notifications())
+
+    return notifier.subscribe(topic)
+
+
+async def relay_notifications():
+    """
+    Pass on notifications that other processes publish to Redis. Retries
+    every REDIS_RETRY_INTERVAL seconds while Redis is unavailable.
+    """
+    while True:
+        try:
+            if redis_breaker.allow():
+                async with get_redis_store().pubsub() as pubsub:
+                    await pubsub.psubscribe(NOTIFY_CHANNEL + "*")
+                    redis_breaker.record_success()
+
+                    async for message in pubsub.listen():
+                        relay(message)
+        except REDIS_ERRORS:
+            redis_breaker.record_failure()
+
+        await asyncio.sleep(redis_breaker.reset_timeout)
+
+
+def relay(message):
+    if message["type"] != "pmessage":
+        return
+
+    origin, _, value = message["data"].partition(":")
+
+    if origin != NOTIFY_ORIGIN:
+        notifier.notify(message["channel"][len(NOTIFY_CHANNEL) :], value or None)
@@ -0,0 +1,390 @@
+"""
+Broadcast hub for the iRacing websocket stream.
+
+A single producer task reads each new frame once and hands the same
+serialized payload to every connected websocket, so the work per frame
+does not grow with the number of clients. The producer runs only while
+clients are connected.
+
+Clients that asked for the same set of fields (see api.projection), mode,
+encoding (see api.encoding) and rate form a group, and are all sent the
+same payload, built once per frame: the whole (projected) frame, or in
+delta mode a patch from the previous frame (see api.delta). A group with a
+rate is sent only as many frames a second as it asked for.
+
+Each client sends on its own task (see api.streamclient), so a slow client
+skips frames instead of holding up the others, and is disconnected if it
+falls too far behind.
+
+Streams that send frames themselves, like GraphQL subscriptions, can
+subscribe() to the frames the producer reads instead of fetching their own.
+These and SSE streams register a StreamConsumer with consume(), so they are
+held to the same lag limit and show up in the same metrics.
+"""
+
+from collections import deque
+from time import monotonic
+import asyncio
+import logging
+
+from api.asyncutils import get_frame
+from api.delta import DeltaEncoder, RESYNC_INTERVAL
+from api.encoding import frame_payload, dumps, SUBPROTOCOLS
+from api.frames import FrameCursor
+from api.metrics import add_metrics
+from api.notifier import Notifier
+from api.streamclient import StreamClient, StreamConsumer
+
+# How often to check for a new frame, and for session data while there is
+# none (seconds)
+POLL_INTERVAL = 0.01
+IDLE_INTERVAL = 1
+
+MODES = ("full", "delta")
+
+# Highest rate a client can ask for (frames per second). Clients are never
+# sent more frames than the worker publishes.
+MAX_RATE = 60
+
+
+class StreamGroup:
+    """
+    Clients sent whole frames, projected to one field set
+    """
+
+    def __init__(self, fields=None, encoding="json", rate=None):
+        self.fields = fields
+        self.encoding = encoding
+        self.rate = rate
+        self.clients = []
+        self.next_due = None
+
+    def due(self, now):
+        """
+        True if the group should be sent a frame now, given its rate
+        """
+        if self.rate is None:
+            return True
+
+        if self.next_due is not None and now < self.next_due:
+            return False
+
+        # Schedule from the last due time so the average rate holds when
+        # frames arrive between due times
+        interval = 1 / self.rate
+        if self.next_due is None or now - self.next_due >= interval:
+            self.next_due = now + interval
+        else:
+            self.next_due += interval
+
+        return True
+
+    def resync(self, client):
+        """
+        Every frame is sent whole, so there is nothing to resync
+        """
+        pass
+
+    def send(self, frame):
+        """
+        Offer a frame to every client, or an empty frame if None
+        """
+        if frame:
+            message = frame_payload(frame, self.fields, self.encoding)
+        else:
+            message = dumps({}, self.encoding)
+
+        # A client that has fallen too far behind leaves the group on offer
+        for client in list(self.clients):
+            client.offer(message)
+
+
+class DeltaStreamGroup(StreamGroup):
+    """
+    Clients sent patches between frames. New clients, clients that asked
+    to resync, and clients that would miss a patch because they are behind
+    are sent a snapshot instead.
+    """
+
+    def __init__(
+        self, fields=None, encoding="json", rate=None, resync_interval=RESYNC_INTERVAL
+    ):
+        super().__init__(fields, encoding, rate)
+        self.encoder = DeltaEncoder(fields, resync_interval, encoding)
+
+    def resync(self, client):
+        client.synced = False
+
+    def send(self, frame):
+        if frame is None:
+            # Everyone starts again from a snapshot when data returns
+            self.encoder.reset()
+
+            for client in list(self.clients):
+                client.synced = False
+                client.offer(dumps({}, self.encoding))
+
+            return
+
+        patch = self.encoder.patch(frame)
+
+        for client in list(self.clients):
+            if patch and client.synced and not client.busy:
+                client.offer(patch)
+            else:
+                client.offer(self.encoder.snapshot(frame))
+                client.synced = True
+
+
+class IracingBroadcaster:
+    def __init__(
+        self,
+        poll_interval=POLL_INTERVAL,
+        idle_interval=IDLE_INTERVAL,
+        max_lag=None,
+        resync_interval=RESYNC_INTERVAL,
+    ):
+        # Groups of clients by field set (None for whole frames), mode,
+        # encoding and rate
+        self.groups = {}
+        self.poll_interval = poll_interval
+        self.idle_interval = idle_interval
+        self.max_lag = max_lag
+        self.resync_interval = resync_interval
+        self.producer = None
+        self.notifier = Notifier()
+
+        # SSE and GraphQL streams, with their kind, field set and rate
+        self.consumers = {}
+
+        # When recent frames arrived, to measure the frame rate
+        self.frame_times = deque(maxlen=50)
+        self.lag_disconnects = 0
+
+        self.log = logging.getLogger(__name__)
+
+    @property
+    def clients(self):
+        return [
+            client.websocket
+            for group in self.groups.values()
+            for client in group.clients
+        ]
+
+    @property
+    def frame_rate(self):
+        """
+        Frames published per second, measured over recent frames
+        """
+        if len(self.frame_times) < 2:
+            return 0
+
+        elapsed = self.frame_times[-1] - self.frame_times[0]
+
+        return (len(self.frame_times) - 1) / elapsed if elapsed else 0
+
+    async def connect(
+        self, websocket, fields=None, mode="full", encoding="json", rate=None
+    ):
+        """
+        Accept a websocket and start sending it frames, projected to the
+        given field set, whole or (mode="delta") as patches, in an encoding
+        negotiated with api.encoding.negotiate(), at most rate frames a
+        second (None for every frame)
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown mode {mode}, expected one of {', '.join(MODES)}")
+
+        if rate is not None and not 0 < rate <= MAX_RATE:
+            raise ValueError(f"rate must be between 0 and {MAX_RATE}")
+
+        await websocket.accept(subprotocol=SUBPROTOCOLS.get(encoding))
+
+        # Join the group only once accepted, since the producer removes
+        # empty groups
+        key = (fields, mode, encoding, rate)
+        group = self.groups.get(key)
+
+        if group is None:
+            if mode == "delta":
+                group = DeltaStreamGroup(fields, encoding, rate, self.resync_interval)
+            else:
+                group = StreamGroup(fields, encoding, rate)
+
+            self.groups[key] = group
+
+        client = StreamClient(websocket, self.max_lag, self.__remove)
+        group.clients.append(client)
+
+        # Let the client know there is no data yet
+        if not (await get_frame()).model:
+            client.offer(dumps({}, encoding))
+
+        self.__start()
+
+    def subscribe(self):
+        """
+        Subscribe to each new frame the producer reads (see api.notifier).
+        Values are Frames, or None when the data stops. Use the
+        subscription as a context manager, or close it when done.
+        """
+        subscription = self.notifier.subscribe("frame")
+        self.__start()
+
+        return subscription
+
+    def consume(self, stream, client=None, fields=None, rate=None):
+        """
+        Register a stream that sends frames itself ("sse" or "graphql"),
+        from a client address, projected to a field set, at most rate
+        frames a second. Returns its StreamConsumer.
+        """
+        consumer = StreamConsumer(client, self.max_lag, self.__remove_consumer)
+        self.consumers[consumer] = (stream, fields, rate)
+
+        return consumer
+
+    async def disconnect(self, websocket):
+        for client in self.__find(websocket):
+            client.close()
+            await client.wait_closed()
+
+    def resync(self, websocket):
+        """
+        Send a delta client a snapshot with the next frame
+        """
+        for group in self.groups.values():
+            for client in group.clients:
+                if client.websocket is websocket:
+                    group.resync(client)
+
+    def stats(self):
+        """
+        Stream metrics, with the rate, frames sent and dropped, and lag
+        (seconds) of each client
+        """
+        subscribers = [
+            {
+                **client.stats(),
+                "stream": "websocket",
+                "fields": fields,
+                "mode": mode,
+                "encoding": encoding,
+                "rate": rate,
+            }
+            for (fields, mode, encoding, rate), group in list(self.groups.items())
+            for client in group.clients
+        ] + [
+            {
+                **consumer.stats(),
+                "stream": stream,
+                "fields": fields,
+                "mode": "full",
+                "encoding": "json",
+                "rate": rate,
+            }
+            for consumer, (stream, fields, rate) in list(self.consumers.items())
+        ]
+
+        return {
+            "clients": len(subscribers),
+            "groups": len(self.groups),
+            "frame_rate": round(self.frame_rate, 1),
+            "lag_disconnects": self.lag_disconnects,
+            "frame_subscribers": self.notifier.count("frame"),
+            "subscribers": subscribers,
+        }
+
+    def __find(self, websocket):
+        return [
+            client
+            for group in self.groups.values()
+            for client in group.clients
+            if client.websocket is websocket
+        ]
+
+    def __remove(self, client):
+        """
+        Called by a client when it closes
+        """
+        self.__count_lagging(client)
+
+        for key, group in list(self.groups.items()):
+            if client in group.clients:
+                group.clients.remove(client)
+
+            if not group.clients:
+                del self.groups[key]
+
+    def __remove_consumer(self, consumer):
+        """
+        Called by a StreamConsumer when its stream ends
+        """
+        self.__count_lagging(consumer)
+        self.consumers.pop(consumer, None)
+
+    def __count_lagging(self, client):
+        if client.lagging:
+            self.lag_disconnects += 1
+            self.log.warning(
+                f"Disconnected a stream client more than {client.max_lag} "
+                "seconds behind"
+            )
+
+    def __start(self):
+        if self.producer is None or self.producer.done():
+            self.producer = asyncio.create_task(self.__produce())
+
+    def __broadcast(self, frame=None):
+        """
+        Offer a frame to every group that is due one, or an empty frame to
+        every group if None
+        """
+        now = monotonic()
+        self.notifier.notify("frame", frame)
+
+        for group in list(self.groups.values()):
+            if frame is None or group.due(now):
+                group.send(frame)
+
+    async def __produce(self):
+        """
+        Broadcast each new frame until there are no clients or subscribers
+        left
+        """
+        cursor = FrameCursor()
+        sent_empty = True
+
+        while self.clients or self.notifier.count("frame"):
+            frame = await get_frame()
+
+            if frame.model:
+                if cursor.advance(frame):
+                    self.frame_times.append(monotonic())
+                    self.__broadcast(frame)
+
+                sent_empty = False
+                await asyncio.sleep(self.poll_interval)
+            else:
+                # Send one empty frame when the data stops
+                if not sent_empty:
+                    self.__broadcast()
+                    self.frame_times.clear()
+                    sent_empty = True
+
+                await asyncio.sleep(self.idle_interval)
+
+        self.log.debug(
+            f"Broadcast stopped: {cursor.frames} frames sent, {cursor.skipped} skipped"
+        )
+
+
+iracing_broadcaster = IracingBroadcaster()
+add_metrics("stream", iracing_broadcaster.stats)
+
+
+def get_broadcaster():
+    """
+    Used to pass the shared broadcaster to routers via dependency injection
+    """
+    return iracing_broadcaster
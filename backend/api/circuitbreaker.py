@@ -0,0 +1,100 @@
+"""
+Circuit breaker for calls to an external service (Redis).
+
+After failure_threshold consecutive failures the circuit opens, and calls
+are not attempted at all. Once reset_timeout seconds have passed, it goes
+half-open: a single call is let through as a probe, which closes the
+circuit if it succeeds or opens it again if it fails. Other calls wait for
+the next probe, which is also let through if the first never reports back.
+"""
+
+from time import monotonic
+import threading
+import logging
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class CircuitBreaker:
+    def __init__(self, name, failure_threshold=3, reset_timeout=5, clock=monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+
+        self.state = CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.opened_at = None
+        self.lock = threading.Lock()
+
+        self.log = logging.getLogger(__name__)
+
+    @property
+    def available(self):
+        """
+        True if the last call succeeded
+        """
+        return self.state == CLOSED and not self.failures
+
+    def reset(self):
+        with self.lock:
+            self.state = CLOSED
+            self.failures = 0
+            self.opened_at = None
+
+    def allow(self):
+        """
+        True if a call should be attempted now
+        """
+        if self.state == CLOSED:
+            return True
+
+        with self.lock:
+            if self.clock() - self.opened_at < self.reset_timeout:
+                return False
+
+            # Let one call through to probe the service
+            self.state = HALF_OPEN
+            self.opened_at = self.clock()
+
+            return True
+
+    def record_success(self):
+        if self.state == CLOSED and not self.failures:
+            return
+
+        with self.lock:
+            if self.state != CLOSED:
+                self.log.info(f"{self.name} is available again")
+
+            self.state = CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state == CLOSED:
+                    self.trips += 1
+                    self.log.warning(
+                        f"{self.name} is unavailable, retrying every "
+                        f"{self.reset_timeout} seconds"
+                    )
+
+                self.state = OPEN
+                self.opened_at = self.clock()
+
+    def stats(self):
+        """
+        Current state and counters, for health checks and metrics
+        """
+        return {
+            "state": self.state,
+            "available": self.available,
+            "failures": self.failures,
+            "trips": self.trips,
+        }
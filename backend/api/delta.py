@@ -0,0 +1,120 @@
+"""
+Delta encoding for the iRacing websocket stream.
+
+Clients that connect with mode=delta are sent a full snapshot of a frame,
+then only what changed in each following frame, as a JSON Patch (RFC 6902)
+against the previous frame:
+
+    {"type": "snapshot", "sequence": 41, "data": {...}}
+    {"type": "patch", "sequence": 42, "base": 41, "patch": [
+        {"op": "replace", "path": "/RPM", "value": 5210.5}, ...]}
+
+A patch applies only to the frame with sequence number base. A fresh
+snapshot is sent every RESYNC_INTERVAL frames, and a client that finds
+itself out of step can send "resync" to be sent one with the next frame.
+Messages are JSON text, or MessagePack for clients that negotiated it (see
+api.encoding).
+"""
+
+from api.encoding import dumps
+from api.projection import frame_dict
+
+# Frames between full snapshots (about 5 seconds at 30 fps)
+RESYNC_INTERVAL = 150
+
+
+def diff(old, new, path=""):
+    """
+    Get the JSON Patch operations that turn dict old into dict new. Nested
+    dicts are compared field by field, other values (including lists) are
+    replaced whole.
+    """
+    patch = []
+
+    for key, value in new.items():
+        pointer = f"{path}/{escape(key)}"
+
+        if key not in old:
+            patch.append({"op": "add", "path": pointer, "value": value})
+        elif old[key] != value:
+            if isinstance(value, dict) and isinstance(old[key], dict):
+                patch.extend(diff(old[key], value, pointer))
+            else:
+                patch.append({"op": "replace", "path": pointer, "value": value})
+
+    for key in old:
+        if key not in new:
+            patch.append({"op": "remove", "path": f"{path}/{escape(key)}"})
+
+    return patch
+
+
+def escape(key):
+    """
+    Escape a key for a JSON Pointer (RFC 6901)
+    """
+    return str(key).replace("~", "~0").replace("/", "~1")
+
+
+class DeltaEncoder:
+    """
+    Encodes the frames sent to one group of delta clients, which all get
+    the same messages
+    """
+
+    def __init__(self, fields=None, resync_interval=RESYNC_INTERVAL, encoding="json"):
+        self.fields = fields
+        self.encoding = encoding
+        self.resync_interval = resync_interval
+        self.reset()
+
+    def reset(self):
+        """
+        Start again from a snapshot
+        """
+        self.base = None
+        self.patches = 0
+
+    def snapshot(self, frame):
+        """
+        The snapshot message for a frame, built once per frame, field set
+        and encoding
+        """
+        return frame.render(
+            ("snapshot", self.fields, self.encoding),
+            lambda model: dumps(
+                {
+                    "type": "snapshot",
+                    "sequence": frame.sequence,
+                    "data": frame_dict(frame, self.fields),
+                },
+                self.encoding,
+            ),
+        )
+
+    def patch(self, frame):
+        """
+        Encode the next frame as a patch message from the previous one.
+        Returns None when a snapshot is due instead.
+        """
+        data = frame_dict(frame, self.fields)
+        patch = None
+
+        if self.base is not None and self.patches < self.resync_interval:
+            base_sequence, base_data = self.base
+            patch = dumps(
+                {
+                    "type": "patch",
+                    "sequence": frame.sequence,
+                    "base": base_sequence,
+                    "patch": diff(base_data, data),
+                },
+                self.encoding,
+            )
+            self.patches += 1
+        else:
+            self.patches = 0
+
+        self.base = (frame.sequence, data)
+
+        return patch
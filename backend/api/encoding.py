@@ -0,0 +1,53 @@
+"""
+Wire encodings for the iRacing websocket stream.
+
+Frames are sent as JSON text by default. Clients that offer the "msgpack"
+websocket subprotocol are sent the same messages (whole, projected or delta
+frames) as binary MessagePack instead, which is smaller and quicker to
+decode. Either way, each payload is encoded once per frame and shared by
+every client that asked for it.
+"""
+
+import json
+
+import msgpack
+
+from api.projection import frame_dict, frame_json
+
+ENCODINGS = ("json", "msgpack")
+# Websocket subprotocol to accept for each binary encoding
+SUBPROTOCOLS = {"msgpack": "msgpack"}
+
+
+def negotiate(subprotocols):
+    """
+    Pick the encoding for the subprotocols a client offered
+    """
+    for encoding, subprotocol in SUBPROTOCOLS.items():
+        if subprotocol in subprotocols:
+            return encoding
+
+    return "json"
+
+
+def dumps(value, encoding="json"):
+    """
+    Encode a message: JSON text, or MessagePack bytes
+    """
+    if encoding == "msgpack":
+        return msgpack.packb(value)
+
+    return json.dumps(value)
+
+
+def frame_payload(frame, fields=None, encoding="json"):
+    """
+    Get a frame (projected to a field set) in an encoding, built once per
+    frame
+    """
+    if encoding == "json":
+        return frame_json(frame, fields)
+
+    return frame.render(
+        (encoding, fields), lambda model: dumps(frame_dict(frame, fields), encoding)
+    ) or dumps({}, encoding)
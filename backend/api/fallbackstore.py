@@ -0,0 +1,132 @@
+"""
+In-memory stand-in for Redis, used while Redis is unreachable.
+
+The latest values written to Redis by this process are mirrored here (see
+api.utils.MIRRORED_KEYS), so readers in the same process keep seeing them
+during an outage instead of nothing. Frame history is kept here only for
+frames published during an outage. Only the commands the API helpers use are
+implemented, with the same arguments and results as redis-py.
+"""
+
+from collections import deque
+from time import time
+import threading
+
+
+class FallbackStore:
+    def __init__(self):
+        self.values = {}
+        self.streams = {}
+        self.last_id = (0, 0)
+        self.lock = threading.Lock()
+
+    def clear(self):
+        with self.lock:
+            self.values.clear()
+            self.streams.clear()
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def mget(self, keys):
+        return [self.values.get(key) for key in keys]
+
+    def set(self, key, value):
+        self.values[key] = str(value)
+        return True
+
+    def xadd(self, name, fields, maxlen=None, approximate=True):
+        with self.lock:
+            stream = self.streams.get(name)
+
+            if stream is None or stream.maxlen != maxlen:
+                stream = self.streams[name] = deque(stream or (), maxlen=maxlen)
+
+            # IDs are the time in milliseconds and a counter, like Redis
+            milliseconds = max(int(time() * 1000), self.last_id[0])
+            counter = self.last_id[1] + 1 if milliseconds == self.last_id[0] else 0
+            self.last_id = (milliseconds, counter)
+
+            entry_id = f"{milliseconds}-{counter}"
+            stream.append(
+                (entry_id, {key: str(value) for key, value in fields.items()})
+            )
+
+        return entry_id
+
+    def xrange(self, name, min="-", max="+", count=None):
+        with self.lock:
+            entries = list(self.streams.get(name, ()))
+
+        low, high = id_bound(min, 0), id_bound(max, float("inf"))
+        entries = [entry for entry in entries if low <= entry_time(entry) <= high]
+
+        return entries[:count] if count is not None else entries
+
+    def xrevrange(self, name, max="+", min="-", count=None):
+        entries = self.xrange(name, min, max)[::-1]
+
+        return entries[:count] if count is not None else entries
+
+    def publish(self, channel, message):
+        # No other process can be listening
+        return 0
+
+    def rpush(self, name, *values):
+        # Session recordings are not kept in memory during an outage
+        return 0
+
+    def pipeline(self, transaction=True):
+        return FallbackPipeline(self)
+
+
+class FallbackPipeline:
+    """
+    Queues commands and runs them on execute(), like a redis-py pipeline
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.commands = []
+
+    def __getattr__(self, name):
+        command = getattr(self.store, name)
+
+        def queue(*args, **kwargs):
+            self.commands.append((command, args, kwargs))
+            return self
+
+        return queue
+
+    def execute(self):
+        commands, self.commands = self.commands, []
+
+        return [command(*args, **kwargs) for command, args, kwargs in commands]
+
+
+class AsyncFallbackStore:
+    """
+    The same fallback store, with awaitable commands like redis.asyncio
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def __getattr__(self, name):
+        command = getattr(self.store, name)
+
+        async def call(*args, **kwargs):
+            return command(*args, **kwargs)
+
+        return call
+
+
+def id_bound(bound, default):
+    if bound in ("-", "+"):
+        return default
+
+    return int(str(bound).split("-")[0])
+
+
+def entry_time(entry):
+    return int(entry[0].split("-")[0])
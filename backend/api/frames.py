@@ -0,0 +1,288 @@
+"""
+Decode-once frames of iRacing data, shared by every API consumer.
+
+A Frame wraps one published snapshot of the raw session data, stamped with
+a sequence number that counts up on every publish. The validated
+IracingFrame model and each output format (JSON text, GraphQL type, ...)
+are built the first time they are asked for and cached on the frame, so
+the cost per frame stays the same however many clients are streaming.
+
+Streams follow the sequence number with a FrameCursor, to send each frame
+exactly once and count the ones they skipped. Recent frames are also kept
+in a capped history (a Redis Stream, or a ring buffer in the local frame
+store) for range reads by sequence number or time. The Redis Stream keeps
+only each frame's telemetry. The session info, which makes up most of a
+frame but rarely changes, is kept once under its own key.
+"""
+
+from functools import cached_property
+import itertools
+import json
+
+from database import iracingschemas
+from raceparse.yamlheaders import iracing_yaml_headers
+
+# Sections of the raw data that come from the session info YAML
+SESSION_INFO_KEYS = frozenset(iracing_yaml_headers)
+
+
+class Frame:
+    """
+    One snapshot of the raw iRacing data. Treat it as immutable, since it is
+    shared between threads and clients.
+    """
+
+    def __init__(self, sequence, data, timestamp=None):
+        self.sequence = sequence
+        self.data = data or {}
+        self.timestamp = timestamp  # Unix time it was published
+        self.formats = {}
+
+    @property
+    def tick(self):
+        """
+        The iRacing session tick the data was sampled at
+        """
+        return self.data.get("SessionTick")
+
+    @property
+    def model(self):
+        """
+        The validated IracingFrame, or None if there is no session data
+        """
+        try:
+            return self.formats["model"]
+        except KeyError:
+            model = self.formats["model"] = build_model(self.data)
+            return model
+
+    @property
+    def empty(self):
+        """
+        True if there is no data (nothing was read from iRacing)
+        """
+        return not self.data
+
+    @property
+    def text(self):
+        """
+        The raw data as JSON text
+        """
+        try:
+            return self.formats["text"]
+        except KeyError:
+            text = self.formats["text"] = json.dumps(self.data)
+            return text
+
+    @property
+    def json(self):
+        """
+        The model as JSON text ("{}" without session data)
+        """
+        return self.render("json", model_to_json) or "{}"
+
+    def render(self, name, build):
+        """
+        Get an output format of this frame, building it from the model with
+        build(model) on first use. None if there is no session data.
+        """
+        try:
+            return self.formats[name]
+        except KeyError:
+            pass
+
+        model = self.model
+        value = self.formats[name] = build(model) if model is not None else None
+
+        return value
+
+
+def build_model(data):
+    if not data.get("SessionTime"):
+        return None
+
+    return iracingschemas.IracingFrame(**data)
+
+
+def model_to_json(model):
+    return model.model_dump_json()
+
+
+EMPTY_FRAME = Frame(0, {})
+
+
+class StoredFrame(Frame):
+    """
+    A frame read back from the Redis Stream: its telemetry as JSON text,
+    and the session info text shared by every entry. The text is only
+    decoded when the data is needed.
+    """
+
+    def __init__(self, sequence, telemetry, timestamp, session_info="{}"):
+        self.sequence = sequence
+        self.telemetry = telemetry
+        self.session_info = session_info
+        self.timestamp = timestamp
+        self.formats = {}
+
+    @property
+    def empty(self):
+        return self.telemetry == "{}"
+
+    @cached_property
+    def text(self):
+        """
+        The raw data as JSON text
+        """
+        return join_json(self.telemetry, self.session_info)
+
+    @cached_property
+    def data(self):
+        return json.loads(self.text)
+
+
+def split_session_info(data):
+    """
+    Split raw data into its per-tick telemetry and its session info
+    """
+    telemetry = {}
+    session_info = {}
+
+    for key, value in data.items():
+        if key in SESSION_INFO_KEYS:
+            session_info[key] = value
+        else:
+            telemetry[key] = value
+
+    return telemetry, session_info
+
+
+def join_json(first, second):
+    """
+    Join the JSON text of two objects into one object, without decoding them
+    """
+    if second == "{}":
+        return first
+
+    if first == "{}":
+        return second
+
+    return f"{first[:-1]}, {second[1:]}"
+
+
+class SessionInfoEncoder:
+    """
+    Encodes the session info as JSON text, reusing the last text until the
+    session info changes. The text last written to Redis is kept in
+    written, so it is only written again when it changes.
+    """
+
+    def __init__(self):
+        self.session_info = None
+        self.text = "{}"
+        self.written = None
+
+    def encode(self, session_info):
+        if session_info != self.session_info:
+            self.session_info = session_info
+            self.text = json.dumps(session_info)
+
+        return self.text
+
+
+class FrameDecoder:
+    """
+    Decodes frames read from Redis (a sequence number and JSON text),
+    reusing the last Frame until the sequence number changes
+    """
+
+    def __init__(self):
+        self.latest = EMPTY_FRAME
+
+    def is_current(self, sequence):
+        """
+        True if the frame with this sequence number is already decoded
+        """
+        return sequence is not None and int(sequence) == self.latest.sequence
+
+    def decode(self, sequence, text):
+        if sequence is None or text is None:
+            return EMPTY_FRAME
+
+        frame = self.latest
+
+        if int(sequence) != frame.sequence:
+            frame = self.latest = Frame(int(sequence), json.loads(text))
+
+        return frame
+
+
+def select_frames(frames, after=None, since=None, until=None, limit=None):
+    """
+    Filter frames (oldest first) to those after a sequence number and
+    published between since and until (Unix times), keeping at most limit
+    of the oldest
+    """
+    selected = (
+        frame
+        for frame in frames
+        if (after is None or frame.sequence > after)
+        and (since is None or frame.timestamp >= since)
+        and (until is None or frame.timestamp <= until)
+    )
+
+    return list(itertools.islice(selected, limit))
+
+
+def stream_bounds(since=None, until=None):
+    """
+    Redis Stream IDs bounding a time range, for XRANGE/XREVRANGE
+    """
+    low = str(int(since * 1000)) if since is not None else "-"
+    high = str(int(until * 1000)) if until is not None else "+"
+
+    return low, high
+
+
+def frames_from_stream(entries, session_info=None):
+    """
+    Build StoredFrames from Redis Stream entries and the session info text.
+    Entry IDs start with the time the entry was added, in milliseconds.
+    """
+    return [
+        StoredFrame(
+            int(fields["sequence"]),
+            fields["data"],
+            int(entry_id.split("-")[0]) / 1000,
+            session_info or "{}",
+        )
+        for entry_id, fields in entries
+    ]
+
+
+class FrameCursor:
+    """
+    A consumer's position in the stream of frames. Each frame is new once,
+    and frames published between two reads are counted as skipped.
+    """
+
+    def __init__(self):
+        self.sequence = None
+        self.frames = 0
+        self.skipped = 0
+
+    def advance(self, frame):
+        """
+        Move to the given frame. Returns True if it has not been seen yet.
+        """
+        if frame.sequence == self.sequence:
+            return False
+
+        # The sequence restarts from 1 when the worker restarts
+        if self.sequence is not None and frame.sequence > self.sequence + 1:
+            self.skipped += frame.sequence - self.sequence - 1
+
+        self.sequence = frame.sequence
+        self.frames += 1
+
+        return True
@@ -0,0 +1,101 @@
+"""
+In-process store for the latest frame of iRacing data.
+
+The worker thread and the API run in the same process, so on a single-box
+rig frames can be handed over by reference instead of through Redis as
+JSON. Set FRAME_STORE=local to use it. The default (FRAME_STORE=redis)
+keeps frames in Redis, which multi-host setups need.
+
+Either way, the last TELEMETRY_HISTORY_LENGTH frames (default 250, five
+seconds at 50 fps) are kept for range reads. Set it to 0 to keep none.
+"""
+
+from collections import deque
+from os import getenv
+from time import time
+import threading
+
+from api.frames import Frame, EMPTY_FRAME, select_frames
+
+
+def get_history_length():
+    """
+    The number of recent frames to keep
+    """
+    return int(getenv("TELEMETRY_HISTORY_LENGTH", 250))
+
+
+class LocalFrameStore:
+    """
+    The latest Frame, whose sequence number counts up on every publish.
+    Readers take it in one reference read, and can wait for a newer frame
+    on the condition variable. Recent frames are kept in a ring buffer as
+    (sequence, timestamp, data) records, without the formats cached on the
+    Frame, so the history costs no more than the raw data.
+    """
+
+    def __init__(self, history_length=None):
+        if history_length is None:
+            history_length = get_history_length()
+
+        self.latest = EMPTY_FRAME
+        self.history = deque(maxlen=history_length)
+        self.condition = threading.Condition()
+
+    @property
+    def sequence(self):
+        return self.latest.sequence
+
+    def publish(self, data):
+        """
+        Replace the latest frame with the given raw data and wake any
+        waiting readers. Returns the new Frame.
+        """
+        with self.condition:
+            frame = self.latest = Frame(self.latest.sequence + 1, data, time())
+            self.history.append((frame.sequence, frame.timestamp, data))
+            self.condition.notify_all()
+
+        return frame
+
+    def get(self):
+        """
+        Get the latest Frame
+        """
+        return self.latest
+
+    def get_range(self, after=None, since=None, until=None, limit=None):
+        """
+        Get recent frames, oldest first (see select_frames)
+        """
+        with self.condition:
+            records = list(self.history)
+
+        # Frames built here are only cached for as long as the caller holds them
+        frames = (
+            Frame(sequence, data, timestamp) for sequence, timestamp, data in records
+        )
+
+        return select_frames(frames, after, since, until, limit)
+
+    def wait(self, sequence, timeout=None):
+        """
+        Wait until a frame after sequence is published. Returns the latest
+        Frame, which is unchanged if the wait timed out.
+        """
+        with self.condition:
+            self.condition.wait_for(lambda: self.latest.sequence > sequence, timeout)
+            return self.latest
+
+
+local_frame_store = LocalFrameStore()
+
+
+def get_frame_store():
+    """
+    Get the in-process frame store, or None if frames are kept in Redis
+    """
+    if getenv("FRAME_STORE", "redis").lower() == "local":
+        return local_frame_store
+
+    return None
@@ -0,0 +1,21 @@
+"""
+Runtime metrics for the API and worker threads. Modules register a
+function returning a dict of their current metrics, and GET /metrics
+collects them all.
+"""
+
+metric_sources = {}
+
+
+def add_metrics(name, collect):
+    """
+    Register collect() as the source of the metrics under name
+    """
+    metric_sources[name] = collect
+
+
+def get_metrics():
+    """
+    Collect the current metrics from every source
+    """
+    return {name: collect() for name, collect in metric_sources.items()}
@@ -0,0 +1,102 @@
+"""
+In-process change notifications for the streaming endpoints.
+
+Writers call notify(topic, value) after changing something a stream cares
+about (a new lap time, a new active driver, a new frame), from any thread.
+Each stream holds a Subscription and waits on it, so an idle connection
+costs nothing until there is a change. Subscriptions keep only the latest
+value: a subscriber that is busy when two notifications arrive wakes once,
+with the second.
+
+api.utils.notify() and api.asyncutils.notify() also pass notifications to
+other processes through Redis pub/sub.
+"""
+
+import asyncio
+import threading
+
+
+class Subscription:
+    """
+    Notifications on one topic, for a coroutine on the running event loop
+    """
+
+    def __init__(self, notifier, topic):
+        self.notifier = notifier
+        self.topic = topic
+        self.loop = asyncio.get_running_loop()
+        self.event = asyncio.Event()
+        self.value = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def push(self, value):
+        self.value = value
+        self.event.set()
+
+    async def wait(self, timeout=None):
+        """
+        Wait for a notification (returning at once if one arrived since the
+        last wait), and return its value. Returns None if the wait timed
+        out.
+        """
+        try:
+            await asyncio.wait_for(self.event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+        self.event.clear()
+
+        return self.value
+
+    def close(self):
+        self.notifier.unsubscribe(self)
+
+
+class Notifier:
+    def __init__(self):
+        self.subscriptions = {}
+        self.lock = threading.Lock()
+
+    def subscribe(self, topic):
+        """
+        Subscribe to a topic. Use the Subscription as a context manager, or
+        close it when done.
+        """
+        subscription = Subscription(self, topic)
+
+        with self.lock:
+            self.subscriptions.setdefault(topic, set()).add(subscription)
+
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscriptions.get(subscription.topic, set()).discard(subscription)
+
+    def count(self, topic):
+        """
+        The number of subscribers to a topic
+        """
+        return len(self.subscriptions.get(topic, ()))
+
+    def notify(self, topic, value=None):
+        """
+        Wake every subscriber to a topic. Safe to call from any thread.
+        """
+        with self.lock:
+            subscriptions = list(self.subscriptions.get(topic, ()))
+
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.push, value)
+            except RuntimeError:
+                # The subscriber's event loop has closed
+                self.unsubscribe(subscription)
+
+
+notifier = Notifier()
@@ -0,0 +1,180 @@
+"""
+Field projection for the iRacing data streams.
+
+Clients can ask for only the fields they need, as a comma separated list
+(nested fields with dots, e.g. "DriverInfo.DriverCarRedLine") and/or a
+preset. Each distinct field set gets one Projector, built once, and the
+projected JSON is cached on the frame, so every client with the same field
+set shares the same payload.
+"""
+
+from typing import get_args, get_origin
+from operator import attrgetter
+import json
+
+from pydantic import BaseModel
+from pydantic_core import to_jsonable_python
+
+from database.iracingschemas import IracingFrame
+
+PRESETS = {
+    "rpm": (
+        "RPM",
+        "Gear",
+        "DriverInfo.DriverCarIdleRPM",
+        "DriverInfo.DriverCarRedLine",
+    ),
+    "overlay": ("RPM", "Gear", "Speed", "Throttle", "Brake"),
+    "timing": (
+        "SessionTime",
+        "Lap",
+        "LapCurrentLapTime",
+        "LapLastLapTime",
+        "LapBestLapTime",
+        "LapDeltaToBestLap",
+    ),
+}
+
+projectors = {}
+
+
+def parse_fields(fields=None, preset=None):
+    """
+    Get the field set for a field list and/or preset, as a sorted tuple of
+    field paths, or None for the whole frame. Raises ValueError for unknown
+    fields or presets.
+    """
+    paths = set()
+
+    if preset:
+        if preset not in PRESETS:
+            raise ValueError(
+                f"Unknown preset {preset}, expected one of {', '.join(PRESETS)}"
+            )
+
+        paths.update(PRESETS[preset])
+
+    for path in (fields or "").split(","):
+        path = path.strip()
+
+        if path:
+            validate_path(path)
+            paths.add(path)
+
+    return tuple(sorted(paths)) or None
+
+
+def validate_path(path):
+    """
+    Check that a dotted field path exists in IracingFrame. Lists (e.g.
+    DriverInfo.Drivers) can only be selected whole, not inside.
+    """
+    model = IracingFrame
+    names = path.split(".")
+
+    for depth, name in enumerate(names, 1):
+        if model is None or name not in model.model_fields:
+            raise ValueError(f"Unknown field {path}")
+
+        annotation = model.model_fields[name].annotation
+
+        if depth < len(names) and is_list(annotation):
+            parent = ".".join(names[:depth])
+            raise ValueError(
+                f"Cannot select fields inside the list {parent}, select {parent}"
+            )
+
+        model = nested_model(annotation)
+
+
+def nested_model(annotation):
+    """
+    The model class in a field's type (e.g. Optional[DriverInfo]), if any
+    """
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation
+
+    for arg in get_args(annotation):
+        model = nested_model(arg)
+
+        if model is not None:
+            return model
+
+    return None
+
+
+def is_list(annotation):
+    """
+    True if a field's type is a list (e.g. Optional[List[Driver]])
+    """
+    if get_origin(annotation) is list:
+        return True
+
+    return any(is_list(arg) for arg in get_args(annotation))
+
+
+class Projector:
+    """
+    Picks a set of fields out of an IracingFrame, keeping their nesting
+    """
+
+    def __init__(self, fields):
+        self.fields = fields
+        self.getters = [(path.split("."), attrgetter(path)) for path in fields]
+
+    def project(self, model):
+        projection = {}
+
+        for keys, get in self.getters:
+            try:
+                value = get(model)
+            except AttributeError:
+                # A parent field is missing
+                value = None
+
+            target = projection
+            for key in keys[:-1]:
+                target = target.setdefault(key, {})
+
+            target[keys[-1]] = to_jsonable_python(value)
+
+        return projection
+
+    def json(self, model):
+        return json.dumps(self.project(model))
+
+
+def get_projector(fields):
+    """
+    Get the shared Projector for a field set
+    """
+    projector = projectors.get(fields)
+
+    if projector is None:
+        projector = projectors[fields] = Projector(fields)
+
+    return projector
+
+
+def frame_json(frame, fields=None):
+    """
+    Get a frame's JSON, projected to a field set (None for the whole frame)
+    """
+    if fields is None:
+        return frame.json
+
+    return frame.render(("json", fields), get_projector(fields).json) or "{}"
+
+
+def frame_dict(frame, fields=None):
+    """
+    Get a frame as plain JSON-compatible data, projected to a field set
+    """
+    if fields is None:
+        return frame.render("dict", model_to_dict) or {}
+
+    return frame.render(("dict", fields), get_projector(fields).project) or {}
+
+
+def model_to_dict(model):
+    return model.model_dump(mode="json")
@@ -2,7 +2,7 @@ import strawberry
 
 from database.schemas import ActiveDriverCreate
 from database.modeltypes import DriverType
-from api.utils import update_driver_cache
+from api.asyncutils import update_driver_cache
 from database.database import get_db
 from database.crud import (
     delete_active_driver,
@@ -17,7 +17,7 @@ from database.crud import (
 )
 class DriverMutation:
     @strawberry.mutation(description="Set the active driver")
-    def set_active_driver(self, driverId: int) -> DriverType:
+    async def set_active_driver(self, driverId: int) -> DriverType:
         db = next(get_db())
         driver = ActiveDriverCreate(driverId=driverId)
 
@@ -29,6 +29,6 @@ class DriverMutation:
         new_active_driver = set_active_driver(db, driver)
 
         # Update cache for worker threads
-        update_driver_cache(new_active_driver.driver)
+        await update_driver_cache(new_active_driver.driver)
 
         return DriverType.from_pydantic(new_active_driver.driver)
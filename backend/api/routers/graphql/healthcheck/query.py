@@ -1,5 +1,7 @@
 import strawberry
 
+from api.utils import redis_breaker
+
 
 @strawberry.type(
     description="Used to perform healthchecks on the API",
@@ -9,3 +11,13 @@ class HealthcheckQuery:
     @strawberry.field(description="True if the API is active and running")
     def api_active(self) -> bool:
         return True
+
+    @strawberry.field(description="True if the last call to Redis succeeded")
+    def redis_available(self) -> bool:
+        return redis_breaker.available
+
+    @strawberry.field(
+        description="State of the Redis circuit breaker (closed, open or half-open)"
+    )
+    def redis_circuit(self) -> str:
+        return redis_breaker.state
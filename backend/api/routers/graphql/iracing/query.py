@@ -1,7 +1,7 @@
 import strawberry
 
 from database.modeltypes import IracingFrameType
-from api.utils import get_iracing_data
+from api.asyncutils import get_frame
 
 
 @strawberry.type(
@@ -10,6 +10,7 @@ from api.utils import get_iracing_data
 )
 class IracingQuery:
     @strawberry.field(description="Get the latest frame of iRacing data")
-    def iracing(self) -> IracingFrameType:
-        frame = get_iracing_data()
-        return IracingFrameType.from_pydantic(frame)
+    async def iracing(self) -> IracingFrameType:
+        # Strawberry resolves the selected fields straight from the pydantic
+        # model, which is much cheaper than converting the whole frame
+        return (await get_frame()).model
@@ -1,9 +1,13 @@
 from typing import AsyncGenerator
+from time import monotonic
 import strawberry
 import asyncio
 
+from strawberry.types import Info
+
 from database.modeltypes import IracingFrameType
-from api.utils import get_iracing_data
+from api.asyncutils import get_frame
+from api.broadcaster import get_broadcaster, MAX_RATE
 
 
 @strawberry.type(
@@ -11,16 +15,40 @@ from api.utils import get_iracing_data
     name="Subscription",
 )
 class IracingSubscription:
-    @strawberry.subscription(description="Subscribe to real-time iRacing data")
-    async def iracing(self, fps: int = 30) -> AsyncGenerator[IracingFrameType, None]:
-        if fps <= 0 or fps > 30:
-            raise ValueError("fps must be between 1 and 30")
-
-        while True:
-            frame = get_iracing_data()
-
-            if frame:
-                yield IracingFrameType.from_pydantic(frame)
-                await asyncio.sleep(1 / fps)
-            else:
-                await asyncio.sleep(1)
+    @strawberry.subscription(
+        description=f"Subscribe to real-time iRacing data, at most fps frames a "
+        f"second (up to {MAX_RATE})"
+    )
+    async def iracing(
+        self, info: Info, fps: int = 30
+    ) -> AsyncGenerator[IracingFrameType, None]:
+        if fps <= 0 or fps > MAX_RATE:
+            raise ValueError(f"fps must be between 1 and {MAX_RATE}")
+
+        next_due = monotonic()
+        broadcaster = get_broadcaster()
+        request = (info.context or {}).get("request")
+        consumer = broadcaster.consume(
+            "graphql", getattr(request, "client", None), rate=fps
+        )
+
+        # Frames come from the shared broadcaster. Each wait returns the
+        # latest, so a slow client skips frames rather than falling behind.
+        # The subscription ends if a send takes longer than STREAM_MAX_LAG
+        # seconds.
+        with broadcaster.subscribe() as frames, consumer:
+            frame = await get_frame()
+
+            while True:
+                if frame and frame.model and consumer.advance(frame):
+                    # The model is resolved directly (see IracingQuery)
+                    consumer.begin_send()
+                    yield frame.model
+
+                    if not consumer.end_send():
+                        break
+
+                    next_due = max(next_due + 1 / fps, monotonic())
+                    await asyncio.sleep(next_due - monotonic())
+
+                frame = await frames.wait()
@@ -3,7 +3,7 @@ import strawberry
 import asyncio
 
 from database.modeltypes import LapTimeType
-from api.utils import get_session_best_lap
+from api.asyncutils import get_session_best_lap
 
 
 @strawberry.type(
@@ -13,13 +13,13 @@ from api.utils import get_session_best_lap
 class LaptimeSubscription:
     @strawberry.subscription(description="Subscribe to lap times")
     async def laptime(self, update_sec: int = 5) -> AsyncGenerator[LapTimeType, None]:
-        last_time = get_session_best_lap()
+        last_time = await get_session_best_lap()
 
         while True:
             if await self.request.is_disconnected():
                 break
 
-            lap_time = get_session_best_lap()
+            lap_time = await get_session_best_lap()
 
             if lap_time:
                 if not last_time or lap_time["id"] != last_time["id"]:
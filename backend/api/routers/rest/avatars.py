@@ -8,7 +8,7 @@ from time import time
 import shutil
 
 from api.exceptions import SecurityException
-from api.utils import update_driver_cache
+from api.asyncutils import update_driver_cache
 from database.database import get_db
 from database import crud, schemas
 
@@ -69,7 +69,7 @@ async def upload_avatar(driver_id: int, profile_pic: UploadFile = File(...)):
         )
 
     # Update active driver cache
-    update_driver_cache(updated_driver)
+    await update_driver_cache(updated_driver)
 
     # Save the image file
     with open(file_location, "wb+") as file_object:
@@ -106,7 +106,7 @@ async def delete_avatar(driver_id: int):
         )
 
     # Update active driver cache
-    update_driver_cache(updated_driver)
+    await update_driver_cache(updated_driver)
 
     # Delete the image file
     remove(file_location)
@@ -8,7 +8,7 @@ from fastapi import Request
 from typing import List
 
 
-from api.utils import update_driver_cache, get_active_driver_from_cache
+from api.asyncutils import update_driver_cache, get_active_driver_from_cache
 from database.database import get_db
 from database import crud
 from database.schemas import (
@@ -55,7 +55,7 @@ async def update_driver(driver: DriverUpdate):
     db = next(get_db())
     updated_driver = crud.update_driver(db, driver)
 
-    update_driver_cache(updated_driver)
+    await update_driver_cache(updated_driver)
 
     return updated_driver
 
@@ -81,7 +81,7 @@ async def set_active_driver(driver: ActiveDriverCreate):
     new_active_driver = crud.set_active_driver(db, driver)
 
     # Update cache for worker threads
-    update_driver_cache(new_active_driver.driver)
+    await update_driver_cache(new_active_driver.driver)
 
     return new_active_driver.driver
 
@@ -92,7 +92,7 @@ async def get_active_driver():
     Get the active driver, checking for a cached driver in the Redis
     store first. If there is no driver cached, try the database.
     """
-    active_driver = get_active_driver_from_cache()
+    active_driver = await get_active_driver_from_cache()
 
     if not active_driver:
         # No active driver, empty response
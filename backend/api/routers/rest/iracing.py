@@ -1,74 +1,167 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, Request
+from fastapi import (
+    APIRouter,
+    WebSocket,
+    WebSocketDisconnect,
+    WebSocketException,
+    Depends,
+    Request,
+    HTTPException,
+    status,
+)
+from fastapi.responses import Response
 from websockets.exceptions import ConnectionClosedError, ConnectionClosedOK
 from sse_starlette.sse import EventSourceResponse
-import asyncio
-import json
+from typing import Optional
+from time import time
 
-from api.utils import get_iracing_data, get_ws_manager
+from api.asyncutils import get_iracing_data, get_frames
+from api.broadcaster import get_broadcaster, MODES, MAX_RATE
+from api.encoding import negotiate
+from api.projection import parse_fields
 from api.ssegenerators import SSEGenerators
+from api.streamclient import get_max_lag
 
 """
 Router to get iRacing data
 """
 router = APIRouter(prefix="/iracing", tags=["iracing data"])
 
+# Most frames returned by one history read
+HISTORY_LIMIT = 500
+
 
 @router.get("/latest")
 async def get_latest():
     """
     Get a snapshot of the latest iRacing data
     """
-    return get_iracing_data()
+    return await get_iracing_data()
+
+
+@router.get("/history")
+async def get_history(
+    after: Optional[int] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    seconds: Optional[float] = None,
+    limit: int = HISTORY_LIMIT,
+):
+    """
+    Get recent frames of iRacing data, oldest first, each with its sequence
+    number and publish time. Select frames after a sequence number (after),
+    published between since and until (Unix times), or in the last few
+    seconds. Page through longer ranges with after set to the last
+    sequence number returned.
+    """
+    if seconds is not None:
+        since = time() - seconds
+
+    frames = await get_frames(after, since, until, min(max(limit, 1), HISTORY_LIMIT))
+
+    # Reuse each frame's serialized JSON
+    body = ",".join(
+        f'{{"sequence":{frame.sequence},"timestamp":{frame.timestamp},'
+        f'"frame":{frame.json}}}'
+        for frame in frames
+    )
+
+    return Response(f"[{body}]", media_type="application/json")
 
 
 @router.websocket("/stream")
 async def ws_stream_iracing_data(
-    websocket: WebSocket, ws_connection_manager=Depends(get_ws_manager)
+    websocket: WebSocket,
+    fields: Optional[str] = None,
+    preset: Optional[str] = None,
+    mode: str = "full",
+    rate: Optional[float] = None,
+    broadcaster=Depends(get_broadcaster),
 ):
     """
-    Stream current iRacing data over a websocket connection.
-    TODO Get framerate from user config.
+    Stream current iRacing data over a websocket connection. Each frame
+    is sent once, when it is published, by the shared broadcaster.
+    Send only some fields with fields (comma separated, nested fields
+    with dots, e.g. RPM,Gear,DriverInfo.DriverCarRedLine) and/or a preset
+    (rpm, overlay or timing).
+
+    With mode=delta, a snapshot is sent first, then a JSON Patch with
+    what changed in each frame (see api.delta). Send "resync" to get a
+    fresh snapshot with the next frame. Binary messages from the client
+    are ignored.
+
+    Clients that offer the "msgpack" subprotocol are sent binary
+    MessagePack messages instead of JSON text, with the same content.
+
+    Set rate to get at most that many frames a second (up to 60, and never
+    more than the worker publishes). A client that cannot keep up skips
+    to the latest frame, and is disconnected if it stays behind for more
+    than STREAM_MAX_LAG seconds.
     """
-    data = {}
-    sent_empty = False
+    if mode not in MODES:
+        raise WebSocketException(
+            code=status.WS_1008_POLICY_VIOLATION,
+            reason=f"Unknown mode {mode}, expected one of {', '.join(MODES)}",
+        )
 
-    await ws_connection_manager.connect(websocket)
+    if rate is not None and not 0 < rate <= MAX_RATE:
+        raise WebSocketException(
+            code=status.WS_1008_POLICY_VIOLATION,
+            reason=f"rate must be between 0 and {MAX_RATE}",
+        )
 
     try:
+        field_set = parse_fields(fields, preset)
+    except ValueError as e:
+        raise WebSocketException(code=status.WS_1008_POLICY_VIOLATION, reason=str(e))
+
+    encoding = negotiate(websocket.scope.get("subprotocols", []))
+    await broadcaster.connect(websocket, field_set, mode, encoding, rate)
+
+    try:
+        # The broadcaster does the sending. Wait here until the client
+        # disconnects.
         while True:
-            data = get_iracing_data()
-
-            if data and data.SessionTime:
-                # Only send if new data is available
-                await ws_connection_manager.send_json(
-                    json.loads(data.json()), websocket
-                )
-                sent_empty = False
-            else:
-                # Send one empty frame to update the client
-                if not sent_empty:
-                    await ws_connection_manager.send_json({}, websocket)
-                    sent_empty = True
-
-                await asyncio.sleep(1)
-                continue
-
-            await asyncio.sleep(0.03)
+            message = await websocket.receive()
+
+            if message["type"] == "websocket.disconnect":
+                break
+
+            if (message.get("text") or "").strip() == "resync":
+                broadcaster.resync(websocket)
     except (
         WebSocketDisconnect,
         ConnectionClosedError,
         ConnectionClosedOK,
         RuntimeError,
     ):
-        await ws_connection_manager.disconnect(websocket)
-        return
+        pass
+    finally:
+        await broadcaster.disconnect(websocket)
 
 
 @router.get("/stream")
-async def stream_iracing_data(request: Request):
+async def stream_iracing_data(
+    request: Request,
+    fields: Optional[str] = None,
+    preset: Optional[str] = None,
+    rate: float = 1,
+):
     """
     Stream iracing data via server sent events. This endpoint also
-    supports websocket connections.
+    supports websocket connections. Send only some fields with fields
+    and/or preset, as for the websocket stream. Frames are sent at most
+    rate times a second (default 1, up to 60). The stream ends if the
+    client falls more than STREAM_MAX_LAG seconds behind.
     """
-    event_generator = SSEGenerators.get_generator(request, "iracing")
-    return EventSourceResponse(event_generator)
+    if not 0 < rate <= MAX_RATE:
+        raise HTTPException(
+            status_code=400, detail=f"rate must be between 0 and {MAX_RATE}"
+        )
+
+    try:
+        field_set = parse_fields(fields, preset)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    event_generator = SSEGenerators.get_generator(request, "iracing", field_set, rate)
+    return EventSourceResponse(event_generator, send_timeout=get_max_lag())
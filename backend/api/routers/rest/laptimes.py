@@ -3,7 +3,7 @@ from fastapi import APIRouter, Request
 from typing import List
 
 from api.ssegenerators import SSEGenerators
-from api.utils import set_session_best_lap
+from api.asyncutils import set_session_best_lap
 from database.database import get_db
 from database import crud, schemas
 
@@ -33,7 +33,7 @@ async def create_score(laptime: schemas.LapTimeCreate):
     new_laptime = crud.create_laptime(db, laptime)
 
     # Update redis key for streaming
-    set_session_best_lap(new_laptime)
+    await set_session_best_lap(new_laptime)
 
     return new_laptime
 
@@ -0,0 +1,17 @@
+from fastapi import APIRouter
+
+from api.metrics import get_metrics
+
+"""
+Router to get runtime metrics
+"""
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get("")
+async def get_all_metrics():
+    """
+    Get the current runtime metrics, such as the state of the Redis
+    connection
+    """
+    return get_metrics()
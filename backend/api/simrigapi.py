@@ -11,6 +11,7 @@ from api.routers.rest import (
     avatars,
     drivers,
     iracing,
+    metrics,
     quotes,
 )
 from database import schemas
@@ -51,6 +52,7 @@ class SimRigAPI:
         self.api.include_router(drivers.router)
         self.api.include_router(iracing.router)
         self.api.include_router(laptimes.router)
+        self.api.include_router(metrics.router)
         self.api.include_router(quotes.router)
 
         # Register GraphQL router
@@ -1,60 +1,64 @@
 from asyncio import sleep
-from os import getenv
-import redis
 import json
 
-from api.utils import get_iracing_data, get_session_best_lap
+from api.asyncutils import get_frame, get_session_best_lap, read_redis_key, subscribe
+from api.broadcaster import get_broadcaster
+from api.projection import frame_json
+
+# Longest to wait for a frame notification before checking for a new frame
+# anyway (seconds)
+IDLE_TIMEOUT = 1
 
 
 class SSEGenerators:
-    def get_generator(request, event_type):
+    def get_generator(request, event_type, fields=None, rate=None):
         """
         Factory method to get a new SSE generator function for a
-        specific event
+        specific event. Frames of iRacing data can be projected to a
+        field set (see api.projection), and sent at most rate times a
+        second.
         """
         if event_type == "laptimes":
             return GeneratorFunctions(request=request).new_lap_time_generator()
         if event_type == "active_driver":
             return GeneratorFunctions(request=request).active_driver_generator()
         if event_type == "iracing":
-            return GeneratorFunctions(request=request).iracing_generator()
+            return GeneratorFunctions(request=request, rate=rate).iracing_generator(
+                fields
+            )
 
 
 class GeneratorFunctions:
     """ "
-    Server Sent Event generator functions
+    Server Sent Event generator functions. These wait for change
+    notifications (see api.notifier) rather than polling, so an idle
+    connection costs nothing and updates go out as soon as they are written.
     """
 
-    def __init__(self, request):
+    def __init__(self, request, rate=None):
         self.request = request
-        self.redis_store = redis.Redis(
-            host=getenv("REDIS_HOST", "127.0.0.1"),
-            charset="utf-8",
-            decode_responses=True,
-        )
-
-        # How often to update subscribers (seconds)
-        self.update_period = 1
+        self.rate = rate
+        # Shortest time between iRacing data updates (seconds)
+        self.update_period = 1 / rate if rate else 1
 
     async def new_lap_time_generator(self):
         """
         Send new lap times as they are set - used for a
         dynamic scoreboard
         """
-        last_time = get_session_best_lap()
-
-        while True:
-            if await self.request.is_disconnected():
-                break
+        with subscribe("laptimes") as laptimes:
+            last_time = await get_session_best_lap()
 
-            lap_time = get_session_best_lap()
+            while True:
+                lap_time = json.loads(await laptimes.wait() or "null")
 
-            if lap_time:
-                if not last_time or lap_time["id"] != last_time["id"]:
-                    yield json.dumps(lap_time)
-                    last_time = lap_time
+                if await self.request.is_disconnected():
+                    break
 
-            await sleep(self.update_period)
+                if lap_time:
+                    if not last_time or lap_time["id"] != last_time["id"]:
+                        yield json.dumps(lap_time)
+                        last_time = lap_time
 
     async def active_driver_generator(self):
         """
@@ -62,40 +66,54 @@ class GeneratorFunctions:
         """
         last_driver = {}
 
-        while True:
-            if await self.request.is_disconnected():
-                break
+        with subscribe("active_driver") as drivers:
+            active_driver = await read_redis_key("active_driver") or {}
 
-            try:
-                active_driver = json.loads(self.redis_store.get("active_driver")) or {}
-            except (redis.exceptions.ConnectionError, TypeError):
-                active_driver = {}
+            while True:
+                if await self.request.is_disconnected():
+                    break
 
-            if active_driver:
-                if not last_driver or active_driver["id"] != last_driver["id"]:
-                    yield json.dumps(active_driver)
-                    last_driver = active_driver
+                if active_driver:
+                    if not last_driver or active_driver["id"] != last_driver["id"]:
+                        yield json.dumps(active_driver)
+                        last_driver = active_driver
 
-            await sleep(self.update_period)
+                active_driver = json.loads(await drivers.wait() or "{}")
 
-    async def iracing_generator(self):
+    async def iracing_generator(self, fields=None):
         """
-        Stream iRacing session data. This is also available via a websocket
-        connection to /stream.
+        Stream iRacing session data, optionally only the given fields. This
+        is also available via a websocket connection to /stream. Each
+        update sends the latest frame, so a client that reads slowly skips
+        frames rather than falling behind, and the stream ends if a send
+        takes longer than STREAM_MAX_LAG seconds.
         """
         started = False
+        consumer = get_broadcaster().consume(
+            "sse", self.request.client, fields, self.rate
+        )
+
+        with subscribe("frame") as frames, consumer:
+            while True:
+                if await self.request.is_disconnected():
+                    break
+
+                frame = await get_frame()
 
-        while True:
-            if await self.request.is_disconnected():
-                break
+                if frame.model:
+                    if consumer.advance(frame):
+                        consumer.begin_send()
+                        yield frame_json(frame, fields)
 
-            try:
-                session_data = get_iracing_data()
-            except (redis.exceptions.ConnectionError, TypeError):
-                session_data = {}
+                        if not consumer.end_send():
+                            break
+                elif not started:
+                    yield {}
 
-            if session_data or not started:
-                yield session_data
                 started = True
 
-            await sleep(self.update_period)
+                # Wait out the rate limit, then for the next frame. Frames
+                # published by another process are not announced here, so
+                # check at least once a period anyway.
+                await sleep(self.update_period)
+                await frames.wait(IDLE_TIMEOUT)
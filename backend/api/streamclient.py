@@ -0,0 +1,227 @@
+"""
+One websocket client of the iRacing stream, with its own sender task.
+
+The producer hands each client the messages it should get with offer(),
+which never waits on the network. If the previous message has not been
+sent yet it is replaced (latest wins), so a slow client skips frames
+instead of queueing them. A client whose oldest unsent message is more
+than max_lag seconds old is disconnected.
+
+Streams that send frames themselves (SSE and GraphQL subscriptions) pull
+the latest frame whenever they are ready for one, so they skip frames the
+same way. A StreamConsumer keeps the same statistics for them, and tells
+them to stop once a send has taken more than max_lag seconds.
+"""
+
+from time import monotonic
+from os import getenv
+import asyncio
+import logging
+
+from api.frames import FrameCursor
+
+
+def get_max_lag():
+    """
+    Longest a client may fall behind the stream before it is disconnected
+    (seconds)
+    """
+    return float(getenv("STREAM_MAX_LAG", 5))
+
+
+# Longest to wait for a websocket to close (seconds)
+CLOSE_TIMEOUT = 1
+
+
+class StreamClient:
+    def __init__(self, websocket, max_lag=None, on_close=None):
+        self.websocket = websocket
+        self.max_lag = get_max_lag() if max_lag is None else max_lag
+        self.on_close = on_close
+
+        # The next message to send and when it was offered, and when the
+        # message being sent was offered
+        self.message = None
+        self.offered_at = None
+        self.sending_since = None
+
+        # Delta clients are in step once sent a snapshot
+        self.synced = False
+
+        self.sent = 0
+        self.dropped = 0
+        self.lagging = False
+        self.closed = False
+
+        self.ready = asyncio.Event()
+        self.log = logging.getLogger(__name__)
+        self.sender = asyncio.create_task(self.__send_loop())
+
+    @property
+    def busy(self):
+        """
+        True if the last message offered has not been sent yet
+        """
+        return self.message is not None
+
+    @property
+    def lag(self):
+        """
+        Age of the oldest message not yet sent (seconds)
+        """
+        since = self.sending_since or self.offered_at
+
+        return monotonic() - since if since else 0
+
+    def offer(self, message):
+        """
+        Send this message next, in place of any not sent yet
+        """
+        if self.closed:
+            return
+
+        if self.message is not None:
+            self.dropped += 1
+
+        self.message = message
+        self.offered_at = monotonic()
+        self.ready.set()
+
+        if self.sending_since and self.lag > self.max_lag:
+            self.lagging = True
+            self.close()
+
+    def close(self):
+        """
+        Stop sending and close the websocket
+        """
+        if not self.closed:
+            self.sender.cancel()
+            self.__closed()
+
+    async def wait_closed(self):
+        await asyncio.gather(self.sender, return_exceptions=True)
+
+    def stats(self):
+        return client_stats(getattr(self.websocket, "client", None), self)
+
+    def __closed(self):
+        if not self.closed:
+            self.closed = True
+
+            if self.on_close:
+                self.on_close(self)
+
+    async def __send_loop(self):
+        try:
+            while True:
+                await self.ready.wait()
+                self.ready.clear()
+
+                message, self.message = self.message, None
+                self.sending_since, self.offered_at = self.offered_at, None
+
+                await asyncio.wait_for(self.__send(message), self.max_lag)
+
+                self.sent += 1
+                self.sending_since = None
+        except asyncio.CancelledError:
+            pass
+        except asyncio.TimeoutError:
+            self.lagging = True
+        except Exception as e:
+            # Disconnected
+            self.log.debug(f"Stream send failed: {e}")
+        finally:
+            self.__closed()
+
+            try:
+                await asyncio.wait_for(self.websocket.close(), CLOSE_TIMEOUT)
+            except Exception:
+                # Already closed, or not responding
+                pass
+
+    async def __send(self, message):
+        if isinstance(message, bytes):
+            await self.websocket.send_bytes(message)
+        else:
+            await self.websocket.send_text(message)
+
+
+class StreamConsumer:
+    """
+    An SSE or GraphQL stream of frames, following the frames with a cursor.
+    Call begin_send() before sending a frame and end_send() after, and stop
+    the stream if end_send() returns False. Use as a context manager, or
+    close it when the stream ends.
+    """
+
+    def __init__(self, client=None, max_lag=None, on_close=None):
+        self.client = client  # Address (host, port), if known
+        self.max_lag = get_max_lag() if max_lag is None else max_lag
+        self.on_close = on_close
+
+        self.cursor = FrameCursor()
+        self.sending_since = None
+        self.sent = 0
+        self.lagging = False
+        self.closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @property
+    def dropped(self):
+        return self.cursor.skipped
+
+    @property
+    def lag(self):
+        """
+        How long the frame being sent has taken so far (seconds)
+        """
+        return monotonic() - self.sending_since if self.sending_since else 0
+
+    def advance(self, frame):
+        """
+        Move to the given frame. Returns True if it has not been sent yet.
+        """
+        return self.cursor.advance(frame)
+
+    def begin_send(self):
+        self.sending_since = monotonic()
+
+    def end_send(self):
+        """
+        Record a frame sent. Returns False if it took more than max_lag
+        seconds, in which case the stream should stop.
+        """
+        self.lagging = self.lag > self.max_lag
+        self.sending_since = None
+        self.sent += 1
+
+        return not self.lagging
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+
+            if self.on_close:
+                self.on_close(self)
+
+    def stats(self):
+        return client_stats(self.client, self)
+
+
+def client_stats(client, stream):
+    """
+    The statistics shared by every kind of stream client
+    """
+    return {
+        "client": f"{client.host}:{client.port}" if client else None,
+        "sent": stream.sent,
+        "dropped": stream.dropped,
+        "lag": round(stream.lag, 3),
+    }
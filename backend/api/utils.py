@@ -1,58 +1,283 @@
 """
 Common utility functions used throughout the API, namely access to the Redis
-cache for real-time iRacing data and active driver changes
+cache for real-time iRacing data and active driver changes.
+
+Every Redis call goes through a circuit breaker. While Redis is unreachable,
+calls are not attempted (apart from a probe every REDIS_RETRY_INTERVAL
+seconds) and use an in-memory fallback store, so an outage costs nothing
+per frame. While Redis is up, this process's writes to the latest-value
+keys (MIRRORED_KEYS) are mirrored to the fallback store, so readers keep
+seeing them when an outage starts.
 """
 
+from uuid import uuid4
 from os import getenv
+import itertools
+import threading
 import redis
 import json
 
-from api.wsconnectionmanager import WebsocketConnectionManager
-from database import schemas, iracingschemas, crud
+from api.circuitbreaker import CircuitBreaker
+from api.fallbackstore import FallbackStore
+from api.metrics import add_metrics
+from api.notifier import notifier
+from api.framestore import get_frame_store, get_history_length
+from api.frames import (
+    FrameDecoder,
+    SessionInfoEncoder,
+    select_frames,
+    stream_bounds,
+    frames_from_stream,
+    split_session_info,
+    join_json,
+)
+from database import schemas, crud
 from database.database import get_db
 from database import models
 
 
+REDIS_ERRORS = (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError)
+
+redis_breaker = CircuitBreaker(
+    "Redis",
+    failure_threshold=int(getenv("REDIS_FAILURE_THRESHOLD", 3)),
+    reset_timeout=float(getenv("REDIS_RETRY_INTERVAL", 5)),
+)
+fallback_store = FallbackStore()
+
+add_metrics("redis", redis_breaker.stats)
+
+# Notifications are published to Redis on NOTIFY_CHANNEL + topic, tagged
+# with this process's origin so it does not deliver its own twice
+NOTIFY_CHANNEL = "notify:"
+NOTIFY_ORIGIN = uuid4().hex
+
+# Keys whose latest values are kept in the fallback store while Redis is up.
+# Frame history is not mirrored, as it would keep a second copy of every
+# recent frame in memory.
+MIRRORED_KEYS = {
+    "session_data",
+    "session_sequence",
+    "session_info",
+    "active_driver",
+    "session_best_lap",
+}
+
+
+def call_redis(command, mirror=None):
+    """
+    Run command(store) on Redis through the circuit breaker, or on the
+    fallback store while Redis is unavailable. Any of the values in mirror
+    (key: value) that are in MIRRORED_KEYS are also set in the fallback
+    store when the command succeeds on Redis.
+    """
+    if redis_breaker.allow():
+        try:
+            result = command(get_redis_store())
+        except REDIS_ERRORS:
+            redis_breaker.record_failure()
+        else:
+            redis_breaker.record_success()
+
+            if mirror:
+                mirror_values(mirror)
+
+            return result
+
+    return command(fallback_store)
+
+
+def mirror_values(values):
+    """
+    Set the values of mirrored keys in the fallback store
+    """
+    for key, value in values.items():
+        if key in MIRRORED_KEYS:
+            fallback_store.set(key, value)
+
+
+# Frames read from Redis, decoded once per change
+frame_decoder = FrameDecoder()
+
+
+def get_frame():
+    """
+    Get the latest Frame of iRacing data from the frame store or Redis
+    """
+    frame_store = get_frame_store()
+
+    if frame_store:
+        return frame_store.get()
+
+    # One round trip. The data is only decoded when there is a new frame.
+    values = call_redis(lambda store: store.mget(["session_sequence", "session_data"]))
+
+    return frame_decoder.decode(*values)
+
+
 def get_iracing_data():
     """
-    Helper function to retrieve iRacing data from Redis
+    Helper function to retrieve iRacing data from the frame store or Redis
     """
-    session_data = read_redis_key("session_data")
+    return get_frame().model or {}
+
 
-    if session_data.get("SessionTime"):
-        return iracingschemas.IracingFrame(**session_data)
+# Sequence numbers for frames published to Redis
+frame_sequence = itertools.count(1)
 
-    return {}
+# Session info published to Redis, encoded once per change
+session_info_encoder = SessionInfoEncoder()
 
 
-def get_active_driver_from_cache():
+def publish_session_data(session_data, keys=()):
+    """
+    Publish the latest raw iRacing data as a new frame to the frame store,
+    or to Redis, and notify streams waiting for it. Any keys given are
+    read from Redis, in the same round trip as the publish if it goes to
+    Redis. Returns the keys read (see update_redis_keys).
+    """
+    frame_store = get_frame_store()
+
+    if not frame_store:
+        sequence = next(frame_sequence)
+        telemetry, session_info = split_session_info(session_data)
+        telemetry_text = json.dumps(telemetry)
+        session_info_text = session_info_encoder.encode(session_info)
+        text = join_json(telemetry_text, session_info_text)
+        values = {"session_data": text, "session_sequence": sequence}
+        history_length = get_history_length()
+        streams = []
+
+        # Keep the telemetry of recent frames in a capped stream, and the
+        # session info once, when it changes. It is also written once per
+        # history length, in case Redis lost it.
+        if history_length:
+            fields = {"sequence": sequence, "data": telemetry_text}
+            streams.append(("session_stream", fields, history_length))
+
+            if (
+                session_info_text is not session_info_encoder.written
+                or sequence % history_length == 0
+            ):
+                values["session_info"] = session_info_text
+
+        read = update_redis_keys(values, keys, streams)
+
+        # Written to the fallback store during an outage, so write it to
+        # Redis again once it is back
+        if history_length and redis_breaker.available:
+            session_info_encoder.written = session_info_text
+    else:
+        frame_store.publish(session_data)
+        read = read_redis_keys(keys) if keys else {}
+
+    # Frames are only announced in this process, where the worker runs.
+    # Streams in other processes poll for them.
+    notifier.notify("frame")
+
+    return read
+
+
+def get_frames(after=None, since=None, until=None, limit=None):
+    """
+    Get recent frames of iRacing data from the frame store or Redis, oldest
+    first: those after a sequence number, and/or published between since
+    and until (Unix times). At most limit of the oldest are returned.
+    """
+    frame_store = get_frame_store()
+
+    if frame_store:
+        return frame_store.get_range(after, since, until, limit)
+
+    low, high = stream_bounds(since, until)
+
+    def fetch(store):
+        if after is None:
+            entries = store.xrange("session_stream", low, high, count=limit)
+            return entries, store.get("session_info")
+
+        # Sequence numbers are contiguous, so the frames after one are the
+        # newest (latest - after) entries
+        latest, session_info = store.mget(["session_sequence", "session_info"])
+        latest = int(latest or 0)
+
+        if latest <= after:
+            return [], None
+
+        entries = store.xrevrange("session_stream", high, low, count=latest - after)
+
+        return entries[::-1], session_info
+
+    entries, session_info = call_redis(fetch)
+
+    return select_frames(frames_from_stream(entries, session_info), after, limit=limit)
+
+
+def get_active_driver_from_cache(active_driver_dict=None):
     """
     Get the active driver from cache.
-    Tries the Redis cache first. If it is empty, check the database.
+    Tries the Redis cache first (unless the cached value has already been
+    read). If it is empty, check the database.
     """
-    redis_store = get_redis_store()
+    if active_driver_dict is None:
+        active_driver_dict = read_redis_key("active_driver")
+
+    try:
+        return schemas.Driver(**active_driver_dict)
+    except TypeError:
+        return load_active_driver()
+
+
+def load_active_driver():
+    """
+    Get the active driver from the database, or None if there is none. This
+    blocks, so async callers run it in a thread.
+    """
+    db = next(get_db())
 
     try:
-        active_driver_dict = json.loads(redis_store.get("active_driver"))
-        active_driver = schemas.Driver(**active_driver_dict)
-    except (redis.exceptions.ConnectionError, TypeError):
-        db = next(get_db())
         active_driver_object = crud.get_active_driver(db)
 
-        if active_driver_object:
-            active_driver = active_driver_object.driver
-        else:
-            # No active driver, empty response
+        if not active_driver_object:
             return None
 
+        active_driver = schemas.Driver.from_orm(active_driver_object.driver)
+    finally:
+        db.close()
+
+    # Remember it while Redis is down, rather than asking the database
+    # again on every frame
+    if not redis_breaker.available:
+        fallback_store.set("active_driver", active_driver.json())
+
     return active_driver
 
 
+# Called with the driver whenever the active driver is updated by this
+# process, so the worker can start preloading their settings right away
+driver_listeners = []
+
+
+def add_driver_listener(callback):
+    """
+    Register a callback for active driver updates
+    """
+    driver_listeners.append(callback)
+
+
 def update_driver_cache(driver):
     """
     Helper function to update the active driver in the Redis cache
     """
-    return set_redis_key("active_driver", schemas.Driver.from_orm(driver).json())
+    driver_json = schemas.Driver.from_orm(driver).json()
+    result = set_redis_key("active_driver", driver_json)
+
+    for listener in driver_listeners:
+        listener(driver)
+
+    notify("active_driver", driver_json)
+
+    return result
 
 
 def get_session_best_lap():
@@ -66,25 +291,93 @@ def set_session_best_lap(laptime: models.LapTime):
     """
     Update the session best lap time for streaming
     """
-    return set_redis_key("session_best_lap", schemas.LapTime.from_orm(laptime).json())
+    laptime_json = schemas.LapTime.from_orm(laptime).json()
+    result = set_redis_key("session_best_lap", laptime_json)
+
+    notify("laptimes", laptime_json)
+
+    return result
+
+
+def notify(topic, value=None):
+    """
+    Notify streams of a change, in this process and (through Redis pub/sub)
+    any others. The value is a string (usually JSON), or None.
+    """
+    notifier.notify(topic, value)
+
+    call_redis(
+        lambda store: store.publish(
+            NOTIFY_CHANNEL + topic, f"{NOTIFY_ORIGIN}:{value or ''}"
+        )
+    )
 
 
 def read_redis_key(key):
     """
     Helper function to read data from Redis
     """
-    redis_store = get_redis_store()
-
     try:
-        return json.loads(redis_store.get(key))
-    except redis.exceptions.ConnectionError:
-        print("Could not connect to Redis server")
-        return None
+        return json.loads(call_redis(lambda store: store.get(key)))
     except TypeError:
         # Redis key does not exist
         return None
 
 
+def read_redis_keys(keys):
+    """
+    Helper function to read several keys from Redis in one round trip.
+    Missing keys are None.
+    """
+    values = call_redis(lambda store: store.mget(keys))
+
+    return {
+        key: json.loads(value) if value is not None else None
+        for key, value in zip(keys, values)
+    }
+
+
+def set_redis_keys(values):
+    """
+    Helper function to set several keys in Redis in one round trip. Returns
+    False if Redis is unavailable.
+    """
+    update_redis_keys(values)
+
+    return redis_breaker.available
+
+
+def update_redis_keys(values, keys=(), streams=()):
+    """
+    Helper function to set some keys and read others in a single pipelined
+    round trip, applied atomically. Entries can also be added to streams,
+    given as (name, fields, maximum length). Returns the keys read (None if
+    missing).
+    """
+
+    def execute(store):
+        pipeline = store.pipeline()
+
+        for key, value in values.items():
+            pipeline.set(key, value)
+
+        for name, fields, maxlen in streams:
+            pipeline.xadd(name, fields, maxlen=maxlen, approximate=True)
+
+        if keys:
+            pipeline.mget(keys)
+
+        return pipeline.execute()
+
+    results = call_redis(execute, mirror=values)
+    read = results[-1] if keys else []
+
+    return {
+        key: json.loads(value) if value is not None else None
+        for key, value in zip(keys, read)
+    }
+
+
 def subscribe_to_redis_key(key: str, callback):
     redis_store = get_redis_store()
     p = redis_store.pubsub()
@@ -97,30 +390,60 @@ def subscribe_to_redis_key(key: str, callback):
 
 def set_redis_key(key, value):
     """
-    Helper function to set data in Redis
+    Helper function to set data in Redis. Returns False if Redis is
+    unavailable.
     """
-    redis_store = get_redis_store()
+    call_redis(lambda store: store.set(key, value), mirror={key: value})
 
-    try:
-        redis_store.set(key, value)
-        return True
-    except redis.exceptions.ConnectionError:
-        print("Could not connect to Redis server")
-        return False
+    return redis_breaker.available
 
 
-def get_redis_store():
+# One client and connection pool shared by the whole process
+shared_redis_store = None
+redis_store_lock = threading.Lock()
+
+
+def get_redis_pool():
     """
-    Get a connection to the Redis cache
+    Create a Redis connection pool. Size, health check interval and connect
+    timeout (seconds) come from REDIS_POOL_SIZE, REDIS_HEALTH_CHECK_INTERVAL
+    and REDIS_CONNECT_TIMEOUT. Callers wait for a free connection rather
+    than failing when the pool is exhausted.
     """
-    return redis.Redis(
-        host=getenv("REDIS_HOST", "127.0.0.1"), charset="utf-8", decode_responses=True
+    return redis.BlockingConnectionPool(
+        host=getenv("REDIS_HOST", "127.0.0.1"),
+        max_connections=int(getenv("REDIS_POOL_SIZE", 20)),
+        health_check_interval=int(getenv("REDIS_HEALTH_CHECK_INTERVAL", 30)),
+        socket_connect_timeout=float(getenv("REDIS_CONNECT_TIMEOUT", 1)),
+        timeout=5,
+        encoding="utf-8",
+        decode_responses=True,
     )
 
 
-def get_ws_manager():
+def get_redis_store():
+    """
+    Get the process-wide Redis client. Connections come from a shared pool,
+    so there is no connection setup after the first few calls.
+    """
+    global shared_redis_store
+
+    if shared_redis_store is None:
+        with redis_store_lock:
+            if shared_redis_store is None:
+                shared_redis_store = redis.Redis(connection_pool=get_redis_pool())
+
+    return shared_redis_store
+
+
+def reset_redis_store():
     """
-    Used to pass a websocket manager object to routers
-    via dependency injection
+    Close all pooled connections, so the next call to get_redis_store()
+    creates a new pool (e.g. after changing its settings)
     """
-    return WebsocketConnectionManager()
+    global shared_redis_store
+
+    with redis_store_lock:
+        if shared_redis_store is not None:
+            shared_redis_store.connection_pool.disconnect()
+            shared_redis_store = None
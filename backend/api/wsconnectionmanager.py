@@ -1,33 +0,0 @@
-from fastapi import WebSocket
-from typing import List
-
-
-class WebsocketConnectionManager:
-    """
-    Object to manage multiple websocket connections
-    """
-
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
-
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
-
-    async def disconnect(self, websocket: WebSocket):
-        await websocket.close()
-        self.active_connections.remove(websocket)
-
-    async def send_text(self, message: str, websocket: WebSocket):
-        await websocket.send_text(message)
-
-    async def broadcast_text(self, message: str):
-        for connection in self.active_connections:
-            await connection.send_text(message)
-
-    async def send_json(self, message: dict, websocket: WebSocket):
-        await websocket.send_json(message)
-
-    async def broadcast_json(self, message: dict):
-        for connection in self.active_connections:
-            await connection.send_json(message)
@@ -0,0 +1,189 @@
+"""
+LED output benchmark. Replays telemetry through an RpmGauge and a WLED
+controller (E1.31 or DDP) into a virtual receiver on localhost, then reports
+sustained fps, packets per second, inter-frame jitter and render-to-wire
+latency. No hardware needed.
+
+The first pixel of each frame sent carries the frame's index, so received
+frames are matched to when they were rendered even if some are lost.
+
+Run from the backend directory:
+    python -m benchmarks.ledoutput [recording.json] --transport ddp --leds 300
+
+Recordings are the JSON files saved by mock-api/src/record.py. Without one,
+a synthetic rev sweep is replayed.
+"""
+
+from time import perf_counter, sleep
+from statistics import mean, pstdev
+from colour import Color
+import argparse
+import ujson
+
+from e131.virtualreceiver import VirtualReceiver
+from display.colortheme import ColorTheme
+from display.rpmgauge import RpmGauge
+from e131.wled import Wled
+from e131.ddp import Ddp
+
+TELEMETRY_RATE = 60
+
+
+def load_telemetry(path):
+    """
+    Load (rpm, redline) samples from a recorded session
+    """
+    with open(path) as file:
+        frames = ujson.load(file)
+
+    samples = []
+    for frame in frames:
+        if frame and frame.get("RPM") is not None:
+            redline = (frame.get("DriverInfo") or {}).get("DriverCarRedLine") or 20000
+            samples.append((frame["RPM"], redline))
+
+    return samples
+
+
+def synthetic_telemetry(idle=1000, redline=8000, sweep_time=1.5):
+    """
+    A repeating rev sweep from idle to redline, sampled at 60 Hz
+    """
+    count = int(sweep_time * TELEMETRY_RATE)
+    return [(idle + (redline - idle) * i / count, redline) for i in range(count)]
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def mark(data, index):
+    """
+    Write a frame index into the first pixel of a frame
+    """
+    data[:3] = (index & 0xFFFFFF).to_bytes(3, "big")
+
+
+def frame_index(frame):
+    """
+    Read the frame index from the first pixel of a received frame
+    """
+    return int.from_bytes(frame.data[:3], "big")
+
+
+def summarize(render_times, frames, elapsed, framerate):
+    """
+    Compute output statistics from render timestamps and received frames,
+    matched by the index marked in each frame. Times are reported in
+    milliseconds.
+    """
+    arrivals = [frame.timestamp for frame in frames]
+    intervals = [b - a for a, b in zip(arrivals, arrivals[1:])]
+
+    # The first arrival of each frame rendered
+    received = {}
+    for frame in frames:
+        index = frame_index(frame)
+
+        if index < len(render_times):
+            received.setdefault(index, frame)
+
+    latencies = [
+        frame.timestamp - render_times[index] for index, frame in received.items()
+    ]
+
+    # Only packets that made up frames, not the stream termination packets
+    # sent on stop
+    packets = sum(frame.packets for frame in frames)
+
+    stats = {
+        "frames_rendered": len(render_times),
+        "frames_received": len(received),
+        "frames_lost": len(render_times) - len(received),
+        "fps": 0.0,
+        "packets_per_second": packets / elapsed if elapsed else 0.0,
+        "packets_per_frame": packets / len(frames) if frames else 0.0,
+        "jitter_ms": 0.0,
+        "max_frame_deviation_ms": 0.0,
+        "latency_mean_ms": 0.0,
+        "latency_p99_ms": 0.0,
+        "latency_max_ms": 0.0,
+    }
+
+    if intervals:
+        stats["fps"] = len(intervals) / (arrivals[-1] - arrivals[0])
+        stats["jitter_ms"] = pstdev(intervals) * 1000
+        stats["max_frame_deviation_ms"] = (
+            max(abs(interval - 1 / framerate) for interval in intervals) * 1000
+        )
+
+    if latencies:
+        stats["latency_mean_ms"] = mean(latencies) * 1000
+        stats["latency_p99_ms"] = percentile(latencies, 0.99) * 1000
+        stats["latency_max_ms"] = max(latencies) * 1000
+
+    return stats
+
+
+def run_benchmark(
+    telemetry, transport="e131", led_count=120, framerate=60, duration=5.0
+):
+    """
+    Drive a gauge and controller at the given framerate for a duration,
+    returning the summary statistics
+    """
+    receiver = VirtualReceiver(led_count, transport)
+    receiver.start()
+
+    if transport == "ddp":
+        controller = Ddp.connect("127.0.0.1", led_count, port=receiver.port)
+    else:
+        controller = Wled.connect("127.0.0.1", led_count, port=receiver.port)
+
+    gauge = RpmGauge(led_count, ColorTheme(Color("green"), Color("red")))
+    render_times = []
+    frame_count = int(duration * framerate)
+    start = perf_counter()
+
+    for i in range(frame_count):
+        delay = start + i / framerate - perf_counter()
+        if delay > 0:
+            sleep(delay)
+
+        rpm, redline = telemetry[int(i / framerate * TELEMETRY_RATE) % len(telemetry)]
+
+        render_times.append(perf_counter())
+        gauge.set_redline(redline)
+        gauge.set_rpm(rpm)
+
+        data = gauge.to_dmx()
+        mark(data, i)
+        controller.update_dmx(data)
+
+    elapsed = perf_counter() - start
+    receiver.wait_for_frames(frame_count, timeout=0.5)
+
+    controller.stop()
+    receiver.stop()
+
+    return summarize(render_times, receiver.frames, elapsed, framerate)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LED output benchmark")
+    parser.add_argument("file", nargs="?", help="recorded session (JSON)")
+    parser.add_argument("--transport", default="e131", choices=["e131", "ddp"])
+    parser.add_argument("--leds", type=int, default=120, help="number of pixels")
+    parser.add_argument("--fps", type=int, default=60, help="target framerate")
+    parser.add_argument("--duration", type=float, default=5, help="seconds to run")
+    args = parser.parse_args()
+
+    telemetry = load_telemetry(args.file) if args.file else synthetic_telemetry()
+    stats = run_benchmark(telemetry, args.transport, args.leds, args.fps, args.duration)
+
+    for name, value in stats.items():
+        if isinstance(value, float):
+            value = f"{value:.2f}"
+
+        print(f"{name:>24}: {value}")
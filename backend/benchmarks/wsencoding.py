@@ -0,0 +1,163 @@
+"""
+Websocket encoding benchmark. Streams the same frames through the
+broadcaster's stream groups to in-process clients in each mode (full,
+delta) and encoding (json, msgpack), and reports the bytes sent per frame
+per client, the server time per frame and per client, and the time a
+client takes to decode a frame. No server or network needed.
+
+Run from the backend directory:
+    python -m benchmarks.wsencoding [recording.json] --clients 20 --fields RPM,Gear
+
+Recordings are the JSON files saved by mock-api/src/record.py. Without one,
+frames are generated from a test snapshot with changing telemetry.
+"""
+
+from time import perf_counter
+import argparse
+import asyncio
+import json
+
+import msgpack
+import ujson
+
+from api.broadcaster import StreamGroup, DeltaStreamGroup
+from api.encoding import ENCODINGS
+from api.frames import Frame
+from api.projection import parse_fields
+from api.streamclient import StreamClient
+from raceparse.iracingstream import IracingStream
+
+TEST_FILE = "tests/data/summit_mx5_practice.bin"
+
+
+class CountingWebSocket:
+    """
+    Counts the messages and bytes sent to it. Text is counted in
+    characters, which for JSON is the same as bytes.
+    """
+
+    def __init__(self):
+        self.messages = 0
+        self.bytes = 0
+        self.last = None
+
+    async def send_text(self, message):
+        self.messages += 1
+        self.bytes += len(message)
+        self.last = message
+
+    async def send_bytes(self, message):
+        await self.send_text(message)
+
+    async def close(self):
+        pass
+
+
+def load_recording(path):
+    with open(path) as file:
+        return [frame for frame in ujson.load(file) if frame]
+
+
+def synthetic_frames(count):
+    """
+    Frames of a test snapshot with the fast changing telemetry varied
+    """
+    stream = IracingStream.get_stream(test_file=TEST_FILE)
+    snapshot = stream.latest(raw=True)
+    stream.stop()
+
+    frames = []
+    for i in range(count):
+        data = dict(snapshot)
+        data["SessionTime"] = snapshot["SessionTime"] + i / 60
+        data["SessionTick"] = snapshot["SessionTick"] + i
+        data["RPM"] = 1000 + (i * 97) % 6000
+        data["Speed"] = (i * 0.37) % 60
+        data["Throttle"] = (i % 60) / 60
+        data["Brake"] = 1 - (i % 60) / 60
+        data["LapCurrentLapTime"] = i / 60
+        frames.append(data)
+
+    return frames
+
+
+async def run(raw_frames, mode, encoding, fields, client_count):
+    """
+    Send every frame to client_count clients, returning the statistics
+    """
+    if mode == "delta":
+        group = DeltaStreamGroup(fields, encoding)
+    else:
+        group = StreamGroup(fields, encoding)
+
+    websockets = [CountingWebSocket() for _ in range(client_count)]
+    group.clients = [StreamClient(websocket, max_lag=60) for websocket in websockets]
+
+    # Validation is the same for every encoding, so leave it out
+    frames = [Frame(sequence, data) for sequence, data in enumerate(raw_frames, 1)]
+    for frame in frames:
+        frame.model
+
+    decode = msgpack.unpackb if encoding == "msgpack" else json.loads
+    server_time = decode_time = 0
+
+    for frame in frames:
+        start = perf_counter()
+        group.send(frame)
+
+        while any(client.busy or client.sending_since for client in group.clients):
+            await asyncio.sleep(0)
+
+        sent = perf_counter()
+
+        # One client decoding the message
+        decode(websockets[0].last)
+        server_time += sent - start
+        decode_time += perf_counter() - sent
+
+    for client in group.clients:
+        client.close()
+
+    return {
+        "bytes": websockets[0].bytes / len(frames),
+        "server_ms": server_time / len(frames) * 1000,
+        "client_us": server_time / len(frames) / client_count * 1e6,
+        "decode_us": decode_time / len(frames) * 1e6,
+    }
+
+
+async def main(args):
+    raw_frames = load_recording(args.recording) if args.recording else None
+    raw_frames = raw_frames or synthetic_frames(args.frames)
+    fields = parse_fields(args.fields, args.preset)
+
+    print(
+        f"{len(raw_frames)} frames, {args.clients} clients, "
+        f"fields: {', '.join(fields) if fields else 'all'}\n"
+    )
+    print(
+        f"{'mode':>6} {'encoding':>9} {'bytes':>9} {'server ms':>10} "
+        f"{'us/client':>10} {'decode us':>10}"
+    )
+
+    for mode in ["full", "delta"]:
+        for encoding in ENCODINGS:
+            stats = await run(raw_frames, mode, encoding, fields, args.clients)
+            print(
+                f"{mode:>6} {encoding:>9} {stats['bytes']:>9.0f} "
+                f"{stats['server_ms']:>10.3f} {stats['client_us']:>10.1f} "
+                f"{stats['decode_us']:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Websocket encoding benchmark")
+    parser.add_argument("recording", nargs="?", help="recorded session (JSON)")
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument(
+        "--frames", type=int, default=600, help="synthetic frames to send"
+    )
+    parser.add_argument("--fields", help="comma separated fields to project")
+    parser.add_argument("--preset", help="field preset to project")
+
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,114 @@
+"""
+Websocket load test. Opens an increasing number of clients on the iRacing
+stream and reports the frame rate each client actually receives, to find
+the client count at which frame delivery starts to lag.
+
+Start SimRigLights (with iRacing or a test recording producing data), then
+run from the backend directory:
+    python -m benchmarks.wsload --host localhost --port 8000 --steps 10,50,100
+
+Run it against two builds to compare them.
+"""
+
+from time import perf_counter
+from statistics import mean
+import argparse
+import asyncio
+
+import websockets
+
+# The stream sends every frame the worker publishes (50 a second by
+# default). Use --rate for other worker frame rates.
+STREAM_RATE = 50
+LAG_THRESHOLD = 0.9
+
+
+async def client(url, duration, intervals):
+    """
+    Receive frames for duration seconds, recording the time between them
+    """
+    # Without compression, so the load test process itself is not the
+    # bottleneck decompressing every client's frames
+    async with websockets.connect(url, max_size=None, compression=None) as websocket:
+        # Skip the first frame, which may have been queued before the start
+        await websocket.recv()
+        last = perf_counter()
+        end = last + duration
+
+        while (now := perf_counter()) < end:
+            try:
+                await asyncio.wait_for(websocket.recv(), end - now)
+            except asyncio.TimeoutError:
+                break
+
+            now = perf_counter()
+            intervals.append(now - last)
+            last = now
+
+
+async def run_step(url, count, duration):
+    """
+    Run count clients at once, returning the frame intervals of each
+    """
+    intervals = [[] for _ in range(count)]
+    results = await asyncio.gather(
+        *(client(url, duration, client_intervals) for client_intervals in intervals),
+        return_exceptions=True,
+    )
+    failed = sum(isinstance(result, Exception) for result in results)
+
+    return [values for values in intervals if values], failed
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+async def main(args):
+    url = f"ws://{args.host}:{args.port}/iracing/stream"
+    lagging_at = None
+
+    print(f"{'clients':>8} {'fps':>8} {'min fps':>8} {'p95 ms':>8} {'failed':>8}")
+
+    for count in args.steps:
+        intervals, failed = await run_step(url, count, args.duration)
+
+        if not intervals:
+            print(f"{count:>8} {'-':>8} {'-':>8} {'-':>8} {failed:>8}")
+            lagging_at = lagging_at or count
+            continue
+
+        rates = [len(values) / sum(values) for values in intervals]
+        p95 = percentile([value for values in intervals for value in values], 0.95)
+
+        print(
+            f"{count:>8} {mean(rates):>8.1f} {min(rates):>8.1f} "
+            f"{p95 * 1000:>8.1f} {failed:>8}"
+        )
+
+        if lagging_at is None and (failed or min(rates) < args.rate * LAG_THRESHOLD):
+            lagging_at = count
+
+    if lagging_at:
+        print(f"\nFrame delivery starts to lag at {lagging_at} clients")
+    else:
+        print("\nNo lag at any client count tested")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Websocket stream load test")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--steps",
+        type=lambda value: [int(step) for step in value.split(",")],
+        default=[1, 10, 25, 50, 100, 200],
+        help="comma separated client counts",
+    )
+    parser.add_argument("--duration", type=float, default=10, help="seconds per step")
+    parser.add_argument(
+        "--rate", type=float, default=STREAM_RATE, help="expected fps per client"
+    )
+
+    asyncio.run(main(parser.parse_args()))
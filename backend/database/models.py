@@ -114,6 +114,10 @@ class LightController(Base):
     name = Column(String, unique=True)
     ipAddress = Column(String, unique=True)
     universe = Column(Integer, default=1)
+    ledCount = Column(Integer, default=120)
+    transport = Column(String, default="e131")  # "e131" or "ddp"
+    matrixWidth = Column(Integer, nullable=True)  # Set for 2D matrix panels
+    matrixLayout = Column(String, default="serpentine")  # Or "row-major"
 
     lightControllerSettings = relationship(
         "LightControllerSettings",
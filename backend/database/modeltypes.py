@@ -30,10 +30,19 @@ class QuoteType:
 
 
 @strawberry.experimental.pydantic.type(
-    description="A WLED controller", model=schemas.LightController, all_fields=True
+    description="A WLED controller", model=schemas.LightController
 )
 class LightControllerType:
-    pass
+    id: strawberry.auto
+    name: strawberry.auto
+    ipAddress: strawberry.auto
+    universe: strawberry.auto
+    ledCount: strawberry.auto
+    matrixWidth: strawberry.auto
+
+    # Override literal types (validated by the schema)
+    transport: str
+    matrixLayout: str
 
 
 @strawberry.experimental.pydantic.type(
@@ -5,9 +5,17 @@ for the API
 Schemas are provided for CRUD operations on all models
 """
 
-from pydantic import BaseModel
+from pydantic import BaseModel, conint
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Literal
+
+# Light controller transports and matrix wiring layouts
+Transport = Literal["e131", "ddp"]
+MatrixLayout = Literal["serpentine", "row-major"]
+
+# LEDs per light controller, up to the most a WLED controller takes over
+# E1.31 (see e131.exceptions.WledMaxPixelsExceeded)
+LedCount = conint(ge=1, le=1500)
 
 
 class Availability(BaseModel):
@@ -90,12 +98,20 @@ class LightControllerBase(BaseModel):
     name: str
     ipAddress: str
     universe: int
+    ledCount: LedCount = 120
+    transport: Transport = "e131"
+    matrixWidth: Optional[int] = None
+    matrixLayout: MatrixLayout = "serpentine"
 
 
 class LightControllerCreate(LightControllerBase):
     name: str
     ipAddress: str
     universe: int
+    ledCount: LedCount = 120
+    transport: Transport = "e131"
+    matrixWidth: Optional[int] = None
+    matrixLayout: MatrixLayout = "serpentine"
 
 
 class LightControllerUpdate(LightControllerBase):
@@ -103,6 +119,10 @@ class LightControllerUpdate(LightControllerBase):
     name: Optional[str] = None
     ipAddress: Optional[str] = None
     universe: Optional[int] = None
+    ledCount: Optional[LedCount] = None
+    transport: Optional[Transport] = None
+    matrixWidth: Optional[int] = None
+    matrixLayout: Optional[MatrixLayout] = None
 
 
 class LightControllerDelete(LightControllerUpdate):
@@ -1,8 +1,54 @@
+from colour import Color
+
+from display.palette import gradient_type, DEFAULT_GRADIENT
+
+
 class ColorTheme:
     """
     A theme applied to an LED display
     """
 
-    def __init__(self, primary_color, secondary_color):
+    def __init__(
+        self, primary_color, secondary_color, id=None, gradient=DEFAULT_GRADIENT
+    ):
         self.primary_color = primary_color
         self.secondary_color = secondary_color
+        self.id = id  # Database ID, if loaded from a color theme model
+        self.gradient_type = gradient_type(gradient)
+
+    @property
+    def key(self):
+        """
+        Identifies the palette this theme renders. Includes the colors, so a
+        theme edited in the database never reuses a stale palette.
+        """
+        return (
+            self.id,
+            self.gradient_type,
+            self.primary_color.hex_l,
+            self.secondary_color.hex_l,
+        )
+
+    @staticmethod
+    def from_model(theme):
+        """
+        Create a theme from a color theme database model
+        """
+        return ColorTheme(
+            Color(
+                rgb=(
+                    theme.primaryColorR / 255,
+                    theme.primaryColorG / 255,
+                    theme.primaryColorB / 255,
+                )
+            ),
+            Color(
+                rgb=(
+                    theme.secondaryColorR / 255,
+                    theme.secondaryColorG / 255,
+                    theme.secondaryColorB / 255,
+                )
+            ),
+            theme.id,
+            theme.gradientType,
+        )
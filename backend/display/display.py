@@ -1,4 +1,5 @@
-from colour import Color
+from display.idleeffects import build_idle_effect, DEFAULT_IDLE_EFFECT
+from display.palette import get_palette
 
 
 class Display:
@@ -9,5 +10,73 @@ class Display:
     """
 
     def __init__(self, led_count, color_theme):
-        self.led_count = led_count  # 1D pixel count
+        self.led_count = led_count  # Total pixel count
         self.color_theme = color_theme  # Contains a primary and secondary color
+
+        self.idle_effect_id = DEFAULT_IDLE_EFFECT
+        self.idle_effect = None  # Built on first use
+
+    def set_gear(self, gear):
+        """
+        Set the current gear, for displays that show it
+        """
+
+    def set_flags(self, flags):
+        """
+        Set the session flags (irsdk SessionFlags bits), for displays that
+        show them
+        """
+
+    def set_shift_points(self, values):
+        """
+        Set the car's (first, shift, last, blink) shift light RPMs, for
+        displays with shift lights
+        """
+
+    def set_pit_limiter(self, active):
+        """
+        Set whether the pit limiter is on, for displays that show it
+        """
+
+    def set_idle_effect(self, effect_id):
+        """
+        Choose the effect shown while the car is off track, building its
+        frames now
+        """
+        if effect_id is None:
+            effect_id = DEFAULT_IDLE_EFFECT
+
+        if self.idle_effect and effect_id == self.idle_effect_id:
+            return
+
+        self.idle_effect_id = effect_id
+        self.idle_effect = build_idle_effect(
+            effect_id, self.led_count, get_palette(self.color_theme, self.led_count)
+        )
+
+    def to_idle_dmx(self, elapsed):
+        """
+        Get the idle effect frame (RGB bytes, 3 per pixel) showing after
+        elapsed seconds
+        """
+        if not self.idle_effect:
+            self.set_idle_effect(self.idle_effect_id)
+
+        return self.idle_effect.frame_at(elapsed)
+
+    def translate(self, value, left_min, left_max, right_min, right_max):
+        """
+        Map an RPM value to a count within the range of the LED strip
+        """
+        # Figure out how "wide" each range is
+        left_span = left_max - left_min
+        right_span = right_max - right_min
+
+        if left_span <= 0:
+            return right_max if value >= left_max else right_min
+
+        # Convert the left range into a 0-1 range (float)
+        value_scaled = float(value - left_min) / float(left_span)
+
+        # Convert the 0-1 range into a value in the right range.
+        return int(right_min + (value_scaled * right_span))
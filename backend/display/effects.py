@@ -0,0 +1,135 @@
+"""
+Time-based LED effects for shift lights: staged shift zones, a blink at the
+limiter and a pit limiter strobe.
+
+Every effect is a sequence of frames (RGB bytes, 3 per pixel) precomputed
+when the display is built. Rendering picks a frame by RPM or by the time on
+a monotonic clock, so animations keep a steady rhythm even when telemetry
+stalls. Effects are timed from the clock's own zero rather than from when
+each display was built, so every strip on the rig blinks in phase, even
+one added or rebuilt later.
+"""
+
+from collections import namedtuple
+from time import monotonic
+
+from display.palette import rgb_to_bytes
+
+# Shift light RPMs from the session info (DriverInfo.DriverCarSL*RPM). The
+# strip fills from first to last, and blinks from blink.
+ShiftPoints = namedtuple("ShiftPoints", ["first", "shift", "last", "blink"])
+
+SHIFT_STAGES = 10
+LIMITER_BLINK_RATE = 8  # Frames (on/off) per second
+PIT_LIMITER_RATE = 4
+PIT_LIMITER_COLOR = (0.0, 0.0, 1.0)
+
+
+def shift_points(values):
+    """
+    Get ShiftPoints from (first, shift, last, blink) RPMs, or None if the
+    car has no shift lights
+    """
+    if not values:
+        return None
+
+    points = ShiftPoints._make(values)
+
+    if points.first <= 0 or points.last <= points.first:
+        return None
+
+    return points
+
+
+class Effect:
+    """
+    A looping sequence of frames played at a fixed rate
+    """
+
+    def __init__(self, frames, rate):
+        self.frames = tuple(frames)
+        self.rate = rate
+
+    def frame_at(self, elapsed):
+        """
+        Get the frame showing after elapsed seconds
+        """
+        return self.frames[int(elapsed * self.rate) % len(self.frames)]
+
+
+class EffectEngine:
+    """
+    Precomputed shift light frames for one strip and palette.
+
+    Below the first shift RPM the strip is a plain gauge (no effect). From
+    there to the last shift RPM the rest of the strip fills in equal zones,
+    and from the blink RPM the whole strip flashes.
+    """
+
+    def __init__(self, led_count, palette, stages=SHIFT_STAGES, clock=monotonic):
+        self.led_count = led_count
+        self.palette = bytes(palette)
+        self.stage_count = max(min(stages, led_count), 1)
+        self.clock = clock
+
+        self.shift_points = None
+        self.stages = ()
+
+        blank = bytes(led_count * 3)
+        self.limiter = Effect([self.palette, blank], LIMITER_BLINK_RATE)
+
+        # Alternate halves of the strip
+        half = led_count // 2
+        color = rgb_to_bytes([PIT_LIMITER_COLOR])
+        self.pit_limiter = Effect(
+            [
+                color * half + bytes((led_count - half) * 3),
+                bytes(half * 3) + color * (led_count - half),
+            ],
+            PIT_LIMITER_RATE,
+        )
+
+    def set_shift_points(self, shift_points, first_length=0):
+        """
+        Precompute the shift zone frames. first_length is the number of LEDs
+        the gauge shows at the first shift RPM, where the zones start.
+        """
+        self.shift_points = shift_points
+        self.stages = ()
+
+        if not shift_points:
+            return
+
+        first_length = min(max(first_length, 0), self.led_count)
+        zone_leds = self.led_count - first_length
+
+        self.stages = tuple(
+            self.lit(first_length + zone_leds * stage // self.stage_count)
+            for stage in range(self.stage_count + 1)
+        )
+
+    def lit(self, length):
+        """
+        A frame with the first length LEDs lit
+        """
+        return self.palette[: length * 3].ljust(len(self.palette), b"\0")
+
+    def render(self, rpm, pit_limiter=False):
+        """
+        Get the frame for the current state, or None if no effect applies
+        (the strip shows the plain RPM gauge)
+        """
+        if pit_limiter:
+            return self.pit_limiter.frame_at(self.clock())
+
+        points = self.shift_points
+
+        if not points or rpm < points.first:
+            return None
+
+        if rpm >= (points.blink or points.last):
+            return self.limiter.frame_at(self.clock())
+
+        fraction = (rpm - points.first) / (points.last - points.first)
+
+        return self.stages[int(min(fraction, 1) * self.stage_count)]
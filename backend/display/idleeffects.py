@@ -0,0 +1,93 @@
+"""
+Idle effects, shown while the car is off track. Each effect is a loop of
+frames (RGB bytes, 3 per pixel) precomputed from the display's palette and
+played at a reduced frame rate, so idling costs a slice copy and a send
+per frame.
+
+Effects are chosen by LightControllerSettings.idleEffectId.
+"""
+
+from colorsys import hsv_to_rgb
+import math
+
+from display.palette import rgb_to_bytes
+from display.effects import Effect
+
+IDLE_FRAMERATE = 20
+
+OFF = 0
+BREATHE = 1
+CHASE = 2
+RAINBOW = 3
+
+IDLE_EFFECTS = {OFF: "Off", BREATHE: "Breathe", CHASE: "Chase", RAINBOW: "Rainbow"}
+DEFAULT_IDLE_EFFECT = BREATHE
+
+
+def build_idle_effect(effect_id, led_count, palette, framerate=IDLE_FRAMERATE):
+    """
+    Build the frame loop for an idle effect. Unknown effects fall back to
+    the default.
+    """
+    if effect_id not in IDLE_EFFECTS:
+        effect_id = DEFAULT_IDLE_EFFECT
+
+    palette = bytes(palette)
+
+    if effect_id == BREATHE:
+        frames = breathe(palette, framerate * 4)
+    elif effect_id == CHASE:
+        frames = chase(palette, led_count, framerate * 2)
+    elif effect_id == RAINBOW:
+        frames = rainbow(led_count, framerate * 5)
+    else:
+        frames = [bytes(led_count * 3)]
+
+    return Effect(frames, framerate)
+
+
+def breathe(palette, count):
+    """
+    The whole palette fading in and out. Each frame is a single
+    bytes.translate through a brightness table.
+    """
+    frames = []
+
+    for i in range(count):
+        brightness = 0.1 + 0.9 * (1 - math.cos(2 * math.pi * i / count)) / 2
+        table = bytes(round(value * brightness) for value in range(256))
+        frames.append(palette.translate(table))
+
+    return frames
+
+
+def chase(palette, led_count, count):
+    """
+    A segment of the palette running along the strip
+    """
+    length = max(led_count // 10, 1)
+    blank = bytes(led_count * 3)
+    frames = []
+
+    for i in range(count):
+        start = i * led_count // count * 3
+        stop = min(start + length * 3, len(palette))
+        frames.append(blank[:start] + palette[start:stop] + blank[stop:])
+
+    return frames
+
+
+def rainbow(led_count, count):
+    """
+    A rainbow across the strip, rotating along it
+    """
+    colors = rgb_to_bytes(
+        hsv_to_rgb(i / max(led_count, 1), 1.0, 1.0) for i in range(led_count)
+    )
+    frames = []
+
+    for i in range(count):
+        offset = i * led_count // count * 3
+        frames.append(colors[offset:] + colors[:offset])
+
+    return frames
@@ -0,0 +1,291 @@
+from operator import itemgetter
+
+import irsdk
+
+from display.palette import get_palette, rgb_to_bytes, bytes_to_colors
+from display.display import Display
+from display.effects import Effect
+
+# 3x5 pixel font for the gear indicator
+GLYPHS = {
+    "R": ("110", "101", "110", "101", "101"),
+    "N": ("101", "111", "111", "111", "101"),
+    "0": ("111", "101", "101", "101", "111"),
+    "1": ("010", "110", "010", "010", "111"),
+    "2": ("111", "001", "111", "100", "111"),
+    "3": ("111", "001", "111", "001", "111"),
+    "4": ("101", "101", "111", "001", "001"),
+    "5": ("111", "100", "111", "001", "111"),
+    "6": ("111", "100", "111", "101", "111"),
+    "7": ("111", "001", "010", "010", "010"),
+    "8": ("111", "101", "111", "101", "111"),
+    "9": ("111", "101", "111", "001", "111"),
+}
+GLYPH_WIDTH = 3
+GLYPH_HEIGHT = 5
+
+# Session flags shown around the gear, most important first
+FLAG_COLORS = (
+    (irsdk.Flags.red, (1.0, 0.0, 0.0)),
+    (irsdk.Flags.checkered, (1.0, 1.0, 1.0)),
+    (
+        irsdk.Flags.yellow
+        | irsdk.Flags.yellow_waving
+        | irsdk.Flags.caution
+        | irsdk.Flags.caution_waving,
+        (1.0, 1.0, 0.0),
+    ),
+    (irsdk.Flags.blue, (0.0, 0.0, 1.0)),
+    (irsdk.Flags.white, (1.0, 1.0, 1.0)),
+    (irsdk.Flags.green, (0.0, 1.0, 0.0)),
+)
+
+LAYOUTS = ("serpentine", "row-major")
+
+
+def pixel_map(width, height, layout="serpentine"):
+    """
+    Get the framebuffer pixel (row-major from the top left) shown by each
+    LED, in wiring order. Serpentine panels reverse every other row.
+    """
+    if layout not in LAYOUTS:
+        raise ValueError(f"Unknown matrix layout {layout}, expected one of {LAYOUTS}")
+
+    pixels = []
+
+    for row in range(height):
+        columns = range(width)
+
+        if layout == "serpentine" and row % 2:
+            columns = reversed(columns)
+
+        pixels.extend(row * width + column for column in columns)
+
+    return pixels
+
+
+class MatrixDisplay(Display):
+    """
+    A 2D LED matrix (gear/flag panel). The top bar_rows rows are an RPM bar
+    using the theme's palette, mapped from idle to redline, with the
+    current gear drawn below inside a frame in the color of any session
+    flag.
+
+    Everything is drawn into a row-major RGB framebuffer with slice
+    assignments, then reordered into wiring order in one step through a
+    precomputed byte index map.
+    """
+
+    def __init__(
+        self,
+        width,
+        height,
+        color_theme,
+        layout="serpentine",
+        bar_rows=1,
+        rpm=0,
+        idle_rpm=0,
+        redline=20000,
+    ):
+        super().__init__(width * height, color_theme)
+
+        self.width = width
+        self.height = height
+        self.layout = layout
+        self.bar_rows = min(bar_rows, height)
+        self.rpm = rpm
+        self.idle_rpm = idle_rpm
+        self.redline = redline
+        self.gear = None
+        self.flags = 0
+
+        self.framebuffer = bytearray(width * height * 3)
+        self.blank = bytes(len(self.framebuffer))
+        self.frame = bytearray(len(self.framebuffer))
+
+        # Framebuffer byte for each output byte, applied in one C-level call
+        self.flatten = itemgetter(
+            *(
+                pixel * 3 + channel
+                for pixel in pixel_map(width, height, layout)
+                for channel in range(3)
+            )
+        )
+
+        self.palette = get_palette(color_theme, width)
+        self.glyphs = self.__build_glyphs(rgb_to_bytes([color_theme.primary_color.rgb]))
+        self.borders = self.__build_borders()
+
+    def set_rpm(self, rpm):
+        """
+        Set the current RPM to be mapped to the RPM bar
+        """
+        if rpm is None:
+            raise TypeError
+
+        self.rpm = rpm if rpm > 0 else 0
+
+    def set_idle_rpm(self, idle_rpm):
+        """
+        Set the idle RPM (lower limit used in mapping)
+        """
+        if idle_rpm is None:
+            raise TypeError
+
+        self.idle_rpm = idle_rpm if idle_rpm > 0 else 0
+
+    def set_redline(self, redline):
+        """
+        Set the redline RPM (upper limit used in mapping)
+        """
+        if redline is None:
+            raise TypeError
+
+        self.redline = redline if redline > 0 else 0
+
+    def set_gear(self, gear):
+        """
+        Set the gear to display (-1 is reverse, 0 neutral)
+        """
+        self.gear = gear
+
+    def set_flags(self, flags):
+        """
+        Set the session flags (irsdk SessionFlags bits)
+        """
+        self.flags = flags or 0
+
+    def set_idle_effect(self, effect_id):
+        """
+        Choose the effect shown while the car is off track. Its frames are
+        built in framebuffer order, so they are remapped to wiring order
+        once here.
+        """
+        effect = self.idle_effect
+        super().set_idle_effect(effect_id)
+
+        if self.idle_effect is not effect:
+            self.idle_effect = Effect(
+                (bytes(self.flatten(frame)) for frame in self.idle_effect.frames),
+                self.idle_effect.rate,
+            )
+
+    def to_dmx(self):
+        """
+        Render the current state to RGB bytes (3 per pixel) in wiring order
+        """
+        framebuffer = self.framebuffer
+        framebuffer[:] = self.blank
+
+        # RPM bar
+        if self.rpm:
+            length = self.translate(
+                self.rpm, self.idle_rpm, self.redline, 0, self.width
+            )
+            length = min(max(length, 0), self.width) * 3
+            row_size = self.width * 3
+
+            for row in range(self.bar_rows):
+                start = row * row_size
+                framebuffer[start : start + length] = self.palette[:length]
+
+        # Gear, then the flag border around it
+        spans = self.glyphs.get(self.gear_glyph(), ()) + self.borders.get(
+            self.flag(), ()
+        )
+
+        for start, stop, pixels in spans:
+            framebuffer[start:stop] = pixels
+
+        self.frame[:] = self.flatten(framebuffer)
+
+        return memoryview(self.frame)
+
+    def to_color_list(self):
+        """
+        Translate the current state to a flat list of Colors in wiring order
+        """
+        return bytes_to_colors(self.to_dmx())
+
+    def gear_glyph(self):
+        if self.gear is None:
+            return None
+        if self.gear < 0:
+            return "R"
+        if self.gear == 0:
+            return "N"
+
+        return str(self.gear % 10)
+
+    def flag(self):
+        """
+        Get the most important flag mask set in the current flags, if any
+        """
+        for mask, _ in FLAG_COLORS:
+            if self.flags & mask:
+                return mask
+
+        return None
+
+    def __build_glyphs(self, color):
+        """
+        Precompute each glyph as framebuffer byte ranges and their pixels,
+        scaled to fill the area inside the flag border and centered in it
+        """
+        area_top = self.bar_rows + 1
+        area_height = self.height - self.bar_rows - 2
+        area_width = self.width - 2
+        scale = min(area_height // GLYPH_HEIGHT, area_width // GLYPH_WIDTH)
+
+        if scale < 1:
+            return {}
+
+        run = color * scale
+        left = 1 + (area_width - GLYPH_WIDTH * scale) // 2
+        top = area_top + (area_height - GLYPH_HEIGHT * scale) // 2
+        glyphs = {}
+
+        for char, rows in GLYPHS.items():
+            spans = []
+
+            for y, row in enumerate(rows):
+                for x, pixel in enumerate(row):
+                    if pixel != "1":
+                        continue
+
+                    for dy in range(scale):
+                        start = (top + y * scale + dy) * self.width + left + x * scale
+                        spans.append((start * 3, (start + scale) * 3, run))
+
+            glyphs[char] = tuple(spans)
+
+        return glyphs
+
+    def __build_borders(self):
+        """
+        Precompute the frame around the gear area for each flag color, as
+        framebuffer byte ranges and their pixels
+        """
+        top, bottom = self.bar_rows, self.height - 1
+
+        if top > bottom:
+            return {}
+
+        row_size = self.width * 3
+        rows = [top] if bottom == top else [top, bottom]
+        borders = {}
+
+        for mask, rgb in FLAG_COLORS:
+            color = rgb_to_bytes([rgb])
+            spans = [
+                (row * row_size, (row + 1) * row_size, color * self.width)
+                for row in rows
+            ]
+
+            for row in range(top + 1, bottom):
+                spans.append((row * row_size, row * row_size + 3, color))
+                spans.append(((row + 1) * row_size - 3, (row + 1) * row_size, color))
+
+            borders[mask] = tuple(spans)
+
+        return borders
@@ -0,0 +1,206 @@
+"""
+Precomputed gradient palettes for LED displays.
+
+A palette is the full-strip gradient for a color theme as RGB bytes (3 per
+pixel), ready to be sliced straight into a DMX frame. Palettes are built
+once per theme and LED count and cached, so switching themes mid-session
+is a dictionary lookup rather than a recomputation.
+
+Gradient types (ColorTheme.gradient_type):
+    "hsl"     - interpolate hue, saturation and lightness (Color.range_to)
+    "rgb"     - straight line between the colors in RGB
+    "lab"     - perceptually even steps, through CIE L*a*b*
+    "stepped" - solid shift light zones, from the primary to secondary color
+"""
+
+from colour import Color
+
+GRADIENT_TYPES = ("hsl", "rgb", "lab", "stepped")
+DEFAULT_GRADIENT = "hsl"
+SHIFT_ZONES = 3
+
+# D65 reference white
+_WHITE = (0.95047, 1.0, 1.08883)
+
+_palettes = {}
+
+
+def gradient_type(name):
+    """
+    Normalize a gradient type name, falling back to the default for unknown
+    (or missing) types
+    """
+    name = (name or "").strip().lower()
+
+    if name == "linear":
+        return "rgb"
+    if name in ("perceptual", "cielab"):
+        return "lab"
+
+    return name if name in GRADIENT_TYPES else DEFAULT_GRADIENT
+
+
+def get_palette(color_theme, led_count):
+    """
+    Get the cached palette for a theme and LED count, building it on first use
+    """
+    key = (color_theme.key, led_count)
+    palette = _palettes.get(key)
+
+    if palette is None:
+        palette = build_palette(
+            color_theme.primary_color,
+            color_theme.secondary_color,
+            led_count,
+            color_theme.gradient_type,
+        )
+        _palettes[key] = palette
+
+    return palette
+
+
+def clear_cache():
+    """
+    Drop all cached palettes
+    """
+    _palettes.clear()
+
+
+def build_palette(start_color, end_color, led_count, gradient=DEFAULT_GRADIENT):
+    """
+    Build a gradient from start_color to end_color as RGB bytes
+    """
+    gradient = gradient_type(gradient)
+
+    if led_count <= 0:
+        return b""
+
+    if gradient == "hsl":
+        colors = [color.rgb for color in start_color.range_to(end_color, led_count)]
+    elif gradient == "rgb":
+        colors = rgb_gradient(start_color.rgb, end_color.rgb, led_count)
+    elif gradient == "lab":
+        colors = lab_gradient(start_color.rgb, end_color.rgb, led_count)
+    else:
+        colors = stepped_gradient(start_color.rgb, end_color.rgb, led_count)
+
+    return rgb_to_bytes(colors)
+
+
+def rgb_to_bytes(colors):
+    """
+    Pack (r, g, b) float tuples (0-1) into bytes
+    """
+    return bytes(
+        round(min(max(channel, 0.0), 1.0) * 255)
+        for color in colors
+        for channel in color
+    )
+
+
+def bytes_to_colors(palette):
+    """
+    Unpack palette bytes into a list of Colors
+    """
+    return [
+        Color(rgb=(palette[i] / 255, palette[i + 1] / 255, palette[i + 2] / 255))
+        for i in range(0, len(palette) - 2, 3)
+    ]
+
+
+def lerp(start, end, fraction):
+    return tuple(a + (b - a) * fraction for a, b in zip(start, end))
+
+
+def fractions(count):
+    """
+    Evenly spaced positions from 0 to 1 (inclusive) along a strip
+    """
+    if count == 1:
+        return [0.0]
+
+    return [i / (count - 1) for i in range(count)]
+
+
+def rgb_gradient(start, end, count):
+    return [lerp(start, end, fraction) for fraction in fractions(count)]
+
+
+def lab_gradient(start, end, count):
+    start_lab, end_lab = rgb_to_lab(start), rgb_to_lab(end)
+
+    return [
+        lab_to_rgb(lerp(start_lab, end_lab, fraction)) for fraction in fractions(count)
+    ]
+
+
+def stepped_gradient(start, end, count, zones=SHIFT_ZONES):
+    """
+    Split the strip into equal zones, each a solid color stepping from the
+    start to the end color
+    """
+    zones = max(min(zones, count), 1)
+    zone_colors = rgb_gradient(start, end, zones)
+
+    return [zone_colors[i * zones // count] for i in range(count)]
+
+
+def _to_linear(channel):
+    if channel <= 0.04045:
+        return channel / 12.92
+
+    return ((channel + 0.055) / 1.055) ** 2.4
+
+
+def _from_linear(channel):
+    if channel <= 0.0031308:
+        return channel * 12.92
+
+    return 1.055 * channel ** (1 / 2.4) - 0.055
+
+
+def _lab_f(t):
+    if t > (6 / 29) ** 3:
+        return t ** (1 / 3)
+
+    return t / (3 * (6 / 29) ** 2) + 4 / 29
+
+
+def _lab_f_inverse(t):
+    if t > 6 / 29:
+        return t**3
+
+    return 3 * (6 / 29) ** 2 * (t - 4 / 29)
+
+
+def rgb_to_lab(rgb):
+    """
+    Convert an sRGB color (0-1) to CIE L*a*b*
+    """
+    r, g, b = (_to_linear(channel) for channel in rgb)
+
+    x = 0.4124564 * r + 0.3575761 * g + 0.1804375 * b
+    y = 0.2126729 * r + 0.7151522 * g + 0.0721750 * b
+    z = 0.0193339 * r + 0.1191920 * g + 0.9503041 * b
+
+    fx, fy, fz = (_lab_f(value / white) for value, white in zip((x, y, z), _WHITE))
+
+    return (116 * fy - 16, 500 * (fx - fy), 200 * (fy - fz))
+
+
+def lab_to_rgb(lab):
+    """
+    Convert a CIE L*a*b* color to sRGB (0-1), clamped to the sRGB gamut
+    """
+    lightness, a, b = lab
+    fy = (lightness + 16) / 116
+    fx = fy + a / 500
+    fz = fy - b / 200
+
+    x, y, z = (_lab_f_inverse(f) * white for f, white in zip((fx, fy, fz), _WHITE))
+
+    r = 3.2404542 * x - 1.5371385 * y - 0.4985314 * z
+    g = -0.9692660 * x + 1.8760108 * y + 0.0415560 * z
+    b = 0.0556434 * x - 0.2040259 * y + 1.0572252 * z
+
+    return tuple(min(max(_from_linear(max(c, 0.0)), 0.0), 1.0) for c in (r, g, b))
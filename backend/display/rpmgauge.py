@@ -1,22 +1,33 @@
-from colour import Color
+from display.palette import get_palette, bytes_to_colors
+from display.effects import EffectEngine, shift_points
+from display.display import Display
 
 
-class RpmGauge:
+class RpmGauge(Display):
     """
-    An LED strip rpm gauge that maps the car's RPM to a color gradient
+    An LED strip rpm gauge that maps the car's RPM (from idle to redline)
+    to a color gradient. With the car's shift points, the top of the strip
+    becomes a shift light.
     """
 
     def __init__(self, led_count, color_theme, rpm=0, idle_rpm=0, redline=20000):
-        self.led_count = led_count
+        super().__init__(led_count, color_theme)
+
         self.start_color = color_theme.primary_color
         self.end_color = color_theme.secondary_color
         self.rpm = rpm
         self.idle_rpm = idle_rpm
         self.redline = redline
+        self.shift_points = None
+        self.pit_limiter = False
+
+        # Full-strip gradient as RGB bytes, shared by every gauge with the
+        # same theme and size
+        self.palette = get_palette(color_theme, led_count)
+        self.frame = bytearray(len(self.palette))
+        self.blank = memoryview(bytes(len(self.palette)))
 
-        self.full_gradient = list(
-            self.start_color.range_to(self.end_color, self.led_count)
-        )
+        self.effects = EffectEngine(led_count, self.palette)
 
     def set_rpm(self, rpm):
         """
@@ -35,6 +46,7 @@ class RpmGauge:
             raise TypeError
 
         self.idle_rpm = idle_rpm if idle_rpm > 0 else 0
+        self.__update_effects()
 
     def set_redline(self, redline):
         """
@@ -44,29 +56,69 @@ class RpmGauge:
             raise TypeError
 
         self.redline = redline if redline > 0 else 0
+        self.__update_effects()
+
+    def set_shift_points(self, values):
+        """
+        Set the car's (first, shift, last, blink) shift light RPMs, or None
+        """
+        self.shift_points = shift_points(values)
+        self.__update_effects()
+
+    def set_pit_limiter(self, active):
+        """
+        Strobe the strip while the pit limiter is on
+        """
+        self.pit_limiter = bool(active)
 
     def to_color_list(self):
         """
         Translate the current state to a flat list - needed for DMX communication
         """
-        if self.rpm == 0:
+        if self.rpm == 0 and not self.pit_limiter:
             return []
 
-        length = self.translate(self.rpm, 0, self.redline, 0, self.led_count)
-        colors = self.full_gradient[0:length]
+        return bytes_to_colors(self.to_dmx())
+
+    def to_dmx(self):
+        """
+        Render the current state straight to RGB bytes (3 per pixel) from
+        the palette or a precomputed effect frame - no per-pixel color
+        conversion
+        """
+        frame = memoryview(self.frame)
+        effect = self.effects.render(self.rpm, self.pit_limiter)
+
+        if effect is not None:
+            frame[:] = effect
+            return frame
+
+        length = 0
+
+        if self.rpm != 0:
+            length = self.led_length(self.rpm) * 3
+
+        frame[:length] = self.palette[:length]
+        frame[length:] = self.blank[length:]
+
+        return frame
+
+    def led_length(self, rpm):
+        """
+        Get the number of LEDs lit at an RPM
+        """
+        length = self.translate(rpm, self.idle_rpm, self.redline, 0, self.led_count)
 
-        return colors + [Color("black")] * (self.led_count - len(colors))
+        return min(max(length, 0), self.led_count)
 
-    def translate(self, value, left_min, left_max, right_min, right_max):
+    def __update_effects(self):
         """
-        Map an RPM value to a count within the range of the LED strip
+        Rebuild the shift zones, which start where the gauge is at the
+        first shift RPM
         """
-        # Figure out how "wide" each range is
-        left_span = left_max - left_min
-        right_span = right_max - right_min
+        first_length = 0
 
-        # Convert the left range into a 0-1 range (float)
-        value_scaled = float(value - left_min) / float(left_span)
+        if self.shift_points:
+            first_length = self.led_length(self.shift_points.first)
 
-        # Convert the 0-1 range into a value in the right range.
-        return int(right_min + (value_scaled * right_span))
+        self.effects.set_shift_points(self.shift_points, first_length)
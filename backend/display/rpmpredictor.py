@@ -0,0 +1,93 @@
+from collections import deque
+from time import monotonic
+
+
+class RpmPredictor:
+    """
+    Estimates the RPM to show on a display at the moment it is drawn.
+
+    iRacing samples telemetry at 60 Hz, while the LED worker runs at its own
+    framerate. Samples are tagged with the sim's session time, so repeated
+    reads of the same sample are ignored and the rate of change is measured
+    in sim time rather than in worker loop time.
+
+    Modes:
+        - off: show the latest sample as-is
+        - interpolate: ease from the previous sample to the latest one over
+          one sample period (smooth steps, adds one sample of latency)
+        - predict: extrapolate from the recent rate of change to the
+          expected display time (hides latency, may overshoot briefly)
+    """
+
+    modes = ("off", "interpolate", "predict")
+
+    def __init__(
+        self, mode="off", display_latency=0.0, max_extrapolation=0.1, clock=monotonic
+    ):
+        if mode not in self.modes:
+            raise ValueError(f"Unknown RPM smoothing mode: {mode}")
+
+        self.mode = mode
+        self.display_latency = display_latency  # Seconds from send to light
+        self.max_extrapolation = max_extrapolation  # Cap on prediction horizon
+        self.clock = clock
+
+        # Recent (received_at - sample_time) offsets, ~half a second at 60 Hz
+        self.offsets = deque(maxlen=30)
+
+        self.reset()
+
+    def reset(self):
+        """
+        Forget all samples (on a new session or stream restart)
+        """
+        self.previous = None  # (sample_time, rpm)
+        self.latest = None
+        self.offsets.clear()
+
+    def add_sample(self, rpm, sample_time):
+        """
+        Record an RPM sample tagged with the sim time it was taken at.
+        Returns True if the sample is new.
+        """
+        if rpm is None:
+            raise TypeError
+
+        if self.latest:
+            if sample_time == self.latest[0]:
+                return False
+
+            if sample_time < self.latest[0]:
+                # Time went backwards - new session or replay jump
+                self.reset()
+
+        self.previous = self.latest
+        self.latest = (sample_time, rpm)
+        self.offsets.append(self.clock() - sample_time)
+
+        return True
+
+    def predict(self):
+        """
+        Get the RPM to display right now
+        """
+        if not self.latest:
+            return 0
+
+        sample_time, rpm = self.latest
+
+        if self.mode == "off" or not self.previous:
+            return rpm
+
+        previous_time, previous_rpm = self.previous
+        period = sample_time - previous_time
+        elapsed = self.clock() - sample_time - min(self.offsets)
+
+        if self.mode == "interpolate":
+            fraction = min(max(elapsed / period, 0.0), 1.0)
+            value = previous_rpm + (rpm - previous_rpm) * fraction
+        else:
+            horizon = min(elapsed + self.display_latency, self.max_extrapolation)
+            value = rpm + (rpm - previous_rpm) / period * horizon
+
+        return max(round(value), 0)
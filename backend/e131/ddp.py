@@ -0,0 +1,122 @@
+"""
+WLED controller using the Distributed Display Protocol (DDP) instead of
+E1.31. A DDP packet carries up to 480 RGB pixels with no universe limits,
+so long strips need far fewer packets per frame. The receiver only
+displays the frame once the packet with the push flag arrives, which is
+set on the last packet of every frame.
+
+Protocol: http://www.3waylabs.com/ddp/
+"""
+
+import logging
+import socket
+import math
+
+from e131.wled import colors_to_bytes
+
+DDP_PORT = 4048
+HEADER_SIZE = 10
+MAX_PIXELS_PER_PACKET = 480
+
+FLAG_VERSION_1 = 0x40
+FLAG_PUSH = 0x01
+DATA_TYPE_RGB24 = 0x0B
+DESTINATION_DISPLAY = 0x01
+
+
+def build_ddp_packet(offset, length, push=False):
+    """
+    Build a DDP packet for a slice of the frame (offset and length in bytes)
+    """
+    packet = bytearray(HEADER_SIZE + length)
+    packet[0] = FLAG_VERSION_1 | (FLAG_PUSH if push else 0)
+    packet[2] = DATA_TYPE_RGB24
+    packet[3] = DESTINATION_DISPLAY
+    packet[4:8] = offset.to_bytes(4, "big")
+    packet[8:10] = length.to_bytes(2, "big")
+
+    return packet
+
+
+class Ddp:
+    """
+    WLED controller object to handle DDP communications and update the
+    color of the connected LEDs. Same interface as Wled.
+    """
+
+    is_connected = False
+    packets = 0
+
+    @staticmethod
+    def connect(ip, pixel_count, port=DDP_PORT):
+        """
+        Create and return a controller ready for use
+        """
+        ddp = Ddp()
+        ddp.ip = ip
+        ddp.port = port
+        ddp.pixel_count = pixel_count
+        ddp.packets = math.ceil(pixel_count / MAX_PIXELS_PER_PACKET)
+        ddp.frame = bytearray(pixel_count * 3)
+        ddp.sequence = 0
+        ddp.dropped = 0
+        ddp.socket = None
+        ddp.log = logging.getLogger(__name__)
+
+        # One preallocated packet per 480 pixels, push flag on the last
+        ddp.buffers = []
+        for i in range(ddp.packets):
+            offset = i * MAX_PIXELS_PER_PACKET * 3
+            length = min(MAX_PIXELS_PER_PACKET * 3, pixel_count * 3 - offset)
+            packet = build_ddp_packet(offset, length, push=i == ddp.packets - 1)
+            ddp.buffers.append((offset, packet, memoryview(packet)[HEADER_SIZE:]))
+
+        ddp.reconnect()
+
+        return ddp
+
+    def stop(self):
+        """
+        Close the socket (recreated on next connection)
+        """
+        if self.socket:
+            self.socket.close()
+            self.socket = None
+
+        self.is_connected = False
+
+    def reconnect(self):
+        """
+        Recreate the (non-blocking) UDP socket
+        """
+        self.stop()
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.setblocking(False)
+        self.is_connected = True
+
+    def update(self, color_list):
+        """
+        Send some colors down stream
+        """
+        self.update_dmx(colors_to_bytes(color_list, self.frame))
+
+    def update_dmx(self, data):
+        """
+        Send raw RGB bytes (3 per pixel) down stream. Missing pixels are
+        sent black.
+        """
+        view = memoryview(data)
+        self.sequence = self.sequence % 15 + 1  # 1-15, 0 means unused
+
+        for offset, packet, payload in self.buffers:
+            chunk = view[offset : offset + len(payload)]
+
+            payload[: len(chunk)] = chunk
+            payload[len(chunk) :] = bytes(len(payload) - len(chunk))
+            packet[1] = self.sequence
+
+            try:
+                self.socket.sendto(packet, (self.ip, self.port))
+            except BlockingIOError:
+                self.dropped += 1
+                self.log.debug(f"Dropped DDP packet at offset {offset}")
@@ -0,0 +1,323 @@
+"""
+Lightweight E1.31 (sACN) transmitter used in place of sacn.sACNsender.
+
+Each universe owns one preallocated packet. DMX data is copied into the
+packet in place and every flush is a single sendto per universe on one
+shared non-blocking UDP socket - no output thread and no per-frame packet
+construction.
+
+Data packets can carry a synchronization universe, in which case receivers
+hold the data until a sync packet for that universe arrives. Several
+controllers can then latch the same frame at the same moment. Outputs can
+also be sent to the standard multicast group for their universe instead of
+a single controller.
+
+Packet layout: ANSI E1.31-2016, sections 4.1 (data) and 4.2 (sync)
+"""
+
+import logging
+import socket
+
+from e131.sender_info import source
+
+E131_PORT = 5568
+DMX_SIZE = 512
+
+# Offsets into a data packet
+FLAGS_ROOT = 16
+CID = 22
+FLAGS_FRAMING = 38
+SOURCE_NAME = 44
+PRIORITY = 108
+SYNC_ADDRESS = 109
+SEQUENCE = 111
+OPTIONS = 112
+UNIVERSE = 113
+FLAGS_DMP = 115
+DMX_DATA = 126
+PACKET_SIZE = DMX_DATA + DMX_SIZE
+
+OPTION_STREAM_TERMINATED = 0x40
+
+# Offsets into a sync packet
+SYNC_SEQUENCE = 44
+SYNC_UNIVERSE = 45
+SYNC_PACKET_SIZE = 49
+
+_ZEROS = memoryview(bytes(DMX_SIZE))
+
+
+def cid_to_bytes(cid):
+    """
+    Convert a CID in sender_info format (tuple of hex strings) to 16 bytes
+    """
+    return bytes.fromhex("".join(cid))
+
+
+def flags_and_length(length):
+    """
+    PDU flags (0x7) and length, packed into two bytes
+    """
+    return (0x7000 | length).to_bytes(2, "big")
+
+
+def multicast_address(universe):
+    """
+    Get the E1.31 multicast group for a universe
+    """
+    return f"239.255.{universe >> 8}.{universe & 0xFF}"
+
+
+def build_root_layer(packet, cid, vector):
+    """
+    Fill in the root layer common to all E1.31 packets
+    """
+    packet[0:2] = b"\x00\x10"  # Preamble size
+    packet[4:16] = b"ASC-E1.17\x00\x00\x00"
+    packet[FLAGS_ROOT : FLAGS_ROOT + 2] = flags_and_length(len(packet) - FLAGS_ROOT)
+    packet[18:22] = vector.to_bytes(4, "big")
+    packet[CID : CID + 16] = cid
+
+
+def build_sync_packet(cid, sync_universe):
+    """
+    Build an E1.31 synchronization packet for a sync universe
+    """
+    packet = bytearray(SYNC_PACKET_SIZE)
+
+    build_root_layer(packet, cid, 0x08)  # VECTOR_ROOT_E131_EXTENDED
+    packet[FLAGS_FRAMING : FLAGS_FRAMING + 2] = flags_and_length(
+        SYNC_PACKET_SIZE - FLAGS_FRAMING
+    )
+    packet[40:44] = b"\x00\x00\x00\x01"  # VECTOR_E131_EXTENDED_SYNCHRONIZATION
+    packet[SYNC_UNIVERSE : SYNC_UNIVERSE + 2] = sync_universe.to_bytes(2, "big")
+
+    return packet
+
+
+def build_data_packet(cid, source_name, universe, priority=100, sync_universe=0):
+    """
+    Build an E1.31 data packet header for a universe with an empty DMX payload
+    """
+    packet = bytearray(PACKET_SIZE)
+
+    build_root_layer(packet, cid, 0x04)  # VECTOR_ROOT_E131_DATA
+
+    # Framing layer
+    packet[FLAGS_FRAMING : FLAGS_FRAMING + 2] = flags_and_length(
+        PACKET_SIZE - FLAGS_FRAMING
+    )
+    packet[40:44] = b"\x00\x00\x00\x02"  # VECTOR_E131_DATA_PACKET
+    name = source_name.encode("utf-8")[:63]
+    packet[SOURCE_NAME : SOURCE_NAME + len(name)] = name
+    packet[PRIORITY] = priority
+    packet[SYNC_ADDRESS : SYNC_ADDRESS + 2] = sync_universe.to_bytes(2, "big")
+    packet[UNIVERSE : UNIVERSE + 2] = universe.to_bytes(2, "big")
+
+    # DMP layer
+    packet[FLAGS_DMP : FLAGS_DMP + 2] = flags_and_length(PACKET_SIZE - FLAGS_DMP)
+    packet[117] = 0x02  # VECTOR_DMP_SET_PROPERTY
+    packet[118] = 0xA1  # Address and data type
+    packet[121:123] = b"\x00\x01"  # Address increment
+    packet[123:125] = (DMX_SIZE + 1).to_bytes(2, "big")  # Property count
+    packet[125] = 0x00  # DMX start code
+
+    return packet
+
+
+class E131Output:
+    """
+    A single universe output with its own preallocated packet
+    """
+
+    def __init__(self, universe, cid, source_name, sync_universe=0):
+        self.universe = universe
+        self.destination = "127.0.0.1"
+        self.port = E131_PORT
+
+        self.packet = build_data_packet(
+            cid, source_name, universe, sync_universe=sync_universe
+        )
+        self.dmx = memoryview(self.packet)[DMX_DATA:]
+        self.sequence = 0
+        self._multicast = False
+
+    @property
+    def multicast(self):
+        return self._multicast
+
+    @multicast.setter
+    def multicast(self, multicast):
+        """
+        Send to the universe's multicast group instead of the destination
+        """
+        self._multicast = multicast
+
+        if multicast:
+            self.destination = multicast_address(self.universe)
+
+    @property
+    def dmx_data(self):
+        """
+        DMX payload as a tuple, always 512 channels (same as sacn)
+        """
+        return tuple(self.dmx)
+
+    @dmx_data.setter
+    def dmx_data(self, data):
+        """
+        Copy DMX data into the packet, zero-filling the remaining channels.
+        Accepts any bytes-like object (copied without conversion) or a
+        sequence of ints.
+        """
+        length = len(data)
+
+        if length > DMX_SIZE:
+            raise ValueError(f"DMX data has a max length of {DMX_SIZE}")
+
+        if not isinstance(data, (bytes, bytearray, memoryview)):
+            data = bytes(data)
+
+        self.dmx[:length] = data
+        self.dmx[length:] = _ZEROS[length:]
+
+    def next_packet(self):
+        """
+        Advance the sequence number and return the packet ready to send
+        """
+        self.sequence = (self.sequence + 1) & 0xFF
+        self.packet[SEQUENCE] = self.sequence
+
+        return self.packet
+
+
+class E131Sender:
+    """
+    Sends E1.31 packets on demand. Mirrors the parts of sacn.sACNsender used
+    by Wled, so either can be plugged in.
+    """
+
+    def __init__(
+        self, source_name=source["name"], cid=source["cid"], sync_universe=0, ttl=8
+    ):
+        self.source_name = source_name
+        self.cid = cid_to_bytes(cid)
+        self.sync_universe = sync_universe  # 0 = data is displayed on arrival
+        self.ttl = ttl  # Multicast time-to-live
+        self.port = E131_PORT  # Destination port for sync packets
+        self.outputs = {}
+
+        self.sync_packet = build_sync_packet(self.cid, sync_universe)
+        self.sync_sequence = 0
+        self.socket = None
+        # Packets dropped because the socket buffer was full, or because the
+        # sender was not started (or already stopped)
+        self.dropped = 0
+
+        # Accepted for sACNsender compatibility. Packets are only ever sent
+        # by flush(), so there is nothing to toggle.
+        self.manual_flush = True
+
+        self.log = logging.getLogger(__name__)
+
+    def start(self):
+        """
+        Open the (non-blocking) UDP socket
+        """
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, self.ttl)
+        self.socket.setblocking(False)
+
+    def stop(self):
+        """
+        Terminate all streams and close the socket
+        """
+        for universe in self.get_active_outputs():
+            self.deactivate_output(universe)
+
+        if self.socket:
+            self.socket.close()
+            self.socket = None
+
+    def activate_output(self, universe):
+        """
+        Create the output (and its packet) for a universe
+        """
+        if not 1 <= universe <= 63999:
+            raise ValueError(f"Universe must be between 1 and 63999, not {universe}")
+
+        if universe not in self.outputs:
+            self.outputs[universe] = E131Output(
+                universe, self.cid, self.source_name, self.sync_universe
+            )
+
+    def deactivate_output(self, universe):
+        """
+        Remove a universe, telling the receiver its stream has terminated
+        """
+        output = self.outputs.pop(universe, None)
+
+        if output and self.socket:
+            output.packet[OPTIONS] |= OPTION_STREAM_TERMINATED
+
+            # The spec asks for three terminated packets
+            for _ in range(3):
+                self.send(output)
+
+    def get_active_outputs(self):
+        """
+        Get the universe numbers of all active outputs
+        """
+        return tuple(self.outputs)
+
+    def __getitem__(self, universe):
+        return self.outputs.get(universe)
+
+    def flush(self, universes=None):
+        """
+        Send the current data for the given (or all) universes
+        """
+        for universe in universes or self.outputs:
+            self.send(self.outputs[universe])
+
+    def send(self, output):
+        """
+        Send a single output's packet. A full socket buffer drops the packet
+        rather than stalling the caller, as does a sender that is not
+        started.
+        """
+        if not self.socket:
+            self.dropped += 1
+            self.log.debug(
+                f"Not started - dropped packet for universe {output.universe}"
+            )
+            return
+
+        try:
+            self.socket.sendto(output.next_packet(), (output.destination, output.port))
+        except BlockingIOError:
+            self.dropped += 1
+            self.log.debug(f"Dropped packet for universe {output.universe}")
+
+    def sync(self, destinations=None):
+        """
+        Tell receivers to display the data held for the sync universe. Sent
+        to the sync universe's multicast group, or to each destination.
+        """
+        if not self.sync_universe:
+            return
+
+        if not self.socket:
+            self.dropped += 1
+            self.log.debug("Not started - dropped sync packet")
+            return
+
+        self.sync_sequence = (self.sync_sequence + 1) & 0xFF
+        self.sync_packet[SYNC_SEQUENCE] = self.sync_sequence
+
+        for destination in destinations or [multicast_address(self.sync_universe)]:
+            try:
+                self.socket.sendto(self.sync_packet, (destination, self.port))
+            except BlockingIOError:
+                self.dropped += 1
+                self.log.debug(f"Dropped sync packet for {destination}")
@@ -0,0 +1,149 @@
+"""
+A virtual WLED: listens for E1.31 or DDP packets on a local port and
+rebuilds the frames a real controller would display, timestamping each one
+as it completes. Used to test and benchmark LED output without hardware.
+"""
+
+from collections import namedtuple
+from time import perf_counter
+import threading
+import socket
+
+from e131.sender import (
+    DMX_DATA,
+    SYNC_ADDRESS,
+    UNIVERSE,
+    OPTIONS,
+    OPTION_STREAM_TERMINATED,
+)
+from e131.ddp import HEADER_SIZE, FLAG_PUSH
+
+# A displayed frame: arrival time (perf_counter), RGB bytes and the number
+# of packets it took
+ReceivedFrame = namedtuple("ReceivedFrame", ["timestamp", "data", "packets"])
+
+
+class VirtualReceiver(threading.Thread):
+    """
+    Receives one controller's worth of pixels over "e131" or "ddp".
+
+    E1.31 frames complete when every universe of the strip has been updated,
+    or on a sync packet when the data carries a sync universe. DDP frames
+    complete on the packet with the push flag.
+    """
+
+    def __init__(
+        self, pixel_count, protocol="e131", host="127.0.0.1", port=0, universe=1
+    ):
+        threading.Thread.__init__(self)
+        self.name = "Virtual WLED Receiver"
+        self.daemon = True
+
+        self.pixel_count = pixel_count
+        self.protocol = protocol
+        self.start_universe = universe
+        self.universes = -(-pixel_count // 170)
+
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind((host, port))
+        self.socket.settimeout(0.1)
+        self.port = self.socket.getsockname()[1]
+
+        self.active = True
+        self.frame = bytearray(pixel_count * 3)
+        self.frames = []
+        self.packets = 0
+        self.terminated = False
+
+        self.pending_universes = set()
+        self.frame_packets = 0
+        self.new_frame = threading.Condition()
+
+    def run(self):
+        buffer = bytearray(2048)
+
+        while self.active:
+            try:
+                size = self.socket.recv_into(buffer)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+
+            self.packets += 1
+            self.frame_packets += 1
+            packet = memoryview(buffer)[:size]
+
+            if self.protocol == "ddp":
+                self.__receive_ddp(packet)
+            else:
+                self.__receive_e131(packet)
+
+    def stop(self):
+        """
+        Stop listening and close the socket
+        """
+        self.active = False
+        self.join(1)
+        self.socket.close()
+
+    def wait_for_frames(self, count, timeout=1):
+        """
+        Wait until at least count frames have been received
+        """
+        with self.new_frame:
+            return self.new_frame.wait_for(lambda: len(self.frames) >= count, timeout)
+
+    def __receive_e131(self, packet):
+        if packet[18:22] == b"\x00\x00\x00\x08":
+            # Sync packet - display everything held so far
+            if self.pending_universes:
+                self.__complete_frame()
+            else:
+                self.frame_packets = 0
+            return
+
+        if len(packet) <= DMX_DATA:
+            return
+
+        if packet[OPTIONS] & OPTION_STREAM_TERMINATED:
+            self.terminated = True
+            return
+
+        universe = int.from_bytes(packet[UNIVERSE : UNIVERSE + 2], "big")
+        index = universe - self.start_universe
+
+        if not 0 <= index < self.universes:
+            return
+
+        offset = index * 510
+        length = min(510, len(self.frame) - offset)
+        self.frame[offset : offset + length] = packet[DMX_DATA : DMX_DATA + length]
+        self.pending_universes.add(universe)
+
+        synced = int.from_bytes(packet[SYNC_ADDRESS : SYNC_ADDRESS + 2], "big")
+
+        if not synced and len(self.pending_universes) == self.universes:
+            self.__complete_frame()
+
+    def __receive_ddp(self, packet):
+        offset = int.from_bytes(packet[4:8], "big")
+        length = int.from_bytes(packet[8:10], "big")
+        length = max(min(length, len(self.frame) - offset), 0)
+
+        self.frame[offset : offset + length] = packet[
+            HEADER_SIZE : HEADER_SIZE + length
+        ]
+
+        if packet[0] & FLAG_PUSH:
+            self.__complete_frame()
+
+    def __complete_frame(self):
+        frame = ReceivedFrame(perf_counter(), bytes(self.frame), self.frame_packets)
+
+        with self.new_frame:
+            self.frames.append(frame)
+            self.new_frame.notify_all()
+
+        self.pending_universes.clear()
+        self.frame_packets = 0
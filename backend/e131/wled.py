@@ -1,9 +1,31 @@
-import sacn
 import math
 
 from e131.sender_info import source
+from e131.sender import E131Sender, E131_PORT
 from e131.exceptions import WledMaxPixelsExceeded
 
+try:
+    import sacn
+except ImportError:
+    # Optional - only needed for the "sacn" sender
+    sacn = None
+
+
+def colors_to_bytes(color_list, buffer):
+    """
+    Write colors into a buffer as RGB bytes (3 per pixel), returning a view
+    of the part written. Colors beyond the end of the buffer are dropped.
+    """
+    length = min(len(color_list), len(buffer) // 3) * 3
+
+    for i, color in enumerate(color_list[: length // 3]):
+        r, g, b = color.rgb
+        buffer[i * 3] = math.floor(r * 255)
+        buffer[i * 3 + 1] = math.floor(g * 255)
+        buffer[i * 3 + 2] = math.floor(b * 255)
+
+    return memoryview(buffer)[:length]
+
 
 class Wled:
     """
@@ -15,17 +37,42 @@ class Wled:
     universes = 0
 
     @staticmethod
-    def connect(ip, pixel_count):
+    def connect(
+        ip,
+        pixel_count,
+        sender="native",
+        universe=1,
+        multicast=False,
+        sync_universe=0,
+        port=E131_PORT,
+    ):
         """
-        Create and return a controller ready for use
+        Create and return a controller ready for use. The sender is either
+        "native" (e131.sender) or "sacn" (the sacn package). Pixels are sent
+        on consecutive universes starting at the given one, either to the
+        controller's IP or to each universe's multicast group.
+
+        With a sync universe (native sender only), the controller holds new
+        data until sync() is called, so several controllers can be made to
+        show a frame at the same moment. The destination port can only be
+        changed with the native sender.
         """
         if pixel_count > WledMaxPixelsExceeded.max_pixels:
             raise WledMaxPixelsExceeded(pixel_count)
 
+        if sender == "sacn" and sacn is None:
+            raise ImportError("The sacn package is required for the sacn sender")
+
         wled = Wled()
         wled.ip = ip
+        wled.port = port
         wled.pixel_count = pixel_count
         wled.universes = math.ceil(pixel_count / 170)
+        wled.start_universe = universe
+        wled.use_sacn = sender == "sacn"
+        wled.multicast = multicast
+        wled.sync_universe = 0 if wled.use_sacn else sync_universe
+        wled.frame = bytearray(wled.universes * 510)
         wled.reconnect()
 
         return wled
@@ -48,18 +95,30 @@ class Wled:
         """
         Recreate and set up the sender
         """
-        self.sender = sacn.sACNsender(
-            bind_port=source["bind_port"],
-            source_name=source["name"],
-            cid=source["cid"],
-            fps=source["fps"],
-        )
+        if self.use_sacn:
+            self.sender = sacn.sACNsender(
+                bind_port=source["bind_port"],
+                source_name=source["name"],
+                cid=source["cid"],
+                fps=source["fps"],
+            )
+        else:
+            self.sender = E131Sender(
+                source_name=source["name"],
+                cid=source["cid"],
+                sync_universe=self.sync_universe,
+            )
+
         self.sender.start()
 
         # Configure universes needed for all pixels (one per 170 pixels)
-        for universe in range(1, self.universes + 1):
+        for universe in self.universe_range():
             self.sender.activate_output(universe)
             self.sender[universe].destination = self.ip
+            self.sender[universe].multicast = self.multicast
+
+            if not self.use_sacn:
+                self.sender[universe].port = self.port
 
         self.is_connected = True
 
@@ -67,22 +126,37 @@ class Wled:
         """
         Send some colors down stream
         """
+        self.update_dmx(colors_to_bytes(color_list, self.frame))
+
+    def update_dmx(self, data):
+        """
+        Send raw RGB bytes (3 per pixel) down stream, split into universes
+        """
         self.sender.manual_flush = True
+        view = memoryview(data)
 
-        # Split data into universe chunks
-        chunks = [color_list[i * 170 : (i * 170) + 170] for i in range(self.universes)]
+        # Split data into universe chunks (510 bytes = 170 pixels)
+        for i, universe in enumerate(self.universe_range()):
+            chunk = view[i * 510 : (i + 1) * 510]
 
-        universe = 1
-        for colors in chunks:
-            data = []
-            for color in colors:
-                data.append(math.floor(color.rgb[0] * 255))
-                data.append(math.floor(color.rgb[1] * 255))
-                data.append(math.floor(color.rgb[2] * 255))
+            if self.use_sacn:
+                chunk = tuple(chunk)
 
-            self.sender[universe].dmx_data = tuple(data)
-            universe += 1
+            self.sender[universe].dmx_data = chunk
 
         # After all universe data is updated, send to device
         self.sender.flush()
         self.sender.manual_flush = False
+
+    def sync(self):
+        """
+        Display the data held by the controller (when using a sync universe)
+        """
+        if self.sync_universe:
+            self.sender.sync(None if self.multicast else [self.ip])
+
+    def universe_range(self):
+        """
+        Get the universe numbers used by this controller
+        """
+        return range(self.start_universe, self.start_universe + self.universes)
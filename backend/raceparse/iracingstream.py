@@ -16,6 +16,9 @@ class IracingStream:
 
     snapshot_file = "latest.yaml"
 
+    # Shift light RPMs by car name, read from the session info once per car
+    shift_points = {}
+
     @staticmethod
     def get_stream(test_file=None):
         """
@@ -86,10 +89,27 @@ class IracingStream:
                     "track_config": self.ir["WeekendInfo"]["TrackConfigName"],
                 }
             )
+
+            self.state["shift_points"] = self.get_shift_points(self.state["car_name"])
         except (KeyError, AttributeError, TypeError):
             self.stop()
             return
 
+    def get_shift_points(self, car_name):
+        """
+        Get the (first, shift, last, blink) shift light RPMs for a car,
+        cached by car name
+        """
+        if car_name not in self.shift_points:
+            driver_info = self.ir["DriverInfo"]
+
+            self.shift_points[car_name] = tuple(
+                math.floor(driver_info.get(f"DriverCarSL{name}RPM") or 0)
+                for name in ("First", "Shift", "Last", "Blink")
+            )
+
+        return self.shift_points[car_name]
+
     def update(self):
         """
         Update the stream with the latest iRacing data
@@ -107,6 +127,11 @@ class IracingStream:
                             self.ir["RPM"] if self.ir["RPM"] != 300.0 else 0
                         ),
                         "gear": self.ir["Gear"],
+                        "flags": self.ir["SessionFlags"],
+                        "pit_limiter": bool(
+                            (self.ir["EngineWarnings"] or 0)
+                            & irsdk.EngineWarnings.pit_speed_limiter
+                        ),
                         "is_on_track": self.ir["IsOnTrack"],
                         "incident_count": self.ir["PlayerCarMyIncidentCount"],
                         "best_lap_time": self.ir["LapBestLapTime"],
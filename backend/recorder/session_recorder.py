@@ -1,8 +1,9 @@
-from api.utils import get_iracing_data, get_redis_store
+from api.utils import get_frame, get_frames, call_redis
+from api.framestore import get_history_length
+from api.frames import FrameCursor
 
 import logging
 import asyncio
-import ujson
 import uuid
 
 
@@ -17,6 +18,7 @@ class IracingSessionRecorder:
     def __init__(self):
         self.session_id = uuid.uuid4().hex
         self.active = True
+        self.cursor = FrameCursor()
 
         self.log = logging.getLogger(__name__)
 
@@ -33,24 +35,47 @@ class IracingSessionRecorder:
         Stop the session recording
         """
         self.active = False
-        self.log.debug("Stopped session recording")
+        self.log.debug(
+            f"Stopped session recording: {self.cursor.frames} frames recorded, "
+            f"{self.cursor.skipped} skipped"
+        )
 
     async def __record(self):
         """
         Task to continuously read the session data from Redis
         """
         self.log.debug("Starting session recording")
-        redis = get_redis_store()
 
         while self.active:
-            iracing_data = get_iracing_data()
+            # The Redis calls block, so they run off the event loop
+            await asyncio.to_thread(self.__record_new_frames)
 
-            if iracing_data:
-                # Append the data to the session-recorder key
-                redis.rpush(
-                    f"session-recorder-{self.session_id}",
-                    ujson.dumps(iracing_data.dict()),
-                )
-
-            # Capture 30 frames per second
+            # Poll 30 times per second
             await asyncio.sleep(1 / 30)
+
+    def __record_new_frames(self):
+        """
+        Record each new frame once, catching up on any missed since the last
+        read from the recent frame history. Frames are recorded as the raw
+        JSON text they were stored with, without decoding them.
+        """
+        frames = []
+
+        if self.cursor.sequence is not None:
+            frames = get_frames(after=self.cursor.sequence)
+
+        # Start from the latest frame, or follow it if there is no history
+        if self.cursor.sequence is None or not get_history_length():
+            frames = frames or [get_frame()]
+
+        data = [
+            frame.text
+            for frame in frames
+            if self.cursor.advance(frame) and not frame.empty
+        ]
+
+        if data:
+            # Append the data to the session-recorder key, in one round trip
+            call_redis(
+                lambda store: store.rpush(f"session-recorder-{self.session_id}", *data)
+            )
@@ -14,11 +14,14 @@ import logging
 import sys
 
 from database.database import generate_database, engine
+from workerthreads.controllerpool import ControllerPool, LightFixture
 from workerthreads.iracingworker import IracingWorker
 from raceparse.iracingstream import IracingStream
 from quotes.init_quotes import init_quotes
+from display.rpmpredictor import RpmPredictor
 from display.colortheme import ColorTheme
 from display.rpmgauge import RpmGauge
+from api.utils import add_driver_listener
 from api.apiserver import APIServer
 from database import models
 from e131.wled import Wled
@@ -40,9 +43,14 @@ def main():
 
     ip = config.get("wled", "rpm_gauge_ip", fallback="127.0.0.1")
     led_count = int(config.get("wled", "rpm_gauge_led_count", fallback=120))
+    sender = config.get("wled", "sender", fallback="native")
+    multicast = config.getboolean("e131", "multicast", fallback=False)
+    sync_universe = int(config.get("e131", "sync_universe", fallback=0))
     primary_color = Color(config.get("colors", "primary_color", fallback="green"))
     secondary_color = Color(config.get("colors", "secondary_color", fallback="red"))
     framerate = int(config.get("data", "framerate", fallback=50))
+    rpm_smoothing = config.get("data", "rpm_smoothing", fallback="off")
+    display_latency = int(config.get("data", "display_latency_ms", fallback=0))
     log_level = config.get("logging", "level", fallback="INFO")
 
     # Set up logging
@@ -69,17 +77,35 @@ def main():
     # Set the color theme for all displays
     color_theme = ColorTheme(primary_color, secondary_color)
 
-    # Set up WLED controller, iRacing data stream and displays
+    # Set up WLED controllers, iRacing data stream and displays. The
+    # controller from config.ini is used until any are added via the API.
     log.info("Connecting to WLED")
-    controller = Wled.connect(ip, led_count)
+    controller = Wled.connect(
+        ip, led_count, sender, multicast=multicast, sync_universe=sync_universe
+    )
+    rpm_strip = RpmGauge(led_count, color_theme)
+
+    controllers = ControllerPool(
+        color_theme,
+        framerate,
+        fallback=LightFixture(None, "config.ini", controller, rpm_strip),
+        sender=sender,
+        multicast=multicast,
+        sync_universe=sync_universe,
+    )
+    controllers.refresh(force=True)
+
+    # Preload a driver's light controller settings as soon as they are
+    # selected through the API
+    add_driver_listener(lambda driver: controllers.preload(driver.id))
 
     log.info("Connecting to iRacing")
     data_stream = IracingStream.get_stream()
 
-    rpm_strip = RpmGauge(led_count, color_theme)
+    rpm_predictor = RpmPredictor(rpm_smoothing, display_latency / 1000)
 
     # Kick off the iRacing worker thread
-    iracing_worker = IracingWorker(data_stream, controller, rpm_strip, framerate)
+    iracing_worker = IracingWorker(data_stream, controllers, framerate, rpm_predictor)
     iracing_worker.start()
 
     # Start the API on the main thread
@@ -89,7 +115,7 @@ def main():
     # If we're here, exit everything
     iracing_worker.stop()
     data_stream.stop()
-    controller.stop()
+    controllers.shutdown()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,124 @@
+from unittest import mock
+from types import SimpleNamespace
+import unittest
+import asyncio
+import json
+
+from api import asyncutils
+
+
+class FakeRedis:
+    """
+    Stands in for the asyncio Redis client
+    """
+
+    def __init__(self, values):
+        self.values = values
+        self.reads = 0
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def xrevrange(self, name, high, low, count=None):
+        return list(reversed(self.values[name]))[:count]
+
+    async def mget(self, keys):
+        self.reads += 1
+        return [self.values.get(key) for key in keys]
+
+    async def set(self, key, value):
+        self.values[key] = value
+
+
+class TestAsyncUtils(unittest.IsolatedAsyncioTestCase):
+    """
+    Unit tests for the asyncio Redis helpers
+    """
+
+    def setUp(self):
+        asyncutils.redis_breaker.reset()
+        asyncutils.fallback_store.clear()
+
+    async def asyncTearDown(self):
+        await asyncutils.reset_redis_store()
+        asyncutils.redis_breaker.reset()
+
+    async def test_shared_store(self):
+        store = asyncutils.get_redis_store()
+        self.assertIs(asyncutils.get_redis_store(), store, msg="Store not shared")
+
+    async def test_unreachable(self):
+        # Nothing listens on port 1
+        asyncutils.get_redis_store().connection_pool.connection_kwargs["port"] = 1
+
+        self.assertIsNone(await asyncutils.read_redis_key("session_data"))
+        self.assertEqual(await asyncutils.get_iracing_data(), {})
+        self.assertFalse(await asyncutils.set_redis_key("session_data", "{}"))
+
+    async def test_read_and_write(self):
+        store = FakeRedis({"session_best_lap": json.dumps({"id": 1})})
+
+        with mock.patch.object(asyncutils, "get_redis_store", return_value=store):
+            self.assertEqual(await asyncutils.get_session_best_lap(), {"id": 1})
+            self.assertEqual(await asyncutils.get_iracing_data(), {})
+
+            self.assertTrue(await asyncutils.set_redis_key("a", json.dumps([1])))
+            self.assertEqual(await asyncutils.read_redis_key("a"), [1])
+
+    async def test_active_driver_from_database(self):
+        # Nothing listens on port 1
+        asyncutils.get_redis_store().connection_pool.connection_kwargs["port"] = 1
+        db = mock.Mock()
+        driver = SimpleNamespace(
+            id=1, name="Driver", nickname="D", profilePic="", trackTime=5
+        )
+
+        with (
+            mock.patch("api.utils.get_db", return_value=iter([db])),
+            mock.patch(
+                "api.utils.crud.get_active_driver",
+                return_value=SimpleNamespace(driver=driver),
+            ),
+            mock.patch("asyncio.to_thread", wraps=asyncio.to_thread) as to_thread,
+        ):
+            active_driver = await asyncutils.get_active_driver_from_cache()
+
+        self.assertEqual(active_driver.id, 1)
+        to_thread.assert_called_once()
+        db.close.assert_called_once()
+        self.assertEqual(
+            json.loads(asyncutils.fallback_store.get("active_driver"))["id"],
+            1,
+            msg="Not cached while Redis is down",
+        )
+
+    async def test_frame_fetched_once(self):
+        store = FakeRedis({"session_sequence": "7", "session_data": "{}"})
+
+        with mock.patch.object(asyncutils, "get_redis_store", return_value=store):
+            frame = await asyncutils.get_frame()
+            self.assertEqual(frame.sequence, 7)
+            self.assertIs(
+                await asyncutils.get_frame(), frame, msg="Unchanged frame decoded again"
+            )
+            self.assertEqual(store.reads, 2, msg="Expected one round trip per read")
+
+            store.values["session_sequence"] = "8"
+            self.assertEqual((await asyncutils.get_frame()).sequence, 8)
+
+    async def test_history(self):
+        entries = [
+            (f"{1000 + i}-0", {"sequence": str(i), "data": "{}"}) for i in range(1, 6)
+        ]
+        store = FakeRedis({"session_sequence": "5", "session_stream": entries})
+
+        with mock.patch.object(asyncutils, "get_redis_store", return_value=store):
+            frames = await asyncutils.get_frames(after=3)
+            self.assertEqual([frame.sequence for frame in frames], [4, 5])
+            self.assertEqual(frames[0].timestamp, 1.004)
+
+            self.assertEqual(await asyncutils.get_frames(after=5), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
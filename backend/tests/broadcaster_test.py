@@ -0,0 +1,283 @@
+from unittest import mock
+import unittest
+import asyncio
+import json
+
+import msgpack
+
+from api.broadcaster import IracingBroadcaster
+from api.frames import Frame
+from api.routers.rest.iracing import ws_stream_iracing_data
+
+
+class FakeWebSocket:
+    """
+    Records the messages sent to it, taking delay seconds per send
+    """
+
+    def __init__(self, delay=0, received=()):
+        self.delay = delay
+        self.messages = []
+        self.closed = False
+        self.scope = {}
+        self.received = list(received) + [{"type": "websocket.disconnect"}]
+
+    async def accept(self, subprotocol=None):
+        self.subprotocol = subprotocol
+
+    async def send_text(self, message):
+        await asyncio.sleep(self.delay)
+        self.messages.append(message)
+
+    async def send_bytes(self, message):
+        await self.send_text(message)
+
+    async def receive(self):
+        await asyncio.sleep(0.01)
+        return self.received.pop(0)
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeFrame(Frame):
+    """
+    A frame whose model is always present, with fixed JSON
+    """
+
+    def __init__(self, sequence):
+        super().__init__(sequence, {})
+        self.formats = {
+            "model": True,
+            "json": f'{{"sequence": {sequence}}}',
+            "dict": {"sequence": sequence},
+        }
+
+
+class TestBroadcaster(unittest.IsolatedAsyncioTestCase):
+    """
+    Unit tests for the websocket broadcast hub
+    """
+
+    async def asyncSetUp(self):
+        self.frame = FakeFrame(1)
+
+        async def get_frame():
+            return self.frame
+
+        patcher = mock.patch("api.broadcaster.get_frame", get_frame)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.broadcaster = IracingBroadcaster(
+            poll_interval=0.001, idle_interval=0.001, max_lag=0.05
+        )
+
+    async def test_broadcast_once(self):
+        clients = [FakeWebSocket(), FakeWebSocket()]
+
+        for client in clients:
+            await self.broadcaster.connect(client)
+
+        await asyncio.sleep(0.02)
+        self.frame = FakeFrame(2)
+        await asyncio.sleep(0.02)
+
+        for client in clients:
+            self.assertEqual(
+                client.messages,
+                ['{"sequence": 1}', '{"sequence": 2}'],
+                msg="Each frame should be sent once",
+            )
+
+        # Every client is sent the same string
+        self.assertIs(clients[0].messages[1], clients[1].messages[1])
+
+        for client in clients:
+            await self.broadcaster.disconnect(client)
+
+        await asyncio.sleep(0.01)
+        self.assertTrue(self.broadcaster.producer.done(), msg="Producer still running")
+
+    async def test_field_groups(self):
+        full, rpm, other_rpm = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+
+        with mock.patch("api.broadcaster.frame_payload") as frame_payload:
+            frame_payload.side_effect = lambda frame, fields, encoding: (
+                frame.json if fields is None else f"{fields} {frame.sequence}"
+            )
+
+            await self.broadcaster.connect(full)
+            await self.broadcaster.connect(rpm, ("RPM",))
+            await self.broadcaster.connect(other_rpm, ("RPM",))
+            await asyncio.sleep(0.02)
+
+            # One payload per field set
+            self.assertEqual(frame_payload.call_count, 2)
+
+        self.assertEqual(full.messages, ['{"sequence": 1}'])
+        self.assertEqual(rpm.messages, ["('RPM',) 1"])
+        self.assertIs(rpm.messages[0], other_rpm.messages[0])
+
+        await self.broadcaster.disconnect(rpm)
+        self.assertEqual(len(self.broadcaster.groups), 2)
+        await self.broadcaster.disconnect(other_rpm)
+        self.assertEqual(list(self.broadcaster.groups), [(None, "full", "json", None)])
+
+        await self.broadcaster.disconnect(full)
+
+    async def test_delta(self):
+        first, late = FakeWebSocket(), FakeWebSocket()
+
+        await self.broadcaster.connect(first, mode="delta")
+        await asyncio.sleep(0.02)
+        self.frame = FakeFrame(2)
+        await asyncio.sleep(0.02)
+
+        await self.broadcaster.connect(late, mode="delta")
+        self.broadcaster.resync(first)
+        self.frame = FakeFrame(3)
+        await asyncio.sleep(0.02)
+        self.frame = FakeFrame(4)
+        await asyncio.sleep(0.02)
+
+        messages = [json.loads(message) for message in first.messages]
+        self.assertEqual(
+            [(message["type"], message["sequence"]) for message in messages],
+            [("snapshot", 1), ("patch", 2), ("snapshot", 3), ("patch", 4)],
+        )
+        self.assertEqual(messages[1]["base"], 1)
+        self.assertEqual(
+            messages[1]["patch"],
+            [{"op": "replace", "path": "/sequence", "value": 2}],
+        )
+
+        # A client joining later starts from a snapshot of the next frame
+        self.assertEqual(late.messages, first.messages[2:])
+
+        await self.broadcaster.disconnect(first)
+        await self.broadcaster.disconnect(late)
+        self.assertEqual(self.broadcaster.groups, {})
+
+    async def test_msgpack(self):
+        binary, delta, text = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+
+        await self.broadcaster.connect(binary, encoding="msgpack")
+        await self.broadcaster.connect(delta, mode="delta", encoding="msgpack")
+        await self.broadcaster.connect(text)
+        await asyncio.sleep(0.02)
+        self.frame = FakeFrame(2)
+        await asyncio.sleep(0.02)
+
+        self.assertEqual(binary.subprotocol, "msgpack")
+        self.assertIsNone(text.subprotocol)
+
+        self.assertEqual(
+            [msgpack.unpackb(message) for message in binary.messages],
+            [{"sequence": 1}, {"sequence": 2}],
+        )
+        self.assertEqual(
+            [msgpack.unpackb(message)["type"] for message in delta.messages],
+            ["snapshot", "patch"],
+        )
+        self.assertEqual(text.messages, ['{"sequence": 1}', '{"sequence": 2}'])
+
+        for client in [binary, delta, text]:
+            await self.broadcaster.disconnect(client)
+
+    async def test_rate(self):
+        every, slow = FakeWebSocket(), FakeWebSocket()
+
+        await self.broadcaster.connect(every)
+        await self.broadcaster.connect(slow, rate=10)
+
+        for sequence in range(2, 11):
+            await asyncio.sleep(0.02)
+            self.frame = FakeFrame(sequence)
+
+        await asyncio.sleep(0.02)
+
+        self.assertEqual(len(every.messages), 10)
+        self.assertIn(len(slow.messages), [2, 3], msg="Not downsampled")
+        self.assertEqual(slow.messages[0], '{"sequence": 1}')
+
+        stats = self.broadcaster.stats()
+        self.assertEqual(stats["clients"], 2)
+        self.assertEqual(
+            sorted(client["rate"] or 0 for client in stats["subscribers"]), [0, 10]
+        )
+
+        with self.assertRaises(ValueError):
+            await self.broadcaster.connect(FakeWebSocket(), rate=1000)
+
+        await self.broadcaster.disconnect(every)
+        await self.broadcaster.disconnect(slow)
+
+    async def test_subscribe(self):
+        with self.broadcaster.subscribe() as frames:
+            self.assertEqual((await frames.wait(0.1)).sequence, 1)
+
+            self.frame = FakeFrame(2)
+            self.assertEqual((await frames.wait(0.1)).sequence, 2)
+            self.assertEqual(self.broadcaster.stats()["frame_subscribers"], 1)
+
+        await asyncio.sleep(0.01)
+        self.assertTrue(self.broadcaster.producer.done(), msg="Producer still running")
+
+    async def test_slow_client(self):
+        fast, slow = FakeWebSocket(), FakeWebSocket(delay=1)
+
+        await self.broadcaster.connect(fast)
+        await self.broadcaster.connect(slow)
+
+        # The first broadcast waits for the slow client to time out, after
+        # which it is dropped
+        for sequence in range(2, 5):
+            await asyncio.sleep(0.07)
+            self.frame = FakeFrame(sequence)
+
+        await asyncio.sleep(0.02)
+
+        self.assertTrue(slow.closed, msg="Slow client not dropped")
+        self.assertNotIn(slow, self.broadcaster.clients)
+        self.assertEqual(len(fast.messages), 4, msg="Fast client held up")
+
+        await self.broadcaster.disconnect(fast)
+
+    async def test_consumers(self):
+        consumer = self.broadcaster.consume("sse", rate=5)
+        stats = self.broadcaster.stats()
+
+        self.assertEqual(stats["clients"], 1)
+        self.assertEqual(stats["subscribers"][0]["stream"], "sse")
+        self.assertEqual(stats["subscribers"][0]["rate"], 5)
+
+        consumer.begin_send()
+        await asyncio.sleep(0.1)
+        consumer.end_send()
+        consumer.close()
+
+        stats = self.broadcaster.stats()
+        self.assertEqual(stats["clients"], 0, msg="Consumer not removed")
+        self.assertEqual(stats["lag_disconnects"], 1)
+
+    async def test_client_messages(self):
+        websocket = FakeWebSocket(
+            received=[
+                {"type": "websocket.receive", "bytes": b"\x00"},
+                {"type": "websocket.receive", "text": "resync"},
+            ]
+        )
+
+        # Binary messages are ignored rather than ending the handler with
+        # an error
+        with mock.patch.object(self.broadcaster, "resync") as resync:
+            await ws_stream_iracing_data(websocket, broadcaster=self.broadcaster)
+
+        resync.assert_called_once_with(websocket)
+        self.assertTrue(websocket.closed)
+        self.assertNotIn(websocket, self.broadcaster.clients)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+
+from api.circuitbreaker import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+
+
+class FakeClock:
+    def __init__(self):
+        self.time = 0
+
+    def __call__(self):
+        return self.time
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """
+    Unit tests for the circuit breaker
+    """
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(
+            "Test", failure_threshold=2, reset_timeout=5, clock=self.clock
+        )
+
+    def test_opens_after_failures(self):
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.assertFalse(self.breaker.available)
+
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, OPEN)
+        self.assertFalse(self.breaker.allow(), msg="Call allowed while open")
+        self.assertEqual(self.breaker.stats()["trips"], 1)
+
+    def test_half_open_probe(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+
+        self.clock.time = 5
+        self.assertTrue(self.breaker.allow(), msg="No probe after the timeout")
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        self.assertFalse(self.breaker.allow(), msg="Second probe allowed")
+
+        # A failed probe opens the circuit again
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, OPEN)
+        self.assertFalse(self.breaker.allow())
+
+        self.clock.time = 10
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.assertTrue(self.breaker.available)
+        self.assertEqual(self.breaker.stats()["trips"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
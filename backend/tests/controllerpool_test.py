@@ -0,0 +1,311 @@
+from unittest.mock import patch
+from types import SimpleNamespace
+from colour import Color
+import unittest
+import time
+
+from workerthreads.controllerpool import ControllerPool, LightFixture
+from display.colortheme import ColorTheme
+from display.matrix import MatrixDisplay
+from display.rpmgauge import RpmGauge
+from e131.wled import Wled
+from e131.ddp import Ddp
+
+
+class FakeController:
+    """
+    Stands in for a Wled controller, optionally failing or stalling
+    """
+
+    def __init__(self, error=None, delay=0):
+        self.error = error
+        self.delay = delay
+        self.is_connected = True
+        self.frames = 0
+        self.data = None
+        self.events = []
+
+    def update_dmx(self, data):
+        time.sleep(self.delay)
+
+        if self.error:
+            raise self.error
+
+        self.frames += 1
+        self.data = bytes(data)
+        self.events.append("send")
+
+    def stop(self):
+        self.is_connected = False
+        self.events.append("stop")
+
+    def reconnect(self):
+        self.is_connected = True
+
+
+def controller_row(id, led_count=50, universe=1, transport="e131", matrix_width=None):
+    return SimpleNamespace(
+        id=id,
+        name=f"Controller {id}",
+        ipAddress="127.0.0.1",
+        universe=universe,
+        ledCount=led_count,
+        transport=transport,
+        matrixWidth=matrix_width,
+        matrixLayout=None,
+        lightControllerSettings=[],
+    )
+
+
+class TestControllerPool(unittest.TestCase):
+    """
+    Unit tests for driving multiple light controllers from the worker
+    """
+
+    def setUp(self):
+        self.theme = ColorTheme(Color("green"), Color("red"))
+        self.fallback = LightFixture(
+            None, "fallback", FakeController(), RpmGauge(50, self.theme)
+        )
+        self.pool = ControllerPool(self.theme, 50, fallback=self.fallback)
+
+    def test_fallback_without_controllers(self):
+        self.pool.sync([])
+        self.pool.set_rpm(5000)
+        self.pool.update()
+
+        self.assertEqual(
+            self.fallback.controller.frames, 1, msg="Fallback should be driven"
+        )
+
+    def test_idle_effect(self):
+        self.fallback.display.set_idle_effect(0)
+        self.pool.set_rpm(20000)
+        self.pool.update(idle=True)
+
+        self.assertTrue(
+            self.fallback.controller.is_connected, msg="Should stay connected"
+        )
+        self.assertEqual(
+            self.fallback.controller.data, bytes(150), msg="Idle effect not shown"
+        )
+
+        self.pool.update()
+        self.assertNotEqual(
+            self.fallback.controller.data, bytes(150), msg="Gauge not shown on track"
+        )
+
+    def test_auto_power(self):
+        self.fallback.auto_power = True
+        self.pool.set_rpm(20000)
+        self.pool.update(idle=True)
+
+        self.assertEqual(
+            self.fallback.controller.data, bytes(150), msg="Not blanked while idle"
+        )
+
+        self.pool.update()
+        self.assertNotEqual(
+            self.fallback.controller.data, bytes(150), msg="Gauge not shown on track"
+        )
+
+    def test_hot_add_remove(self):
+        self.pool.sync([controller_row(1), controller_row(2, universe=2)])
+
+        self.assertEqual(len(self.pool.fixtures), 2, msg="Expected two fixtures")
+        self.assertFalse(
+            self.fallback.controller.is_connected,
+            msg="Fallback should stop once controllers are configured",
+        )
+
+        removed = self.pool.fixtures[2].controller
+        self.pool.sync([controller_row(1)])
+
+        self.assertNotIn(2, self.pool.fixtures, msg="Removed controller still driven")
+        self.assertFalse(removed.is_connected, msg="Removed controller not stopped")
+
+    def test_changed_controller_rebuilt(self):
+        self.pool.sync([controller_row(1, led_count=50)])
+        self.pool.sync([controller_row(1, led_count=200)])
+
+        fixture = self.pool.fixtures[1]
+        self.assertEqual(fixture.display.led_count, 200, msg="Display not rebuilt")
+        self.assertEqual(fixture.controller.universes, 2, msg="Controller not rebuilt")
+
+    def test_transport_per_controller(self):
+        self.pool.sync([controller_row(1), controller_row(2, transport="ddp")])
+
+        self.assertIsInstance(self.pool.fixtures[1].controller, Wled)
+        self.assertIsInstance(self.pool.fixtures[2].controller, Ddp)
+
+        self.pool.sync([controller_row(1, transport="ddp"), controller_row(2)])
+
+        self.assertIsInstance(
+            self.pool.fixtures[1].controller, Ddp, msg="Transport change not applied"
+        )
+
+    def test_unconnectable_controller_logged_once(self):
+        with patch.object(Wled, "connect", side_effect=ValueError("bad row")):
+            with self.assertLogs("workerthreads.controllerpool", "INFO") as logs:
+                for _ in range(3):
+                    self.pool.sync([controller_row(1)])
+
+        errors = [line for line in logs.output if line.startswith("ERROR")]
+        self.assertEqual(self.pool.fixtures, {})
+        self.assertEqual(len(errors), 1, msg="Failing row logged on every refresh")
+
+        # The failure is forgotten once the row connects
+        self.pool.sync([controller_row(1, led_count=60)])
+        self.assertIn(1, self.pool.fixtures)
+        self.assertEqual(self.pool.unconnectable, {})
+
+    def test_matrix_controller(self):
+        self.pool.set_gear(3)
+        self.pool.sync([controller_row(1, led_count=64, matrix_width=8)])
+        display = self.pool.fixtures[1].display
+
+        self.assertIsInstance(display, MatrixDisplay, msg="Expected a matrix display")
+        self.assertEqual((display.width, display.height), (8, 8))
+        self.assertEqual(display.gear, 3, msg="Gear not applied to new display")
+
+    def test_new_controller_gets_redline(self):
+        self.pool.set_redline(8000)
+        self.pool.sync([controller_row(1)])
+
+        self.assertEqual(self.pool.fixtures[1].display.redline, 8000)
+
+    def test_failure_isolation(self):
+        self.pool.sync([controller_row(1), controller_row(2, universe=2)])
+        self.pool.fixtures[1].controller = FakeController(error=OSError("boom"))
+        self.pool.fixtures[2].controller = FakeController()
+
+        self.pool.update()
+
+        self.assertFalse(
+            self.pool.fixtures[1].controller.is_connected,
+            msg="Failing controller should be taken offline",
+        )
+        self.assertEqual(
+            self.pool.fixtures[2].controller.frames,
+            1,
+            msg="Healthy controller should still receive the frame",
+        )
+
+    def test_sync_failure_isolation(self):
+        pool = ControllerPool(self.theme, 50, fallback=self.fallback, sync_universe=7)
+        self.fallback.controller.ip = "127.0.0.1"
+        self.fallback.controller.sync_universe = 7
+        error = OSError(101, "Network is unreachable")
+
+        with patch("e131.sender.E131Sender.sync", side_effect=error) as sync:
+            with self.assertLogs("workerthreads.controllerpool", "ERROR") as logs:
+                pool.update()
+                pool.update()
+
+        self.assertEqual(sync.call_count, 2)
+        self.assertEqual(len(logs.output), 1, msg="Sync failure logged every frame")
+        self.assertEqual(self.fallback.controller.frames, 2)
+        pool.shutdown()
+
+    def test_slow_controller_does_not_stall(self):
+        self.pool.sync([controller_row(1), controller_row(2, universe=2)])
+        self.pool.fixtures[1].controller = FakeController(delay=0.3)
+        self.pool.fixtures[2].controller = FakeController()
+
+        start = time.monotonic()
+        self.pool.update()
+        self.pool.update()
+
+        self.assertLess(
+            time.monotonic() - start, 0.2, msg="Slow controller held up the frame"
+        )
+        self.assertEqual(self.pool.fixtures[2].controller.frames, 2)
+
+    def test_late_failure_handled(self):
+        self.pool.sync([controller_row(1)])
+        controller = FakeController(error=OSError("timed out"), delay=0.05)
+        self.pool.fixtures[1].controller = controller
+
+        # The send fails after the frame budget
+        self.pool.update()
+        self.assertTrue(controller.is_connected)
+        time.sleep(0.1)
+
+        with self.assertLogs("workerthreads.controllerpool", "ERROR"):
+            self.pool.update()
+
+        self.assertFalse(controller.is_connected, msg="Late failure not handled")
+
+    def test_frame_rendered_before_send(self):
+        self.fallback.controller = FakeController(delay=0.1)
+        self.pool.set_redline(8000)
+        self.pool.set_rpm(2000)
+        expected = bytes(self.fallback.display.to_dmx())
+
+        # The send is still in flight when the display changes
+        self.pool.update()
+        self.pool.set_rpm(8000)
+        self.fallback.pending.result()
+
+        self.assertEqual(
+            self.fallback.controller.data, expected, msg="Frame changed while sent"
+        )
+
+    def test_removed_controller_stopped_after_send(self):
+        self.pool.sync([controller_row(1)])
+        controller = self.pool.fixtures[1].controller = FakeController(delay=0.1)
+
+        self.pool.update()
+        self.pool.sync([])
+
+        self.assertEqual(
+            controller.events, ["send", "stop"], msg="Stopped during a send"
+        )
+
+    def test_driver_settings_preloaded(self):
+        row = controller_row(1)
+        row.lightControllerSettings = [
+            SimpleNamespace(
+                driverId=2,
+                autoPower=True,
+                idleEffectId=3,
+                colorTheme=SimpleNamespace(
+                    id=7,
+                    gradientType="stepped",
+                    primaryColorR=0,
+                    primaryColorG=0,
+                    primaryColorB=255,
+                    secondaryColorR=255,
+                    secondaryColorG=255,
+                    secondaryColorB=0,
+                ),
+            )
+        ]
+        self.pool.sync([row])
+        fixture = self.pool.fixtures[1]
+        display = fixture.display
+
+        with patch(
+            "workerthreads.controllerpool.crud.get_light_controllers",
+            return_value=[row],
+        ):
+            self.pool.preload(2).result()
+
+        self.assertIs(fixture.display, display, msg="Swapped outside the render loop")
+
+        self.pool.refresh(2)
+
+        self.assertIs(self.pool.fixtures[1], fixture, msg="Connection rebuilt")
+        self.assertIsNot(fixture.display, display, msg="Driver theme not swapped in")
+        self.assertEqual(fixture.theme_key[:2], (7, "stepped"))
+        self.assertTrue(fixture.auto_power, msg="Driver settings not loaded")
+        self.assertEqual(fixture.idle_effect_id, 3, msg="Driver settings not loaded")
+
+    def tearDown(self):
+        self.pool.shutdown()
+
+        return super().tearDown()
+
+
+if __name__ == "__main__":
+    unittest.main()
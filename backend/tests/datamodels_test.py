@@ -1,6 +1,9 @@
 import unittest
 
+from pydantic import ValidationError
+
 from database.models import *
+from database import schemas
 
 
 class TestModels(unittest.TestCase):
@@ -15,5 +18,38 @@ class TestModels(unittest.TestCase):
         pass
 
 
+class TestSchemas(unittest.TestCase):
+    """
+    Unit tests for the API schemas
+    """
+
+    def test_light_controller_options(self):
+        controller = schemas.LightControllerCreate(
+            name="Gear panel",
+            ipAddress="10.0.0.2",
+            universe=1,
+            transport="ddp",
+            matrixLayout="row-major",
+        )
+        self.assertEqual(controller.transport, "ddp")
+
+        for options in [
+            {"transport": "DDP"},
+            {"matrixLayout": "spiral"},
+            {"ledCount": 0},
+            {"ledCount": 1501},
+        ]:
+            with self.assertRaises(ValidationError, msg=f"{options} accepted"):
+                schemas.LightControllerCreate(
+                    name="Strip", ipAddress="10.0.0.3", universe=1, **options
+                )
+
+        with self.assertRaises(ValidationError, msg="Bad update accepted"):
+            schemas.LightControllerUpdate(id=1, transport="ddp ")
+
+        with self.assertRaises(ValidationError, msg="Bad LED count accepted"):
+            schemas.LightControllerUpdate(id=1, ledCount=-1)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,99 @@
+from colour import Color
+import unittest
+import socket
+
+from e131.ddp import Ddp, HEADER_SIZE, FLAG_PUSH
+
+
+class TestDdp(unittest.TestCase):
+    """
+    Unit tests for the DDP controller, checked against a local UDP receiver
+    """
+
+    def setUp(self):
+        self.receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.receiver.bind(("127.0.0.1", 0))
+        self.receiver.settimeout(1)
+        self.port = self.receiver.getsockname()[1]
+        self.ddp = None
+
+    def connect(self, pixel_count):
+        self.ddp = Ddp.connect("127.0.0.1", pixel_count, port=self.port)
+        return self.ddp
+
+    def receive(self, count):
+        return [self.receiver.recvfrom(2048)[0] for _ in range(count)]
+
+    def test_no_pixel_cap(self):
+        self.assertEqual(
+            self.connect(3000).packets, 7, msg="Expected 7 packets for 3000 pixels"
+        )
+
+    def test_packets_per_frame(self):
+        self.assertEqual(
+            self.connect(480).packets, 1, msg="Expected 1 packet for 480 pixels"
+        )
+        self.ddp.stop()
+
+        self.assertEqual(
+            self.connect(481).packets, 2, msg="Expected 2 packets for 481 pixels"
+        )
+
+    def test_push_on_last_packet(self):
+        self.connect(1000).update_dmx(bytes(3000))
+        packets = self.receive(3)
+
+        self.assertEqual(
+            [bool(packet[0] & FLAG_PUSH) for packet in packets],
+            [False, False, True],
+            msg="Push flag should only be set on the last packet",
+        )
+        self.assertEqual(
+            len(set(packet[1] for packet in packets)),
+            1,
+            msg="All packets in a frame should share a sequence number",
+        )
+
+    def test_offsets_and_data(self):
+        pixel_count = 500
+        self.connect(pixel_count)
+        gradient = list(Color.range_to(Color("red"), Color("blue"), pixel_count))
+
+        self.ddp.update(gradient)
+        first, last = self.receive(2)
+
+        self.assertEqual(int.from_bytes(first[4:8], "big"), 0)
+        self.assertEqual(int.from_bytes(first[8:10], "big"), 480 * 3)
+        self.assertEqual(int.from_bytes(last[4:8], "big"), 480 * 3)
+        self.assertEqual(int.from_bytes(last[8:10], "big"), 20 * 3)
+        self.assertEqual(
+            first[HEADER_SIZE : HEADER_SIZE + 3], bytes([255, 0, 0]), msg="Wrong color"
+        )
+        self.assertEqual(last[-3:], bytes([0, 0, 255]), msg="Wrong color")
+
+    def test_short_frame_blanked(self):
+        self.connect(10).update_dmx(bytes([255] * 30))
+        self.receive(1)
+        self.ddp.update([])
+
+        self.assertEqual(
+            self.receive(1)[0][HEADER_SIZE:], bytes(30), msg="Old pixels not cleared"
+        )
+
+    def test_disconnect(self):
+        self.connect(10).stop()
+
+        self.assertFalse(self.ddp.is_connected, msg="Still connected after stop()")
+        self.assertIsNone(self.ddp.socket, msg="Socket open after stop()")
+
+    def tearDown(self):
+        if self.ddp:
+            self.ddp.stop()
+
+        self.receiver.close()
+
+        return super().tearDown()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+import json
+
+from api.delta import diff, DeltaEncoder
+from api.frames import Frame
+
+
+class DataFrame(Frame):
+    """
+    A frame with fixed data in place of a model
+    """
+
+    def __init__(self, sequence, data):
+        super().__init__(sequence, {})
+        self.formats = {"model": True, "dict": data}
+
+
+def apply_patch(data, patch):
+    """
+    Apply the JSON Patch operations diff produces
+    """
+    data = json.loads(json.dumps(data))
+
+    for operation in patch:
+        *parents, key = [
+            part.replace("~1", "/").replace("~0", "~")
+            for part in operation["path"].split("/")[1:]
+        ]
+        target = data
+        for parent in parents:
+            target = target[parent]
+
+        if operation["op"] == "remove":
+            del target[key]
+        else:
+            target[key] = operation["value"]
+
+    return data
+
+
+class TestDelta(unittest.TestCase):
+    """
+    Unit tests for delta encoding of frames
+    """
+
+    def test_diff(self):
+        old = {
+            "RPM": 5000,
+            "Gear": 3,
+            "Drivers": [1, 2],
+            "DriverInfo": {"RedLine": 7000, "Idle": 900},
+            "a/b~c": 1,
+        }
+        new = {
+            "RPM": 5100,
+            "Gear": 3,
+            "Drivers": [1, 2, 3],
+            "DriverInfo": {"RedLine": 7000, "Idle": 950},
+            "Speed": 30.5,
+        }
+
+        patch = diff(old, new)
+
+        self.assertIn({"op": "replace", "path": "/RPM", "value": 5100}, patch)
+        self.assertIn(
+            {"op": "replace", "path": "/DriverInfo/Idle", "value": 950}, patch
+        )
+        self.assertIn({"op": "remove", "path": "/a~1b~0c"}, patch)
+        self.assertNotIn("/Gear", [operation["path"] for operation in patch])
+        self.assertEqual(apply_patch(old, patch), new)
+        self.assertEqual(diff(new, new), [])
+
+    def test_encoder(self):
+        encoder = DeltaEncoder(resync_interval=2)
+        frames = [DataFrame(sequence, {"RPM": sequence}) for sequence in range(1, 6)]
+
+        # A snapshot is due first, then every resync_interval patches
+        patches = [encoder.patch(frame) for frame in frames]
+        self.assertEqual([patch is None for patch in patches], [1, 0, 0, 1, 0])
+
+        patch = json.loads(patches[1])
+        self.assertEqual(patch["sequence"], 2)
+        self.assertEqual(patch["base"], 1)
+        self.assertEqual(
+            patch["patch"], [{"op": "replace", "path": "/RPM", "value": 2}]
+        )
+
+        snapshot = encoder.snapshot(frames[0])
+        self.assertIs(encoder.snapshot(frames[0]), snapshot, msg="Snapshot rebuilt")
+        self.assertEqual(
+            json.loads(snapshot),
+            {"type": "snapshot", "sequence": 1, "data": {"RPM": 1}},
+        )
+
+        encoder.reset()
+        self.assertIsNone(encoder.patch(frames[4]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,179 @@
+import unittest
+import socket
+
+from e131.sender import (
+    E131Sender,
+    multicast_address,
+    DMX_DATA,
+    PACKET_SIZE,
+    SEQUENCE,
+    OPTIONS,
+    SYNC_ADDRESS,
+    SYNC_PACKET_SIZE,
+)
+from e131.sender_info import source
+from e131.wled import Wled
+
+
+class TestE131Sender(unittest.TestCase):
+    """
+    Unit tests for the native E1.31 sender, checked against a local UDP
+    receiver
+    """
+
+    def setUp(self):
+        self.receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.receiver.bind(("127.0.0.1", 0))
+        self.receiver.settimeout(1)
+        self.port = self.receiver.getsockname()[1]
+
+        self.sender = E131Sender()
+        self.sender.start()
+
+    def add_output(self, universe):
+        self.sender.activate_output(universe)
+        self.sender[universe].port = self.port
+
+        return self.sender[universe]
+
+    def receive(self):
+        return self.receiver.recvfrom(1024)[0]
+
+    def test_packet_format(self):
+        self.add_output(3).dmx_data = bytes([1, 2, 3])
+        self.sender.flush()
+        packet = self.receive()
+
+        self.assertEqual(len(packet), PACKET_SIZE, msg="Unexpected packet size")
+        self.assertEqual(packet[4:13], b"ASC-E1.17", msg="Missing ACN identifier")
+        self.assertEqual(
+            packet[22:38].hex(), "".join(source["cid"]), msg="Wrong CID in packet"
+        )
+        self.assertEqual(packet[44:57], b"SimRigManager", msg="Wrong source name")
+        self.assertEqual(
+            int.from_bytes(packet[113:115], "big"), 3, msg="Wrong universe"
+        )
+        self.assertEqual(
+            packet[DMX_DATA : DMX_DATA + 4], bytes([1, 2, 3, 0]), msg="Wrong DMX data"
+        )
+
+    def test_sequence_increments(self):
+        self.add_output(1)
+        self.sender.flush()
+        self.sender.flush()
+
+        first, second = self.receive()[SEQUENCE], self.receive()[SEQUENCE]
+        self.assertEqual((first + 1) & 0xFF, second, msg="Sequence should increment")
+
+    def test_dmx_data_padded(self):
+        output = self.add_output(1)
+        output.dmx_data = (255,) * 512
+        output.dmx_data = (7, 8)
+
+        self.assertEqual(len(output.dmx_data), 512, msg="DMX data should be 512 long")
+        self.assertEqual(output.dmx_data[:3], (7, 8, 0), msg="Old data not cleared")
+
+    def test_dmx_data_too_long(self):
+        with self.assertRaises(ValueError, msg="Expected ValueError over 512 channels"):
+            self.add_output(1).dmx_data = bytes(513)
+
+    def test_stream_terminated_on_stop(self):
+        self.add_output(1)
+        self.sender.stop()
+
+        for _ in range(3):
+            self.assertTrue(
+                self.receive()[OPTIONS] & 0x40, msg="Expected stream terminated flag"
+            )
+
+    def test_sync_address_in_data(self):
+        sender = E131Sender(sync_universe=7)
+        sender.activate_output(1)
+
+        self.assertEqual(
+            int.from_bytes(sender[1].packet[SYNC_ADDRESS : SYNC_ADDRESS + 2], "big"),
+            7,
+            msg="Data packets should carry the sync universe",
+        )
+
+    def test_sync_packet(self):
+        sender = E131Sender(sync_universe=7)
+        sender.port = self.port
+        sender.start()
+        sender.sync(["127.0.0.1"])
+        sender.sync(["127.0.0.1"])
+        first, second = self.receive(), self.receive()
+        sender.stop()
+
+        self.assertEqual(len(first), SYNC_PACKET_SIZE, msg="Unexpected sync size")
+        self.assertEqual(first[18:22], b"\x00\x00\x00\x08", msg="Wrong root vector")
+        self.assertEqual(first[40:44], b"\x00\x00\x00\x01", msg="Wrong sync vector")
+        self.assertEqual(int.from_bytes(first[45:47], "big"), 7, msg="Wrong universe")
+        self.assertEqual(
+            (first[44] + 1) & 0xFF, second[44], msg="Sync sequence should increment"
+        )
+
+    def test_send_without_socket(self):
+        sender = E131Sender(sync_universe=7)
+        sender.activate_output(1)
+
+        # Not started
+        sender.flush()
+        sender.sync(["127.0.0.1"])
+
+        sender.start()
+        sender.stop()
+        sender.activate_output(1)
+        sender.flush()
+
+        self.assertEqual(sender.dropped, 3)
+
+    def test_no_sync_without_universe(self):
+        self.sender.port = self.port
+        self.sender.sync(["127.0.0.1"])
+        self.receiver.settimeout(0.1)
+
+        with self.assertRaises(socket.timeout, msg="Sync sent without sync universe"):
+            self.receive()
+
+    def test_multicast_destination(self):
+        output = self.add_output(300)
+        output.multicast = True
+
+        self.assertEqual(multicast_address(300), "239.255.1.44")
+        self.assertEqual(
+            output.destination, "239.255.1.44", msg="Wrong multicast destination"
+        )
+
+    def test_wled_update(self):
+        wled = Wled.connect("127.0.0.1", 171)
+
+        for universe in wled.sender.get_active_outputs():
+            wled.sender[universe].port = self.port
+
+        # First and last pixels set, the last one spilling into universe 2
+        wled.update_dmx(bytes([1, 2, 3]) + bytes(507) + bytes([4, 5, 6]))
+        received = {}
+
+        for _ in range(2):
+            packet = self.receive()
+            received[int.from_bytes(packet[113:115], "big")] = packet[DMX_DATA:]
+
+        self.assertEqual(
+            received[1], bytes([1, 2, 3]) + bytes(509), msg="Wrong data in universe 1"
+        )
+        self.assertEqual(
+            received[2], bytes([4, 5, 6]) + bytes(509), msg="Wrong data in universe 2"
+        )
+
+        wled.stop()
+
+    def tearDown(self):
+        self.sender.stop()
+        self.receiver.close()
+
+        return super().tearDown()
+
+
+if __name__ == "__main__":
+    unittest.main()
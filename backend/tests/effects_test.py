@@ -0,0 +1,115 @@
+from colour import Color
+import unittest
+
+from display.effects import EffectEngine, ShiftPoints, shift_points
+from display.colortheme import ColorTheme
+from display.palette import build_palette
+from display.rpmgauge import RpmGauge
+
+# Dallara IR01, from tests/data
+IR01 = (15000, 18500, 19000, 19200)
+
+
+class FakeClock:
+    """
+    Manually advanced clock standing in for time.monotonic
+    """
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestEffects(unittest.TestCase):
+    """
+    Unit tests for the shift light effect engine
+    """
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.palette = build_palette(Color("green"), Color("red"), 20)
+        self.engine = EffectEngine(20, self.palette, stages=4, clock=self.clock)
+        self.engine.set_shift_points(ShiftPoints(*IR01), first_length=12)
+
+    def lit(self, frame):
+        """
+        Count the LEDs lit in a frame
+        """
+        return sum(1 for i in range(0, len(frame), 3) if any(frame[i : i + 3]))
+
+    def test_no_shift_lights(self):
+        self.assertIsNone(shift_points(None))
+        self.assertIsNone(shift_points((0, 0, 0, 0)), msg="Car has no shift lights")
+        self.assertEqual(shift_points(IR01), ShiftPoints(*IR01))
+
+        self.engine.set_shift_points(None)
+        self.assertIsNone(self.engine.render(20000), msg="Effect without shift RPMs")
+
+    def test_below_first_rpm(self):
+        self.assertIsNone(
+            self.engine.render(14999), msg="Gauge should show below first"
+        )
+
+    def test_shift_stages(self):
+        self.assertEqual(self.lit(self.engine.render(15000)), 12, msg="Zones start")
+        self.assertEqual(self.lit(self.engine.render(16000)), 14, msg="First zone")
+        self.assertEqual(self.lit(self.engine.render(18999)), 18, msg="Last zone")
+        self.assertEqual(self.lit(self.engine.render(19000)), 20, msg="Full at last")
+
+    def test_limiter_blink(self):
+        frames = []
+
+        for _ in range(8):
+            frames.append(self.lit(self.engine.render(19500)))
+            self.clock.now += 1 / 16
+
+        self.assertEqual(frames, [20, 20, 0, 0] * 2, msg="Should blink at 4 Hz")
+
+    def test_blink_continues_without_new_rpm(self):
+        first = self.engine.render(19500)
+        self.clock.now += 0.125
+
+        self.assertNotEqual(
+            first, self.engine.render(19500), msg="Blink should follow the clock"
+        )
+
+    def test_engines_in_phase(self):
+        self.clock.now = 100.1
+        late = EffectEngine(20, self.palette, stages=4, clock=self.clock)
+        late.set_shift_points(ShiftPoints(*IR01), first_length=12)
+
+        for _ in range(4):
+            self.assertEqual(
+                late.render(19500),
+                self.engine.render(19500),
+                msg="Engine built later blinks out of phase",
+            )
+            self.clock.now += 1 / 16
+
+    def test_pit_limiter_strobe(self):
+        first = self.engine.render(5000, pit_limiter=True)
+        self.clock.now += 0.25
+        second = self.engine.render(5000, pit_limiter=True)
+
+        self.assertEqual(first[:3], bytes([0, 0, 255]), msg="First half not lit")
+        self.assertEqual(first[-3:], bytes(3), msg="Second half lit")
+        self.assertEqual(second[:3], bytes(3), msg="Strobe did not alternate")
+        self.assertEqual(second[-3:], bytes([0, 0, 255]))
+
+    def test_gauge_shift_lights(self):
+        gauge = RpmGauge(20, ColorTheme(Color("green"), Color("red")))
+        gauge.set_idle_rpm(3490)
+        gauge.set_redline(20000)
+        gauge.set_shift_points(IR01)
+
+        gauge.set_rpm(11745)
+        self.assertEqual(self.lit(gauge.to_dmx()), 10, msg="Gauge should map idle")
+
+        gauge.set_rpm(19000)
+        self.assertEqual(self.lit(gauge.to_dmx()), 20, msg="Shift lights not shown")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+import json
+
+import msgpack
+
+from raceparse.iracingstream import IracingStream
+from api.encoding import negotiate, frame_payload, dumps
+from api.frames import Frame, EMPTY_FRAME
+
+
+class TestEncoding(unittest.TestCase):
+    """
+    Unit tests for the websocket stream encodings
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        stream = IracingStream.get_stream(
+            test_file="tests/data/summit_mx5_practice.bin"
+        )
+        cls.data = stream.latest(raw=True)
+        stream.stop()
+
+    def test_negotiate(self):
+        self.assertEqual(negotiate([]), "json")
+        self.assertEqual(negotiate(["other"]), "json")
+        self.assertEqual(negotiate(["other", "msgpack"]), "msgpack")
+
+    def test_frame_payload(self):
+        frame = Frame(1, self.data)
+        fields = ("DriverInfo.DriverCarRedLine", "RPM")
+
+        for projection in [None, fields]:
+            payload = frame_payload(frame, projection, "msgpack")
+
+            self.assertIsInstance(payload, bytes)
+            self.assertIs(frame_payload(frame, projection, "msgpack"), payload)
+            self.assertEqual(
+                msgpack.unpackb(payload),
+                json.loads(frame_payload(frame, projection)),
+                msg="Binary and JSON frames differ",
+            )
+
+        self.assertLess(len(frame_payload(frame, encoding="msgpack")), len(frame.json))
+        self.assertEqual(
+            frame_payload(EMPTY_FRAME, encoding="msgpack"), dumps({}, "msgpack")
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+
+from api.fallbackstore import FallbackStore
+
+
+class TestFallbackStore(unittest.TestCase):
+    """
+    Unit tests for the in-memory Redis fallback
+    """
+
+    def test_values(self):
+        store = FallbackStore()
+
+        pipeline = store.pipeline()
+        pipeline.set("a", 1).set("b", "2").mget(["a", "b", "c"])
+
+        self.assertEqual(pipeline.execute(), [True, True, ["1", "2", None]])
+        self.assertEqual(store.get("a"), "1")
+
+    def test_stream(self):
+        store = FallbackStore()
+
+        ids = [store.xadd("stream", {"sequence": i}, maxlen=3) for i in range(5)]
+
+        self.assertEqual(len(set(ids)), 5, msg="Entry IDs not unique")
+        self.assertEqual(
+            [fields["sequence"] for _, fields in store.xrange("stream")],
+            ["2", "3", "4"],
+        )
+        self.assertEqual(
+            [fields["sequence"] for _, fields in store.xrevrange("stream", count=2)],
+            ["4", "3"],
+        )
+        self.assertEqual(store.xrange("stream", "-", "0"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
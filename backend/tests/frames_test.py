@@ -0,0 +1,80 @@
+from unittest import mock
+import unittest
+import json
+
+from raceparse.iracingstream import IracingStream
+from api.frames import Frame, FrameDecoder, FrameCursor, EMPTY_FRAME
+from api import frames
+
+
+class TestFrames(unittest.TestCase):
+    """
+    Unit tests for decode-once frames
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        stream = IracingStream.get_stream(
+            test_file="tests/data/summit_mx5_practice.bin"
+        )
+        cls.data = stream.latest(raw=True)
+        stream.stop()
+
+    def test_decoded_once(self):
+        frame = Frame(1, self.data)
+
+        with mock.patch.object(
+            frames, "build_model", wraps=frames.build_model
+        ) as build:
+            model = frame.model
+            self.assertIs(frame.model, model, msg="Model rebuilt")
+            self.assertEqual(build.call_count, 1)
+
+        self.assertEqual(model.SessionTime, self.data["SessionTime"])
+        self.assertIs(frame.json, frame.json, msg="JSON serialized twice")
+        self.assertEqual(json.loads(frame.json)["RPM"], self.data["RPM"])
+
+        build = mock.Mock(return_value="rendered")
+        self.assertEqual(frame.render("test", build), "rendered")
+        self.assertEqual(frame.render("test", build), "rendered")
+        build.assert_called_once_with(model)
+
+    def test_no_session_data(self):
+        frame = Frame(1, {"SessionTime": 0})
+
+        self.assertIsNone(frame.model)
+        self.assertEqual(frame.json, "{}")
+        self.assertIsNone(frame.render("test", mock.Mock()))
+
+    def test_decoder(self):
+        decoder = FrameDecoder()
+        text = json.dumps(self.data)
+
+        self.assertIs(decoder.decode(None, None), EMPTY_FRAME)
+
+        frame = decoder.decode("1", text)
+        self.assertEqual((frame.sequence, frame.tick), (1, self.data["SessionTick"]))
+        self.assertTrue(decoder.is_current("1"))
+        self.assertIs(
+            decoder.decode("1", text), frame, msg="Unchanged frame decoded again"
+        )
+
+        newer = decoder.decode("2", json.dumps(dict(self.data, SessionTime=2.0)))
+        self.assertFalse(decoder.is_current("1"))
+        self.assertEqual(newer.model.SessionTime, 2.0)
+
+    def test_cursor(self):
+        cursor = FrameCursor()
+
+        self.assertTrue(cursor.advance(Frame(1, {})))
+        self.assertFalse(cursor.advance(Frame(1, {})), msg="Frame sent twice")
+        self.assertTrue(cursor.advance(Frame(4, {})))
+        self.assertEqual((cursor.frames, cursor.skipped), (2, 2))
+
+        # Worker restarted
+        self.assertTrue(cursor.advance(Frame(1, {})))
+        self.assertEqual((cursor.frames, cursor.skipped), (3, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+from unittest import mock
+import threading
+import unittest
+
+from api.framestore import LocalFrameStore, get_frame_store, local_frame_store
+from api import utils
+
+
+class TestFrameStore(unittest.TestCase):
+    """
+    Unit tests for the in-process frame store
+    """
+
+    def test_publish(self):
+        store = LocalFrameStore()
+        self.assertIsNone(store.get().model)
+
+        data = {"SessionTime": 1.0}
+        frame = store.publish(data)
+        self.assertIs(store.get(), frame)
+        self.assertIs(frame.data, data, msg="Data was copied")
+        self.assertEqual(store.sequence, 1)
+
+    def test_wait(self):
+        store = LocalFrameStore()
+        store.publish({"SessionTime": 1.0})
+
+        # Already newer
+        self.assertEqual(store.wait(0, timeout=0).sequence, 1)
+
+        # Timed out
+        self.assertEqual(store.wait(1, timeout=0.01).sequence, 1)
+
+        publisher = threading.Timer(0.01, store.publish, [{"SessionTime": 2.0}])
+        publisher.start()
+        frame = store.wait(1, timeout=5)
+        self.assertEqual((frame.sequence, frame.data), (2, {"SessionTime": 2.0}))
+        publisher.join()
+
+    def test_history(self):
+        store = LocalFrameStore(history_length=3)
+
+        for tick in range(5):
+            store.publish({"SessionTick": tick})
+
+        self.assertEqual([frame.sequence for frame in store.get_range()], [3, 4, 5])
+        self.assertEqual([frame.tick for frame in store.get_range(after=3)], [3, 4])
+        self.assertEqual(len(store.get_range(limit=2)), 2)
+
+        last = store.get().timestamp
+        self.assertEqual(len(store.get_range(since=last)), 1)
+        self.assertEqual(store.get_range(until=last - 60), [])
+
+    def test_history_not_cached(self):
+        store = LocalFrameStore(history_length=3)
+        store.publish({"SessionTick": 1})
+        store.get().render("tick", lambda model: model)
+
+        frame = store.get_range()[0]
+        self.assertIsNot(frame, store.get())
+        self.assertEqual(frame.formats, {}, msg="Rendered formats kept in the history")
+
+    def test_selection(self):
+        with mock.patch.dict("os.environ", {"FRAME_STORE": "local"}):
+            self.assertIs(get_frame_store(), local_frame_store)
+
+        with mock.patch.dict("os.environ", {"FRAME_STORE": "redis"}):
+            self.assertIsNone(get_frame_store())
+
+    def test_publish_session_data(self):
+        store = LocalFrameStore()
+
+        with mock.patch("api.utils.get_frame_store", return_value=store):
+            self.assertEqual(utils.publish_session_data({"SessionTime": 0}), {})
+            self.assertEqual(utils.get_iracing_data(), {}, msg="Empty frame returned")
+            self.assertEqual(store.sequence, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
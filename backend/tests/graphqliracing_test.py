@@ -0,0 +1,90 @@
+from unittest import mock
+import unittest
+import asyncio
+
+import strawberry
+
+from raceparse.iracingstream import IracingStream
+from api.routers.graphql.iracing.query import IracingQuery
+from api.routers.graphql.iracing.subscription import IracingSubscription
+from api.broadcaster import IracingBroadcaster
+from api.frames import Frame
+
+QUERY = "{ iracing { RPM Gear DriverInfo { DriverCarRedLine } } }"
+SUBSCRIPTION = "subscription { iracing(fps: 60) { SessionTick } }"
+
+
+class TestGraphqlIracing(unittest.IsolatedAsyncioTestCase):
+    """
+    Unit tests for the GraphQL iRacing query and subscription
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        stream = IracingStream.get_stream(
+            test_file="tests/data/summit_mx5_practice.bin"
+        )
+        cls.data = stream.latest(raw=True)
+        stream.stop()
+
+        cls.schema = strawberry.Schema(
+            query=IracingQuery, subscription=IracingSubscription
+        )
+
+    async def asyncSetUp(self):
+        self.frame = Frame(1, self.data)
+
+        async def get_frame():
+            return self.frame
+
+        broadcaster = IracingBroadcaster(poll_interval=0.001, idle_interval=0.001)
+
+        for patcher in [
+            mock.patch("api.broadcaster.get_frame", get_frame),
+            mock.patch("api.routers.graphql.iracing.query.get_frame", get_frame),
+            mock.patch("api.routers.graphql.iracing.subscription.get_frame", get_frame),
+            mock.patch(
+                "api.routers.graphql.iracing.subscription.get_broadcaster",
+                return_value=broadcaster,
+            ),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def test_query(self):
+        result = await self.schema.execute(QUERY)
+
+        self.assertIsNone(result.errors)
+        self.assertEqual(result.data["iracing"]["RPM"], self.frame.model.RPM)
+        self.assertEqual(
+            result.data["iracing"]["DriverInfo"]["DriverCarRedLine"],
+            self.frame.model.DriverInfo.DriverCarRedLine,
+        )
+
+    async def test_subscription(self):
+        results = await self.schema.subscribe(SUBSCRIPTION)
+        ticks = []
+
+        first = await asyncio.wait_for(results.__anext__(), 1)
+        ticks.append(first.data["iracing"]["SessionTick"])
+
+        self.frame = Frame(
+            2, {**self.data, "SessionTick": self.data["SessionTick"] + 1}
+        )
+        second = await asyncio.wait_for(results.__anext__(), 1)
+        ticks.append(second.data["iracing"]["SessionTick"])
+
+        await results.aclose()
+
+        self.assertEqual(
+            ticks, [self.data["SessionTick"], self.data["SessionTick"] + 1]
+        )
+
+        result = await self.schema.subscribe(
+            "subscription { iracing(fps: 61) { RPM } }"
+        )
+        self.assertIsNotNone((await result.__anext__()).errors, msg="fps not limited")
+
+
+if __name__ == "__main__":
+    unittest.main()
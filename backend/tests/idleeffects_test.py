@@ -0,0 +1,85 @@
+from colour import Color
+import unittest
+
+from display.idleeffects import (
+    build_idle_effect,
+    IDLE_FRAMERATE,
+    OFF,
+    BREATHE,
+    CHASE,
+    RAINBOW,
+)
+from display.colortheme import ColorTheme
+from display.palette import build_palette
+from display.rpmgauge import RpmGauge
+
+
+class TestIdleEffects(unittest.TestCase):
+    """
+    Unit tests for the precomputed idle effects
+    """
+
+    def setUp(self):
+        self.palette = build_palette(Color("green"), Color("red"), 20)
+
+    def lit(self, frame):
+        """
+        Get the indexes of the LEDs lit in a frame
+        """
+        return [i // 3 for i in range(0, len(frame), 3) if any(frame[i : i + 3])]
+
+    def test_off(self):
+        effect = build_idle_effect(OFF, 20, self.palette)
+
+        self.assertEqual(effect.frame_at(1.5), bytes(60), msg="Off should be dark")
+
+    def test_unknown_effect(self):
+        effect = build_idle_effect(99, 20, self.palette)
+
+        self.assertEqual(
+            len(effect.frames),
+            len(build_idle_effect(BREATHE, 20, self.palette).frames),
+            msg="Unknown effects should fall back to the default",
+        )
+
+    def test_breathe(self):
+        effect = build_idle_effect(BREATHE, 20, self.palette)
+        peak = max(effect.frames, key=sum)
+
+        self.assertEqual(peak, self.palette, msg="Should reach full brightness")
+        self.assertLess(sum(effect.frame_at(0)), sum(peak) / 5, msg="Should dim")
+        self.assertEqual(
+            effect.frame_at(0), effect.frame_at(4), msg="Should loop every 4 seconds"
+        )
+
+    def test_chase(self):
+        effect = build_idle_effect(CHASE, 20, self.palette)
+
+        self.assertEqual(self.lit(effect.frame_at(0)), [0, 1], msg="Wrong segment")
+        self.assertEqual(
+            self.lit(effect.frame_at(1)), [10, 11], msg="Segment should move"
+        )
+
+    def test_rainbow(self):
+        effect = build_idle_effect(RAINBOW, 20, self.palette)
+        first = effect.frame_at(0)
+
+        self.assertEqual(first[:3], bytes([255, 0, 0]), msg="Should start red")
+        self.assertEqual(
+            effect.frame_at(1 / IDLE_FRAMERATE * 25)[:3],
+            first[15:18],
+            msg="Should rotate along the strip",
+        )
+
+    def test_display_idle(self):
+        gauge = RpmGauge(20, ColorTheme(Color("green"), Color("red")))
+        gauge.set_idle_effect(CHASE)
+
+        self.assertEqual(len(gauge.to_idle_dmx(0.5)), 60, msg="Wrong frame size")
+        self.assertEqual(
+            self.lit(gauge.to_idle_dmx(0)), [0, 1], msg="Effect not applied"
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
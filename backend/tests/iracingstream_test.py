@@ -152,6 +152,30 @@ class TestIracingStream(unittest.TestCase):
             msg="Best lap time should be 1:47.39",
         )
 
+    def test_shift_points(self):
+        """
+        Test reading (and caching) the car's shift light RPMs
+        """
+        iracing_stream = IracingStream.get_stream(
+            test_file="tests/data/summit_mx5_practice.bin"
+        )
+
+        snapshot = iracing_stream.latest()
+
+        self.assertEqual(
+            snapshot["shift_points"],
+            (5600, 7200, 7200, 7700),
+            msg="Wrong shift points for the MX-5",
+        )
+        self.assertIn(
+            "Mazda MX-5 Cup",
+            IracingStream.shift_points,
+            msg="Shift points should be cached by car",
+        )
+        self.assertFalse(snapshot["pit_limiter"], msg="Pit limiter should be off")
+
+        iracing_stream.stop()
+
 
 if __name__ == "__main__":
     unittest.main()
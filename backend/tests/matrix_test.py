@@ -0,0 +1,128 @@
+from colour import Color
+import unittest
+import irsdk
+
+from display.matrix import MatrixDisplay, pixel_map
+from display.colortheme import ColorTheme
+
+RED = bytes([255, 0, 0])
+GREEN = bytes([0, 128, 0])
+BLUE = bytes([0, 0, 255])
+
+
+class TestMatrixDisplay(unittest.TestCase):
+    """
+    Unit tests for the 2D LED matrix display
+    """
+
+    def setUp(self):
+        self.theme = ColorTheme(Color("green"), Color("red"))
+        self.matrix = MatrixDisplay(8, 8, self.theme, "row-major", redline=8000)
+
+    def pixel(self, data, x, y, width=8):
+        index = (y * width + x) * 3
+        return bytes(data[index : index + 3])
+
+    def test_pixel_map(self):
+        self.assertEqual(pixel_map(3, 2, "row-major"), [0, 1, 2, 3, 4, 5])
+        self.assertEqual(pixel_map(3, 2, "serpentine"), [0, 1, 2, 5, 4, 3])
+
+        with self.assertRaises(ValueError, msg="Expected ValueError for bad layout"):
+            pixel_map(3, 2, "spiral")
+
+    def test_blank(self):
+        self.assertEqual(
+            bytes(self.matrix.to_dmx()), bytes(192), msg="Matrix should start dark"
+        )
+
+    def test_rpm_bar(self):
+        self.matrix.set_rpm(4000)
+        data = self.matrix.to_dmx()
+
+        self.assertEqual(self.pixel(data, 0, 0), GREEN, msg="Wrong bar start color")
+        self.assertEqual(self.pixel(data, 4, 0), bytes(3), msg="Bar too long")
+        self.assertEqual(self.pixel(data, 0, 1), bytes(3), msg="Bar too tall")
+
+    def test_gear(self):
+        self.matrix.set_gear(1)
+        data = self.matrix.to_dmx()
+
+        # "1" is drawn centered below the bar: columns 2 to 4, rows 2 to 6
+        self.assertEqual(self.pixel(data, 2, 2), bytes(3), msg="Wrong glyph")
+        self.assertEqual(self.pixel(data, 3, 2), GREEN, msg="Wrong glyph")
+        self.assertEqual(self.pixel(data, 3, 6), GREEN, msg="Wrong glyph")
+
+        self.matrix.set_gear(-1)
+        self.assertEqual(
+            self.pixel(self.matrix.to_dmx(), 2, 2), GREEN, msg="Reverse not drawn"
+        )
+
+    def test_flag_border(self):
+        self.matrix.set_flags(irsdk.Flags.blue | irsdk.Flags.servicible)
+        data = self.matrix.to_dmx()
+
+        self.assertEqual(self.pixel(data, 0, 1), BLUE, msg="Missing top border")
+        self.assertEqual(self.pixel(data, 7, 7), BLUE, msg="Missing bottom border")
+        self.assertEqual(self.pixel(data, 0, 4), BLUE, msg="Missing left border")
+        self.assertEqual(self.pixel(data, 1, 4), bytes(3), msg="Border too wide")
+
+        self.matrix.set_flags(irsdk.Flags.blue | irsdk.Flags.red)
+        self.assertEqual(
+            self.pixel(self.matrix.to_dmx(), 0, 1), RED, msg="Red should win"
+        )
+
+    def test_idle_rpm(self):
+        self.matrix.set_idle_rpm(2000)
+        self.matrix.set_rpm(5000)
+        data = self.matrix.to_dmx()
+
+        # Halfway from idle to redline
+        self.assertNotEqual(self.pixel(data, 3, 0), bytes(3), msg="Bar too short")
+        self.assertEqual(self.pixel(data, 4, 0), bytes(3), msg="Bar too long")
+
+    def test_gear_inside_border(self):
+        matrix = MatrixDisplay(16, 16, self.theme, "row-major")
+        matrix.set_gear(8)
+        gear = bytes(matrix.to_dmx())
+
+        matrix.set_flags(irsdk.Flags.blue)
+        data = matrix.to_dmx()
+
+        for x in range(16):
+            for y in range(16):
+                if self.pixel(gear, x, y, 16) == GREEN:
+                    self.assertEqual(
+                        self.pixel(data, x, y, 16), GREEN, msg="Border covers gear"
+                    )
+
+    def test_idle_effect_wiring(self):
+        row_major = MatrixDisplay(4, 2, self.theme, "row-major")
+        serpentine = MatrixDisplay(4, 2, self.theme, "serpentine")
+
+        for matrix in (row_major, serpentine):
+            matrix.set_idle_effect(1)
+
+        frame = row_major.to_idle_dmx(0)
+        wired = serpentine.to_idle_dmx(0)
+
+        # The second row is wired right to left
+        self.assertEqual(wired[:12], frame[:12], msg="First row changed")
+        self.assertEqual(
+            [self.pixel(wired, x, 1, 4) for x in range(4)],
+            [self.pixel(frame, x, 1, 4) for x in reversed(range(4))],
+            msg="Idle effect not in wiring order",
+        )
+
+    def test_serpentine(self):
+        matrix = MatrixDisplay(8, 8, self.theme, "serpentine", bar_rows=2)
+        matrix.set_rpm(20000)
+        data = matrix.to_dmx()
+
+        # Second row is wired right to left, so it starts with the end color
+        self.assertEqual(self.pixel(data, 0, 0), GREEN, msg="Wrong first row")
+        self.assertEqual(self.pixel(data, 0, 1), RED, msg="Row not reversed")
+        self.assertEqual(self.pixel(data, 7, 1), GREEN, msg="Row not reversed")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+from unittest import mock
+import threading
+import unittest
+import asyncio
+import json
+
+from api.notifier import Notifier
+from api.ssegenerators import GeneratorFunctions
+from api import asyncutils
+
+
+class FakeRequest:
+    async def is_disconnected(self):
+        return False
+
+
+class FakeRedis:
+    """
+    Records the messages published to it
+    """
+
+    def __init__(self):
+        self.values = {}
+        self.published = []
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def publish(self, channel, message):
+        self.published.append((channel, message))
+
+
+class TestNotifier(unittest.IsolatedAsyncioTestCase):
+    """
+    Unit tests for change notifications and the SSE generators that wait on
+    them
+    """
+
+    def setUp(self):
+        asyncutils.redis_breaker.reset()
+
+        # Don't listen to Redis for other processes' notifications
+        patcher = mock.patch.object(asyncutils, "relay_notifications", mock.AsyncMock())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_notify(self):
+        notifier = Notifier()
+
+        with notifier.subscribe("laptimes") as laptimes:
+            self.assertIsNone(await laptimes.wait(0.01), msg="Woken without a change")
+
+            # From another thread, twice before the subscriber wakes
+            for value in ["1", "2"]:
+                thread = threading.Thread(
+                    target=notifier.notify, args=("laptimes", value)
+                )
+                thread.start()
+                thread.join()
+
+            self.assertEqual(await laptimes.wait(1), "2")
+            self.assertIsNone(await laptimes.wait(0.01))
+
+            notifier.notify("other", "3")
+            self.assertIsNone(await laptimes.wait(0.01))
+
+        notifier.notify("laptimes", "4")
+        await asyncio.sleep(0.01)
+        self.assertFalse(laptimes.event.is_set(), msg="Notified after close")
+
+    async def test_lap_time_stream(self):
+        store = FakeRedis()
+
+        with mock.patch.object(asyncutils, "get_redis_store", return_value=store):
+            generator = GeneratorFunctions(FakeRequest()).new_lap_time_generator()
+            next_lap = asyncio.ensure_future(generator.__anext__())
+            await asyncio.sleep(0.01)
+            self.assertFalse(next_lap.done(), msg="Sent without a new lap time")
+
+            await asyncutils.notify("laptimes", json.dumps({"id": 1}))
+
+            lap_time = await asyncio.wait_for(next_lap, 0.1)
+            self.assertEqual(json.loads(lap_time), {"id": 1})
+
+            await generator.aclose()
+
+        channel, message = store.published[0]
+        self.assertEqual(channel, "notify:laptimes")
+        self.assertEqual(message, f'{asyncutils.NOTIFY_ORIGIN}:{{"id": 1}}')
+
+    async def test_relay(self):
+        with asyncutils.subscribe("active_driver") as drivers:
+            # Notifications this process published are already delivered
+            message = {
+                "type": "pmessage",
+                "channel": "notify:active_driver",
+                "data": f'{asyncutils.NOTIFY_ORIGIN}:{{"id": 1}}',
+            }
+            asyncutils.relay(message)
+            self.assertIsNone(await drivers.wait(0.01))
+
+            asyncutils.relay({**message, "data": 'other:{"id": 2}'})
+            self.assertEqual(await drivers.wait(0.1), '{"id": 2}')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+from types import SimpleNamespace
+from colour import Color
+import unittest
+
+from display.colortheme import ColorTheme
+from display import palette
+
+
+class TestPalette(unittest.TestCase):
+    """
+    Unit tests for gradient palettes
+    """
+
+    def setUp(self):
+        palette.clear_cache()
+
+    def pixel(self, data, index):
+        return tuple(data[index * 3 : index * 3 + 3])
+
+    def test_endpoints(self):
+        for gradient in palette.GRADIENT_TYPES:
+            data = palette.build_palette(Color("green"), Color("red"), 20, gradient)
+
+            self.assertEqual(len(data), 60, msg=f"Wrong {gradient} palette size")
+            self.assertEqual(
+                self.pixel(data, 0), (0, 128, 0), msg=f"Wrong {gradient} start"
+            )
+            self.assertEqual(
+                self.pixel(data, 19), (255, 0, 0), msg=f"Wrong {gradient} end"
+            )
+
+    def test_hsl_matches_range_to(self):
+        data = palette.build_palette(Color("blue"), Color("yellow"), 30, "hsl")
+        expected = list(Color("blue").range_to(Color("yellow"), 30))
+
+        self.assertEqual(
+            palette.bytes_to_colors(data), expected, msg="HSL should match range_to"
+        )
+
+    def test_rgb_midpoint(self):
+        data = palette.build_palette(Color("black"), Color("white"), 3, "rgb")
+
+        self.assertEqual(self.pixel(data, 1), (128, 128, 128), msg="Wrong midpoint")
+
+    def test_lab_lightness_even(self):
+        data = palette.build_palette(Color("black"), Color("white"), 11, "lab")
+        steps = [
+            palette.rgb_to_lab([c / 255 for c in self.pixel(data, i)])[0]
+            for i in range(11)
+        ]
+
+        for a, b in zip(steps, steps[1:]):
+            self.assertAlmostEqual(b - a, 10, delta=0.5, msg="Uneven Lab steps")
+
+    def test_stepped_zones(self):
+        data = palette.build_palette(Color("green"), Color("red"), 9, "stepped")
+        zones = [self.pixel(data, i) for i in range(9)]
+
+        self.assertEqual(len(set(zones)), 3, msg="Expected 3 shift zones")
+        self.assertEqual(zones[0:3], [zones[0]] * 3, msg="First zone not solid")
+        self.assertEqual(zones[8], (255, 0, 0), msg="Last zone should be red")
+
+    def test_unknown_gradient_type(self):
+        self.assertEqual(palette.gradient_type("Porsche Gradient"), "hsl")
+        self.assertEqual(palette.gradient_type(None), "hsl")
+        self.assertEqual(palette.gradient_type("Linear"), "rgb")
+
+    def test_cached_per_theme_and_count(self):
+        theme = ColorTheme(Color("green"), Color("red"), 1, "lab")
+
+        first = palette.get_palette(theme, 50)
+
+        self.assertIs(palette.get_palette(theme, 50), first, msg="Palette rebuilt")
+        self.assertIsNot(
+            palette.get_palette(theme, 60), first, msg="LED count not in cache key"
+        )
+
+    def test_edited_theme_rebuilt(self):
+        model = SimpleNamespace(
+            id=1,
+            gradientType="rgb",
+            primaryColorR=0,
+            primaryColorG=255,
+            primaryColorB=0,
+            secondaryColorR=255,
+            secondaryColorG=0,
+            secondaryColorB=0,
+        )
+        first = palette.get_palette(ColorTheme.from_model(model), 10)
+        model.secondaryColorB = 255
+        second = palette.get_palette(ColorTheme.from_model(model), 10)
+
+        self.assertEqual(self.pixel(second, 9), (255, 0, 255), msg="Stale palette")
+        self.assertNotEqual(first, second)
+
+
+if __name__ == "__main__":
+    unittest.main()
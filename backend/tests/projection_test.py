@@ -0,0 +1,91 @@
+import unittest
+import json
+
+from raceparse.iracingstream import IracingStream
+from api.frames import Frame
+from api.projection import parse_fields, get_projector, frame_json, PRESETS
+
+
+class TestProjection(unittest.TestCase):
+    """
+    Unit tests for field projection of iRacing frames
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        stream = IracingStream.get_stream(
+            test_file="tests/data/summit_mx5_practice.bin"
+        )
+        cls.data = stream.latest(raw=True)
+        stream.stop()
+
+    def test_parse_fields(self):
+        self.assertIsNone(parse_fields())
+        self.assertIsNone(parse_fields(" , "))
+        self.assertEqual(parse_fields("Speed, RPM,RPM"), ("RPM", "Speed"))
+        self.assertEqual(
+            parse_fields("Gear,Speed", preset="overlay"),
+            tuple(sorted(PRESETS["overlay"])),
+        )
+        self.assertEqual(
+            parse_fields("DriverInfo.DriverCarRedLine"),
+            ("DriverInfo.DriverCarRedLine",),
+        )
+
+        for fields in ["Nope", "RPM.Value", "DriverInfo.Nope"]:
+            with self.assertRaises(ValueError, msg=fields):
+                parse_fields(fields)
+
+        with self.assertRaises(ValueError):
+            parse_fields(preset="nope")
+
+    def test_list_fields(self):
+        with self.assertRaises(ValueError, msg="Field inside a list accepted"):
+            parse_fields("DriverInfo.Drivers.CarNumber")
+
+        # Lists can be selected whole
+        fields = parse_fields("DriverInfo.Drivers")
+        projected = json.loads(frame_json(Frame(1, self.data), fields))
+
+        self.assertEqual(
+            projected["DriverInfo"]["Drivers"],
+            json.loads(Frame(1, self.data).json)["DriverInfo"]["Drivers"],
+        )
+
+    def test_projection(self):
+        frame = Frame(1, self.data)
+        fields = parse_fields("Gear,Speed", preset="rpm")
+
+        projected = json.loads(frame_json(frame, fields))
+        full = json.loads(frame.json)
+
+        self.assertEqual(
+            projected,
+            {
+                "Gear": full["Gear"],
+                "RPM": full["RPM"],
+                "Speed": full["Speed"],
+                "DriverInfo": {
+                    "DriverCarIdleRPM": full["DriverInfo"]["DriverCarIdleRPM"],
+                    "DriverCarRedLine": full["DriverInfo"]["DriverCarRedLine"],
+                },
+            },
+        )
+
+        # Built once per frame and field set
+        self.assertIs(frame_json(frame, fields), frame_json(frame, fields))
+        self.assertIs(get_projector(fields), get_projector(fields))
+        self.assertIs(frame_json(frame), frame.json)
+
+    def test_missing_parent(self):
+        model = Frame(1, self.data).model.model_copy(update={"DriverInfo": None})
+        projector = get_projector(("DriverInfo.DriverCarRedLine", "RPM"))
+
+        self.assertEqual(
+            projector.project(model),
+            {"DriverInfo": {"DriverCarRedLine": None}, "RPM": model.RPM},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
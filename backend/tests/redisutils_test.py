@@ -0,0 +1,133 @@
+from unittest import mock
+import unittest
+import json
+
+from api import utils
+from api.fallbackstore import FallbackStore
+from api.frames import SessionInfoEncoder
+
+
+class TestRedisUtils(unittest.TestCase):
+    """
+    Unit tests for the shared Redis connection pool and helpers
+    """
+
+    def setUp(self):
+        utils.reset_redis_store()
+        utils.redis_breaker.reset()
+        utils.fallback_store.clear()
+
+        encoder = mock.patch.object(utils, "session_info_encoder", SessionInfoEncoder())
+        encoder.start()
+        self.addCleanup(encoder.stop)
+        self.addCleanup(utils.reset_redis_store)
+        self.addCleanup(utils.redis_breaker.reset)
+
+    def test_shared_store(self):
+        environ = {"REDIS_POOL_SIZE": "4", "REDIS_HEALTH_CHECK_INTERVAL": "10"}
+
+        with mock.patch.dict("os.environ", environ):
+            store = utils.get_redis_store()
+
+        self.assertIs(utils.get_redis_store(), store, msg="Store not shared")
+
+        pool = store.connection_pool
+        self.assertEqual(pool.max_connections, 4, msg="Wrong pool size")
+        self.assertEqual(
+            pool.connection_kwargs["health_check_interval"],
+            10,
+            msg="Wrong health check interval",
+        )
+
+        utils.reset_redis_store()
+        self.assertIsNot(utils.get_redis_store(), store, msg="Store not reset")
+
+    def test_unreachable(self):
+        # Nothing listens on port 1
+        utils.get_redis_store().connection_pool.connection_kwargs["port"] = 1
+
+        self.assertEqual(
+            utils.read_redis_keys(["a", "b"]),
+            {"a": None, "b": None},
+            msg="Missing keys not None",
+        )
+        self.assertFalse(utils.set_redis_keys({"a": "1"}))
+
+        # Writes still reach the fallback store
+        self.assertEqual(
+            utils.update_redis_keys({"b": "2"}, ["a", "b"]), {"a": 1, "b": 2}
+        )
+        self.assertEqual(utils.read_redis_key("a"), 1)
+
+    def test_circuit_opens(self):
+        utils.get_redis_store().connection_pool.connection_kwargs["port"] = 1
+
+        with mock.patch.object(
+            utils, "get_redis_store", wraps=utils.get_redis_store
+        ) as get_redis_store:
+            for _ in range(10):
+                utils.set_redis_key("a", "1")
+
+        self.assertEqual(
+            get_redis_store.call_count,
+            utils.redis_breaker.failure_threshold,
+            msg="Redis called while the circuit is open",
+        )
+        self.assertEqual(utils.redis_breaker.state, "open")
+        self.assertEqual(utils.read_redis_key("a"), 1)
+
+    def test_mirrored_writes(self):
+        # Stands in for a healthy Redis
+        store = FallbackStore()
+
+        with mock.patch.object(utils, "get_redis_store", return_value=store):
+            utils.publish_session_data({"SessionTime": 1})
+            utils.set_redis_key("a", "1")
+
+        self.assertIsNotNone(store.streams.get("session_stream"))
+        self.assertEqual(
+            utils.fallback_store.get("session_data"),
+            '{"SessionTime": 1}',
+            msg="Latest frame not mirrored",
+        )
+        self.assertEqual(utils.fallback_store.streams, {}, msg="History mirrored")
+        self.assertIsNone(utils.fallback_store.get("a"), msg="Unlisted key mirrored")
+
+    def test_session_info_stored_once(self):
+        store = FallbackStore()
+        driver_info = {"DriverCarRedLine": 8000}
+
+        with mock.patch.object(utils, "get_redis_store", return_value=store):
+            with mock.patch.object(store, "set", wraps=store.set) as set_key:
+                for tick in range(3):
+                    utils.publish_session_data(
+                        {"SessionTick": tick, "DriverInfo": driver_info}
+                    )
+
+            frames = utils.get_frames()
+
+        entries = list(store.streams["session_stream"])
+        self.assertEqual(json.loads(entries[-1][1]["data"]), {"SessionTick": 2})
+        self.assertEqual(
+            json.loads(store.get("session_data")),
+            {"SessionTick": 2, "DriverInfo": driver_info},
+        )
+
+        info_writes = [
+            call for call in set_key.call_args_list if call.args[0] == "session_info"
+        ]
+        self.assertEqual(
+            len(info_writes), 1, msg="Unchanged session info written again"
+        )
+
+        self.assertEqual(
+            [frame.data for frame in frames[-2:]],
+            [
+                {"SessionTick": 1, "DriverInfo": driver_info},
+                {"SessionTick": 2, "DriverInfo": driver_info},
+            ],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -98,6 +98,21 @@ class TestRpmGauge(unittest.TestCase):
             msg="Wrong end color",
         )
 
+    def test_to_dmx(self):
+        self.rpm_strip.set_rpm(10000)
+        data = self.rpm_strip.to_dmx()
+
+        self.assertEqual(len(data), 150, msg="DMX data should cover the strip")
+        self.assertEqual(bytes(data[:3]), bytes([0, 128, 0]), msg="Wrong start color")
+        self.assertEqual(
+            bytes(data[75:]), bytes(75), msg="LEDs above the RPM should be off"
+        )
+
+        self.rpm_strip.set_rpm(0)
+        self.assertEqual(
+            bytes(self.rpm_strip.to_dmx()), bytes(150), msg="Should be dark at 0 RPM"
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,154 @@
+import unittest
+
+from display.rpmpredictor import RpmPredictor
+
+
+class FakeClock:
+    """
+    Manually advanced clock standing in for time.monotonic
+    """
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestRpmPredictor(unittest.TestCase):
+    """
+    Unit tests for RPM interpolation/prediction. Telemetry is replayed as a
+    60 Hz rev sweep and sampled by a display running at its own framerate,
+    as the iRacing worker does.
+    """
+
+    telemetry_rate = 60
+    rpm_per_second = 6000  # Sweep from 2000 to 8000 RPM in one second
+
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def true_rpm(self, t):
+        return 2000 + self.rpm_per_second * t
+
+    def replay(self, predictor, framerate, duration=1.0):
+        """
+        Replay the sweep into a predictor and return (shown, true) RPM pairs
+        for every display frame
+        """
+        frames = []
+
+        for frame in range(int(duration * framerate)):
+            self.clock.now = frame / framerate
+
+            # Latest telemetry sample available at this time
+            sample = int(self.clock.now * self.telemetry_rate)
+            sample_time = sample / self.telemetry_rate
+            predictor.add_sample(self.true_rpm(sample_time), sample_time)
+
+            frames.append((predictor.predict(), self.true_rpm(self.clock.now)))
+
+        # Skip warm-up frames before two samples have arrived
+        return frames[framerate // 10 :]
+
+    def perceived_latency(self, frames):
+        """
+        Mean display latency in seconds, measured as how far behind the
+        true RPM the displayed RPM is on the sweep
+        """
+        lag = [(true - shown) / self.rpm_per_second for shown, true in frames]
+        return sum(lag) / len(lag)
+
+    def test_invalid_mode(self):
+        with self.assertRaises(ValueError, msg="Expected ValueError for bad mode"):
+            RpmPredictor("nope")
+
+    def test_no_samples(self):
+        self.assertEqual(
+            RpmPredictor("predict").predict(), 0, msg="RPM should be 0 without data"
+        )
+
+    def test_duplicate_samples_ignored(self):
+        predictor = RpmPredictor(clock=self.clock)
+
+        self.assertTrue(predictor.add_sample(3000, 1.0))
+        self.assertFalse(
+            predictor.add_sample(3000, 1.0), msg="Repeated sample should be ignored"
+        )
+
+    def test_time_reversal_resets(self):
+        predictor = RpmPredictor("predict", clock=self.clock)
+        predictor.add_sample(3000, 1.0)
+        predictor.add_sample(4000, 1.1)
+        predictor.add_sample(1000, 0.0)
+
+        self.assertIsNone(
+            predictor.previous, msg="History should reset when time goes backwards"
+        )
+        self.assertEqual(predictor.predict(), 1000)
+
+    def test_off_latency(self):
+        frames = self.replay(RpmPredictor("off", clock=self.clock), 50)
+
+        self.assertGreater(
+            self.perceived_latency(frames),
+            0.005,
+            msg="Raw samples should lag behind the true RPM",
+        )
+
+    def test_predict_latency(self):
+        frames = self.replay(RpmPredictor("predict", clock=self.clock), 50)
+
+        self.assertAlmostEqual(
+            self.perceived_latency(frames),
+            0,
+            delta=0.001,
+            msg="Prediction should hide sample latency on a steady sweep",
+        )
+
+    def test_predict_display_latency(self):
+        predictor = RpmPredictor("predict", display_latency=0.02, clock=self.clock)
+        frames = self.replay(predictor, 50)
+
+        self.assertAlmostEqual(
+            self.perceived_latency(frames),
+            -0.02,
+            delta=0.001,
+            msg="Prediction should lead by the configured display latency",
+        )
+
+    def test_predict_horizon_capped(self):
+        predictor = RpmPredictor("predict", max_extrapolation=0.1, clock=self.clock)
+        predictor.add_sample(3000, 0.0)
+        predictor.add_sample(4000, 0.1)
+
+        # Telemetry stalls for a full second
+        self.clock.now = 1.0
+
+        self.assertEqual(
+            predictor.predict(), 5000, msg="Extrapolation should stop at the cap"
+        )
+
+    def test_interpolate_latency(self):
+        frames = self.replay(RpmPredictor("interpolate", clock=self.clock), 144)
+
+        self.assertAlmostEqual(
+            self.perceived_latency(frames),
+            1 / self.telemetry_rate,
+            delta=0.002,
+            msg="Interpolation should add one sample period of latency",
+        )
+
+    def test_interpolate_fills_high_framerate(self):
+        off = self.replay(RpmPredictor("off", clock=self.clock), 144)
+        interpolated = self.replay(RpmPredictor("interpolate", clock=self.clock), 144)
+
+        self.assertGreater(
+            len(set(shown for shown, _ in interpolated)),
+            1.5 * len(set(shown for shown, _ in off)),
+            msg="Interpolation should produce in-between values above 60 fps",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+from unittest import mock
+import unittest
+import json
+
+from api import utils
+from api.fallbackstore import FallbackStore
+from api.frames import SessionInfoEncoder
+from recorder.session_recorder import IracingSessionRecorder
+
+
+class TestSessionRecorder(unittest.TestCase):
+    """
+    Unit tests for the session recorder
+    """
+
+    def setUp(self):
+        utils.redis_breaker.reset()
+        utils.fallback_store.clear()
+
+        encoder = mock.patch.object(utils, "session_info_encoder", SessionInfoEncoder())
+        encoder.start()
+        self.addCleanup(encoder.stop)
+
+    def test_records_stored_text(self):
+        # Stands in for a healthy Redis
+        store = FallbackStore()
+        recorder = IracingSessionRecorder()
+        record = recorder._IracingSessionRecorder__record_new_frames
+        key = f"session-recorder-{recorder.session_id}"
+        driver_info = {"DriverCarRedLine": 8000}
+
+        with mock.patch.object(utils, "get_redis_store", return_value=store):
+            with mock.patch.object(store, "rpush", wraps=store.rpush) as rpush:
+                utils.publish_session_data(
+                    {"SessionTime": 1.0, "DriverInfo": driver_info}
+                )
+                record()
+
+                # Two frames published between polls
+                for tick in range(2, 4):
+                    utils.publish_session_data(
+                        {"SessionTime": float(tick), "DriverInfo": driver_info}
+                    )
+
+                with mock.patch("api.frames.json.loads") as loads:
+                    record()
+                    record()
+
+        loads.assert_not_called()
+        self.assertEqual(recorder.cursor.frames, 3)
+        self.assertEqual(
+            rpush.call_count, 2, msg="Expected one write per new frame batch"
+        )
+        self.assertEqual(rpush.call_args.args[0], key)
+        self.assertEqual(
+            [json.loads(text) for text in rpush.call_args.args[1:]],
+            [
+                {"SessionTime": 2.0, "DriverInfo": driver_info},
+                {"SessionTime": 3.0, "DriverInfo": driver_info},
+            ],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
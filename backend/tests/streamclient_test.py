@@ -0,0 +1,104 @@
+import unittest
+import asyncio
+
+from api.streamclient import StreamClient, StreamConsumer
+from api.frames import Frame
+
+
+class FakeWebSocket:
+    """
+    Records the messages sent to it, waiting on an event before each send
+    """
+
+    def __init__(self):
+        self.messages = []
+        self.closed = False
+        self.unblocked = asyncio.Event()
+        self.unblocked.set()
+
+    async def send_text(self, message):
+        await self.unblocked.wait()
+        self.messages.append(message)
+
+    async def send_bytes(self, message):
+        await self.send_text(message)
+
+    async def close(self):
+        self.closed = True
+
+
+class TestStreamClient(unittest.IsolatedAsyncioTestCase):
+    """
+    Unit tests for the per-client stream sender
+    """
+
+    async def test_latest_wins(self):
+        websocket = FakeWebSocket()
+        client = StreamClient(websocket, max_lag=1)
+
+        client.offer("1")
+        await asyncio.sleep(0.01)
+
+        # Block sending, then offer frames faster than they can be sent
+        websocket.unblocked.clear()
+        for message in ["2", "3", "4", "5"]:
+            client.offer(message)
+            await asyncio.sleep(0)
+
+        self.assertTrue(client.busy)
+        self.assertGreater(client.lag, 0)
+
+        websocket.unblocked.set()
+        await asyncio.sleep(0.01)
+
+        # The frame being sent when blocked, then only the latest
+        self.assertEqual(websocket.messages, ["1", "2", "5"])
+        self.assertEqual(client.dropped, 2)
+        self.assertEqual(client.sent, 3)
+        self.assertEqual(client.lag, 0)
+
+        client.close()
+        await client.wait_closed()
+        self.assertTrue(websocket.closed)
+
+    async def test_lagging(self):
+        websocket = FakeWebSocket()
+        closed = []
+        client = StreamClient(websocket, max_lag=0.05, on_close=closed.append)
+
+        websocket.unblocked.clear()
+        client.offer("1")
+        await asyncio.sleep(0.1)
+
+        self.assertEqual(closed, [client], msg="Lagging client not closed")
+        self.assertTrue(client.lagging)
+        self.assertTrue(websocket.closed)
+
+        # Closed clients are not sent anything else
+        client.offer("2")
+        self.assertFalse(client.busy)
+
+    async def test_consumer(self):
+        closed = []
+
+        with StreamConsumer(max_lag=0.05, on_close=closed.append) as consumer:
+            self.assertTrue(consumer.advance(Frame(1, {})))
+            self.assertFalse(consumer.advance(Frame(1, {})), msg="Frame sent twice")
+            self.assertTrue(consumer.advance(Frame(4, {})))
+            self.assertEqual(consumer.dropped, 2)
+
+            consumer.begin_send()
+            self.assertTrue(consumer.end_send())
+
+            consumer.begin_send()
+            await asyncio.sleep(0.1)
+            self.assertGreater(consumer.lag, 0.05)
+            self.assertFalse(consumer.end_send(), msg="Slow send not caught")
+
+        self.assertTrue(consumer.lagging)
+        self.assertEqual(consumer.stats()["sent"], 2)
+        self.assertEqual(closed, [consumer], msg="Consumer not closed")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import unittest
+
+from benchmarks.ledoutput import run_benchmark, synthetic_telemetry, summarize
+from e131.virtualreceiver import VirtualReceiver, ReceivedFrame
+from e131.sender import E131Sender
+from e131.wled import Wled
+from e131.ddp import Ddp
+
+
+class TestVirtualReceiver(unittest.TestCase):
+    """
+    Unit tests for the virtual WLED receiver and LED output benchmark
+    """
+
+    def setUp(self):
+        self.receiver = None
+        self.controller = None
+
+    def listen(self, pixel_count, protocol="e131"):
+        self.receiver = VirtualReceiver(pixel_count, protocol)
+        self.receiver.start()
+
+        return self.receiver
+
+    def test_e131_frame(self):
+        receiver = self.listen(200)
+        self.controller = Wled.connect("127.0.0.1", 200, port=receiver.port)
+        data = bytes(range(200)) * 3
+
+        self.controller.update_dmx(data)
+
+        self.assertTrue(receiver.wait_for_frames(1), msg="No frame received")
+        self.assertEqual(receiver.frames[0].data, data, msg="Wrong pixels received")
+        self.assertEqual(receiver.frames[0].packets, 2, msg="Expected 2 universes")
+
+    def test_e131_sync_holds_frame(self):
+        receiver = self.listen(10)
+        self.controller = Wled.connect(
+            "127.0.0.1", 10, port=receiver.port, sync_universe=9
+        )
+
+        self.controller.update_dmx(bytes([1] * 30))
+        self.assertFalse(
+            receiver.wait_for_frames(1, timeout=0.1),
+            msg="Frame should be held until the sync packet",
+        )
+
+        sync = E131Sender(sync_universe=9)
+        sync.port = receiver.port
+        sync.start()
+        sync.sync(["127.0.0.1"])
+        sync.stop()
+
+        self.assertTrue(receiver.wait_for_frames(1), msg="Frame not shown on sync")
+        self.assertEqual(receiver.frames[0].data, bytes([1] * 30))
+
+    def test_ddp_frame(self):
+        receiver = self.listen(1000, "ddp")
+        self.controller = Ddp.connect("127.0.0.1", 1000, port=receiver.port)
+        data = bytes(range(250)) * 12
+
+        self.controller.update_dmx(data)
+
+        self.assertTrue(receiver.wait_for_frames(1), msg="No frame received")
+        self.assertEqual(receiver.frames[0].data, data, msg="Wrong pixels received")
+        self.assertEqual(receiver.frames[0].packets, 3, msg="Expected 3 packets")
+
+    def test_benchmark(self):
+        stats = run_benchmark(
+            synthetic_telemetry(), "ddp", led_count=50, framerate=50, duration=0.3
+        )
+
+        self.assertEqual(stats["frames_lost"], 0, msg="Frames lost on loopback")
+        self.assertGreater(stats["fps"], 0, msg="No framerate measured")
+        self.assertGreater(stats["latency_mean_ms"], 0, msg="No latency measured")
+
+    def test_summary_matches_frames(self):
+        render_times = [0.0, 0.1, 0.2, 0.3]
+
+        # Frame 1 was lost, and the others took 5ms to arrive
+        frames = [
+            ReceivedFrame(rendered + 0.005, index.to_bytes(3, "big"), 2)
+            for index, rendered in enumerate(render_times)
+            if index != 1
+        ]
+        stats = summarize(render_times, frames, 0.4, 10)
+
+        self.assertEqual(stats["frames_lost"], 1)
+        self.assertAlmostEqual(stats["latency_max_ms"], 5, msg="Frames mismatched")
+        self.assertEqual(stats["packets_per_frame"], 2)
+
+    def tearDown(self):
+        if self.controller:
+            self.controller.stop()
+        if self.receiver:
+            self.receiver.stop()
+
+        return super().tearDown()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,7 @@
 import unittest
 from colour import Color
 
+from e131.virtualreceiver import VirtualReceiver
 from e131.exceptions import WledMaxPixelsExceeded
 from e131.wled import Wled
 
@@ -78,6 +79,23 @@ class TestWled(unittest.TestCase):
             len(all_universes), 512 * 3, msg="Unexpected DMX data buffer size"
         )
 
+    def test_bytes_on_wire(self):
+        pixel_count = 342
+        receiver = VirtualReceiver(pixel_count)
+        receiver.start()
+
+        self.wled = Wled.connect("127.0.0.1", pixel_count, port=receiver.port)
+        gradient = list(Color.range_to(Color("red"), Color("blue"), pixel_count))
+        self.wled.update(gradient)
+
+        receiver.wait_for_frames(1)
+        receiver.stop()
+        pixels = receiver.frames[0].data
+
+        self.assertEqual(len(pixels), pixel_count * 3, msg="Wrong frame size")
+        self.assertEqual(pixels[:3], bytes([255, 0, 0]), msg="Wrong first pixel")
+        self.assertEqual(pixels[-3:], bytes([0, 0, 255]), msg="Wrong last pixel")
+
     def test_disconnect(self):
         pixel_count = 170
         self.wled = Wled.connect("127.0.0.1", pixel_count)
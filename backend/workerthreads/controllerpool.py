@@ -0,0 +1,615 @@
+from concurrent.futures import ThreadPoolExecutor, wait
+from collections import namedtuple
+from time import monotonic
+import threading
+import logging
+
+from display.colortheme import ColorTheme
+from display.matrix import MatrixDisplay
+from display.rpmgauge import RpmGauge
+from database.database import get_db
+from database import crud
+from e131.sender import E131Sender
+from e131.wled import Wled
+from e131.ddp import Ddp
+
+
+# A controllers table row as loaded in the background: the values its
+# connection is built from, the driver's settings for it and, unless the
+# current fixture can be kept as is, a prebuilt display
+ControllerPlan = namedtuple(
+    "ControllerPlan",
+    [
+        "id",
+        "name",
+        "signature",
+        "theme",
+        "auto_power",
+        "idle_effect_id",
+        "display",
+    ],
+)
+
+
+class LightFixture:
+    """
+    A connected light controller and the display rendered to it
+    """
+
+    def __init__(
+        self, controller_id, name, controller, display, theme_key=None, signature=None
+    ):
+        self.controller_id = controller_id
+        self.name = name
+        self.controller = controller
+        self.display = display
+        self.theme_key = theme_key  # Theme the display was built with
+        self.signature = signature  # Row values the connection was built from
+
+        # The active driver's settings for this controller. With auto
+        # power, the lights are switched off while the car is off track.
+        self.auto_power = False
+        self.idle_effect_id = None
+
+        self.pending = None  # Future for an update still in flight
+        self.failed_at = None
+
+    def render(self, idle_elapsed=None):
+        """
+        Render the display to a copy of its DMX data, which can be sent from
+        another thread while the display changes. With idle_elapsed, get
+        the idle effect frame showing after that many seconds instead, or a
+        blank frame with auto power.
+        """
+        if idle_elapsed is None:
+            return bytes(self.display.to_dmx())
+
+        if self.auto_power:
+            return bytes(self.display.led_count * 3)
+
+        return bytes(self.display.to_idle_dmx(idle_elapsed))
+
+    def send(self, data):
+        self.controller.update_dmx(data)
+
+    def stop(self):
+        """
+        Stop the controller once any send in flight has finished
+        """
+        if self.pending:
+            wait([self.pending])
+
+        self.controller.stop()
+
+
+class ControllerPool:
+    """
+    Drives every light controller in the controllers table. Each frame is
+    rendered on the calling thread, then sent to all controllers in
+    parallel within one frame budget. A controller that fails or falls
+    behind is skipped without holding up the others, and is reconnected
+    later. Since only sends run in parallel, displays can be changed and
+    swapped between frames while a send is still in flight.
+
+    The table is re-read every refresh_period seconds, so controllers added
+    or removed through the API are picked up without a restart. While the
+    table is empty, the fallback fixture (configured in config.ini) is used.
+
+    The table, the active driver's settings and the displays they need
+    (palettes included) are loaded on a background thread. The render loop
+    only swaps the result in on its next refresh, so a driver change never
+    puts database access or palette building on the hot path.
+
+    With a sync universe, E1.31 controllers hold each frame until a single
+    sync packet is sent after all of them have their data, so every strip
+    changes at the same moment. With multicast, that sync (and all data) is
+    one send per universe, however many receivers listen to it.
+    """
+
+    def __init__(
+        self,
+        default_theme,
+        framerate,
+        fallback=None,
+        sender="native",
+        refresh_period=5,
+        retry_period=5,
+        multicast=False,
+        sync_universe=0,
+    ):
+        self.default_theme = default_theme
+        self.frame_budget = 1 / framerate
+        self.fallback = fallback
+        self.sender = sender
+        self.multicast = multicast
+        self.sync_universe = sync_universe
+        self.sync_sender = None
+        self.sync_failing = False
+        self.refresh_period = refresh_period
+        self.retry_period = retry_period
+
+        self.fixtures = {}  # Controller ID -> LightFixture
+        self.unconnectable = {}  # Controller ID -> signature that failed
+        self.idle_since = None  # When the idle effects started
+        self.driver_id = None
+        self.last_refresh = None
+        self.is_connected = True
+
+        # Plans loaded in the background, applied on the next refresh
+        self.loaded = None
+        self.lock = threading.Lock()
+
+        self.redline = None
+        self.idle_rpm = None
+        self.gear = None
+        self.flags = 0
+        self.shift_points = None
+        self.pit_limiter = False
+
+        self.executor = ThreadPoolExecutor(thread_name_prefix="LightController")
+        self.loader = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="LightControllerLoader"
+        )
+        self.log = logging.getLogger(__name__)
+
+    def active_fixtures(self):
+        """
+        Get the fixtures to drive this frame
+        """
+        if self.fixtures:
+            return list(self.fixtures.values())
+
+        return [self.fallback] if self.fallback else []
+
+    def refresh(self, driver_id=None, force=False):
+        """
+        Apply controllers loaded in the background, then start loading them
+        again if the driver changed or the refresh period has passed. Called
+        every frame - never waits on the database.
+        """
+        with self.lock:
+            loaded, self.loaded = self.loaded, None
+
+        if loaded is not None:
+            self.apply(loaded)
+
+        now = monotonic()
+
+        if (
+            not force
+            and driver_id == self.driver_id
+            and self.last_refresh is not None
+            and now - self.last_refresh < self.refresh_period
+        ):
+            return
+
+        self.preload(driver_id)
+
+    def preload(self, driver_id=None):
+        """
+        Load the controllers table with a driver's settings, and prebuild
+        any displays they need, in the background. Safe to call from any
+        thread - the API calls it as soon as the active driver changes.
+        """
+        self.driver_id = driver_id
+        self.last_refresh = monotonic()
+
+        return self.loader.submit(self.__load, driver_id)
+
+    def plan(self, rows, driver_id=None):
+        """
+        Work out what each controller row needs, building displays for any
+        that are new or changed
+        """
+        fixtures = self.fixtures
+        return [self.__plan(row, driver_id, fixtures.get(row.id)) for row in rows]
+
+    def sync(self, rows):
+        """
+        Add, rebuild or remove fixtures to match the given controller rows
+        """
+        self.apply(self.plan(rows, self.driver_id))
+
+    def apply(self, plans):
+        """
+        Swap in fixtures for a set of plans. Fixtures whose connection is
+        unchanged are kept, and a new theme is a display reference swap.
+        """
+        now = monotonic()
+        fixtures = {}
+        retired = []
+
+        for plan in plans:
+            fixture = self.fixtures.get(plan.id)
+
+            if fixture and fixture.signature == plan.signature:
+                if fixture.theme_key != plan.theme.key:
+                    fixture.display = self.__plan_display(plan)
+                    fixture.theme_key = plan.theme.key
+            else:
+                if fixture:
+                    self.log.info(
+                        f"Light controller {plan.name} changed - reconnecting"
+                    )
+                    retired.append(fixture)
+
+                fixture = self.__connect(plan)
+
+                if not fixture:
+                    continue
+
+            fixture.auto_power = plan.auto_power
+            fixture.idle_effect_id = plan.idle_effect_id
+            fixture.display.set_idle_effect(plan.idle_effect_id)
+            fixtures[plan.id] = fixture
+
+        for controller_id in set(self.fixtures) - set(fixtures):
+            self.log.info(
+                f"Removing light controller {self.fixtures[controller_id].name}"
+            )
+            retired.append(self.fixtures[controller_id])
+
+        self.fixtures = fixtures
+
+        # Forget failures of rows that were removed
+        planned = {plan.id for plan in plans}
+        for controller_id in set(self.unconnectable) - planned:
+            del self.unconnectable[controller_id]
+
+        for fixture in retired:
+            fixture.stop()
+
+        # The fallback only runs while the table is empty
+        if self.fixtures and self.fallback and self.fallback.controller.is_connected:
+            self.log.info("Light controllers configured - stopping fallback")
+            self.fallback.stop()
+
+        # Retry controllers that failed or were disconnected
+        if self.is_connected:
+            for fixture in self.active_fixtures():
+                if not fixture.controller.is_connected:
+                    self.__retry(fixture, now)
+
+    def set_redline(self, redline):
+        self.redline = redline
+
+        for fixture in self.active_fixtures():
+            fixture.display.set_redline(redline)
+
+    def set_idle_rpm(self, idle_rpm):
+        self.idle_rpm = idle_rpm
+
+        for fixture in self.active_fixtures():
+            fixture.display.set_idle_rpm(idle_rpm)
+
+    def set_shift_points(self, shift_points):
+        self.shift_points = shift_points
+
+        for fixture in self.active_fixtures():
+            fixture.display.set_shift_points(shift_points)
+
+    def set_pit_limiter(self, active):
+        self.pit_limiter = active
+
+        for fixture in self.active_fixtures():
+            fixture.display.set_pit_limiter(active)
+
+    def set_rpm(self, rpm):
+        for fixture in self.active_fixtures():
+            fixture.display.set_rpm(rpm)
+
+    def set_gear(self, gear):
+        self.gear = gear
+
+        for fixture in self.active_fixtures():
+            fixture.display.set_gear(gear)
+
+    def set_flags(self, flags):
+        self.flags = flags
+
+        for fixture in self.active_fixtures():
+            fixture.display.set_flags(flags)
+
+    def update(self, idle=False):
+        """
+        Render and send the current frame to every controller in parallel.
+        When idle, each controller shows its idle effect instead, or is
+        blanked if the driver turned on auto power for it.
+        """
+        futures = {}
+
+        if not idle:
+            self.idle_since = None
+        elif self.idle_since is None:
+            self.idle_since = monotonic()
+
+        for fixture in self.active_fixtures():
+            if not fixture.controller.is_connected:
+                continue
+
+            if fixture.pending:
+                if not fixture.pending.done():
+                    # Still sending the last frame - skip rather than queue up
+                    continue
+
+                # The last send missed its frame budget, so it has not been
+                # checked yet
+                exception = fixture.pending.exception()
+                fixture.pending = None
+
+                if exception:
+                    self.__fail(fixture, exception)
+                    continue
+
+            if idle:
+                data = fixture.render(monotonic() - self.idle_since)
+            else:
+                data = fixture.render()
+
+            fixture.pending = self.executor.submit(fixture.send, data)
+            futures[fixture.pending] = fixture
+
+        done, not_done = wait(futures, timeout=self.frame_budget)
+        synced = []
+
+        for future in done:
+            fixture = futures[future]
+            fixture.pending = None
+
+            if future.exception():
+                self.__fail(fixture, future.exception())
+            else:
+                synced.append(fixture)
+
+        for future in not_done:
+            self.log.debug(f"{futures[future].name} missed the frame budget")
+
+        if self.sync_universe:
+            self.__sync(synced)
+
+    def stop(self):
+        """
+        Stop all controllers (until reconnect is called)
+        """
+        for fixture in self.active_fixtures():
+            if fixture.controller.is_connected:
+                fixture.stop()
+
+        self.is_connected = False
+
+    def reconnect(self):
+        """
+        Reconnect all controllers
+        """
+        now = monotonic()
+
+        for fixture in self.active_fixtures():
+            if not fixture.controller.is_connected:
+                self.__retry(fixture, now, force=True)
+
+        self.is_connected = True
+
+    def shutdown(self):
+        """
+        Stop all controllers and the sender threads
+        """
+        self.stop()
+        self.executor.shutdown(wait=False)
+        self.loader.shutdown(wait=False)
+
+        if self.sync_sender:
+            self.sync_sender.stop()
+
+    def __load(self, driver_id):
+        """
+        Load and plan the controllers table (on the loader thread)
+        """
+        db = next(get_db())
+
+        try:
+            plans = self.plan(crud.get_light_controllers(db), driver_id)
+        except Exception:
+            # Keep driving the current fixtures
+            self.log.exception("Unable to load light controllers")
+            return
+        finally:
+            db.close()
+
+        with self.lock:
+            self.loaded = plans
+
+    def __plan(self, row, driver_id, fixture=None):
+        """
+        Plan the fixture for a controllers table row and the driver's
+        settings for it
+        """
+        led_count = row.ledCount or 120
+        transport = row.transport or "e131"
+        layout = (row.matrixWidth, row.matrixLayout or "serpentine")
+        signature = (row.ipAddress, row.universe or 1, led_count, transport, layout)
+
+        settings = self.__get_settings(row, driver_id)
+        theme = self.default_theme
+
+        if settings and settings.colorTheme:
+            theme = ColorTheme.from_model(settings.colorTheme)
+
+        display = None
+
+        idle_effect_id = settings.idleEffectId if settings else None
+
+        if not (
+            fixture
+            and fixture.signature == signature
+            and fixture.theme_key == theme.key
+        ):
+            display = self.__build_display(led_count, theme, layout)
+            display.set_idle_effect(idle_effect_id)
+
+        return ControllerPlan(
+            row.id,
+            row.name,
+            signature,
+            theme,
+            bool(settings and settings.autoPower),
+            idle_effect_id,
+            display,
+        )
+
+    def __connect(self, plan):
+        """
+        Connect to the controller for a plan
+        """
+        ip, universe, led_count, transport, _ = plan.signature
+
+        # A row that failed is retried on every refresh, but only logged
+        # again once it changes
+        retrying = self.unconnectable.get(plan.id) == plan.signature
+
+        if not retrying:
+            self.log.info(f"Connecting to light controller {plan.name}")
+
+        try:
+            if transport == "ddp":
+                controller = Ddp.connect(ip, led_count)
+            else:
+                controller = Wled.connect(
+                    ip,
+                    led_count,
+                    self.sender,
+                    universe,
+                    multicast=self.multicast,
+                    sync_universe=self.sync_universe,
+                )
+        except Exception as e:
+            if retrying:
+                self.log.debug(f"Still unable to connect to {plan.name}: {e}")
+            else:
+                self.log.exception(f"Unable to connect to light controller {plan.name}")
+                self.unconnectable[plan.id] = plan.signature
+
+            return None
+
+        self.unconnectable.pop(plan.id, None)
+
+        if not self.is_connected:
+            controller.stop()
+
+        return LightFixture(
+            plan.id,
+            plan.name,
+            controller,
+            self.__plan_display(plan),
+            plan.theme.key,
+            plan.signature,
+        )
+
+    def __plan_display(self, plan):
+        """
+        Get the display prebuilt for a plan, or build it now if the plan was
+        made against a fixture that has since changed
+        """
+        if plan.display is None:
+            _, _, led_count, _, layout = plan.signature
+            return self.__build_display(led_count, plan.theme, layout)
+
+        return self.__prepare(plan.display)
+
+    def __get_settings(self, row, driver_id):
+        """
+        Get the driver's settings for a controller, if any
+        """
+        for settings in row.lightControllerSettings:
+            if settings.driverId == driver_id:
+                return settings
+
+        return None
+
+    def __build_display(self, led_count, theme, layout=(None, "serpentine")):
+        """
+        Build an RPM gauge for a strip, or a gear/flag panel for a matrix
+        """
+        width, matrix_layout = layout
+
+        if width:
+            display = MatrixDisplay(
+                width, max(led_count // width, 1), theme, matrix_layout
+            )
+        else:
+            display = RpmGauge(led_count, theme)
+
+        return self.__prepare(display)
+
+    def __prepare(self, display):
+        """
+        Bring a display up to date with the current car and session state
+        """
+        if self.redline is not None:
+            display.set_redline(self.redline)
+        if self.idle_rpm is not None:
+            display.set_idle_rpm(self.idle_rpm)
+
+        display.set_shift_points(self.shift_points)
+        display.set_pit_limiter(self.pit_limiter)
+        display.set_gear(self.gear)
+        display.set_flags(self.flags)
+
+        return display
+
+    def __sync(self, fixtures):
+        """
+        Send one sync packet to latch the frame on all E1.31 controllers
+        """
+        destinations = {
+            fixture.controller.ip
+            for fixture in fixtures
+            if getattr(fixture.controller, "sync_universe", 0)
+        }
+
+        if not destinations:
+            return
+
+        try:
+            if not self.sync_sender:
+                sync_sender = E131Sender(sync_universe=self.sync_universe)
+                sync_sender.start()
+                self.sync_sender = sync_sender
+
+            self.sync_sender.sync(None if self.multicast else sorted(destinations))
+        except OSError as e:
+            # Like a failing controller, a network error must not stop the
+            # frame. Log it once, until a sync gets through again.
+            if not self.sync_failing:
+                self.log.error(f"Unable to send the E1.31 sync: {e}")
+                self.sync_failing = True
+        else:
+            if self.sync_failing:
+                self.log.info("Sending the E1.31 sync again")
+                self.sync_failing = False
+
+    def __fail(self, fixture, exception):
+        """
+        Take a failing controller offline until it is retried
+        """
+        self.log.error(f"Light controller {fixture.name} failed: {exception}")
+        fixture.failed_at = monotonic()
+
+        try:
+            fixture.controller.stop()
+        except Exception:
+            fixture.controller.is_connected = False
+
+    def __retry(self, fixture, now, force=False):
+        if (
+            not force
+            and fixture.failed_at
+            and now - fixture.failed_at < self.retry_period
+        ):
+            return
+
+        try:
+            fixture.controller.reconnect()
+            fixture.failed_at = None
+        except Exception:
+            self.log.exception(f"Unable to reconnect light controller {fixture.name}")
+            fixture.failed_at = now
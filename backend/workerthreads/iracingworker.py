@@ -1,32 +1,33 @@
 from redis.exceptions import ConnectionError
-from time import sleep
+from time import sleep, monotonic
 import threading
 import logging
 import math
-import json
 
-from api.utils import set_redis_key, get_active_driver_from_cache
+from api.utils import set_session_best_lap, publish_session_data, get_active_driver_from_cache
 from database.schemas import DriverUpdate, LapTimeCreate
 from database.database import get_db
-from database import crud, schemas
+from display.idleeffects import IDLE_FRAMERATE
+from display.rpmpredictor import RpmPredictor
+from database import crud
 
 
 class IracingWorker(threading.Thread):
     """
     Background worker to collect and log iRacing data, and send updates
-    to WLED light controllers in response to changes
+    to all WLED light controllers in response to changes
     """
 
-    def __init__(self, data_stream, controller, rpm_strip, framerate):
+    def __init__(self, data_stream, controllers, framerate, rpm_predictor=None):
         threading.Thread.__init__(self)
         self.threadID = 1
         self.name = "iRacing Worker Thread"
         self.active = True
 
         self.data_stream = data_stream
-        self.controller = controller
-        self.rpm_strip = rpm_strip
+        self.controllers = controllers
         self.framerate = framerate
+        self.rpm_predictor = rpm_predictor or RpmPredictor()
 
         self.db = None
         self.active_driver = None
@@ -34,6 +35,8 @@ class IracingWorker(threading.Thread):
         self.track_name = None
         self.best_lap_time = 0
         self.session_id = None
+        self.is_idle = False
+        self.last_restart = 0
 
         self.log = logging.getLogger(__name__)
 
@@ -58,11 +61,11 @@ class IracingWorker(threading.Thread):
                 self.latest = self.data_stream.latest()
                 latest_raw = self.data_stream.latest(raw=True)
 
-                # Update Redis keys
-                set_redis_key("session_data", json.dumps(latest_raw))
-
-                # Check for updates from the API
-                updated_driver = get_active_driver_from_cache()
+                # Publish the data and check for updates from the API
+                cached = publish_session_data(latest_raw, ["active_driver"])
+                updated_driver = get_active_driver_from_cache(
+                    (cached or {}).get("active_driver")
+                )
 
                 if updated_driver and updated_driver != self.active_driver:
                     self.active_driver = updated_driver
@@ -70,6 +73,11 @@ class IracingWorker(threading.Thread):
 
                     self.log.info("Setting active driver to " + self.active_driver.name)
 
+                # Pick up light controllers added or removed via the API
+                self.controllers.refresh(
+                    self.active_driver.id if self.active_driver else None
+                )
+
                 if not self.data_stream.is_active or not self.latest["is_on_track"]:
                     # Update the driver's track time
                     if (
@@ -87,36 +95,67 @@ class IracingWorker(threading.Thread):
                             ),
                         )
 
-                    # Stop the stream and wait
-                    if self.controller.is_connected:
-                        self.controller.stop()
-                        self.log.info("iRacing data lost - waiting")
+                    self.rpm_predictor.reset()
+
+                    if not self.is_idle:
+                        self.is_idle = True
+                        self.log.info("Off track - showing idle effects")
+
+                    # Keep the controllers connected and show idle effects
+                    if not self.controllers.is_connected:
+                        self.controllers.reconnect()
+
+                    self.controllers.update(idle=True)
+
+                    # Wait for iRacing (or a new car) at most once a second
+                    if monotonic() - self.last_restart >= 1:
+                        self.last_restart = monotonic()
 
-                    self.data_stream.restart()
-                    sleep(1)
+                        if not self.data_stream.is_active:
+                            self.data_stream.restart()
+                        else:
+                            self.data_stream.get_startup_info()
+
+                    sleep(1 / IDLE_FRAMERATE)
 
                     continue
                 else:
+                    self.is_idle = False
+
                     # Re-establish connection
-                    if not self.controller.is_connected:
+                    if not self.controllers.is_connected:
                         self.log.info("Reconnecting")
-                        self.controller.reconnect()
+                        self.controllers.reconnect()
 
                 # Check for car swaps
-                if self.rpm_strip.redline != self.latest["redline"]:
-                    self.rpm_strip.set_redline(self.latest["redline"])
+                if self.controllers.redline != self.latest["redline"]:
+                    self.controllers.set_redline(self.latest["redline"])
                     self.log.debug(
                         "Setting redline to new value: " + str(self.latest["redline"])
                     )
-                if self.rpm_strip.idle_rpm != self.latest["idle_rpm"]:
-                    self.rpm_strip.set_idle_rpm(self.latest["idle_rpm"])
+                if self.controllers.idle_rpm != self.latest["idle_rpm"]:
+                    self.controllers.set_idle_rpm(self.latest["idle_rpm"])
                     self.log.debug(
                         "Setting idle RPM to new value: " + str(self.latest["idle_rpm"])
                     )
 
-                # Get the RPM and update the light controller
-                self.rpm_strip.set_rpm(self.latest["rpm"])
-                self.controller.update(self.rpm_strip.to_color_list())
+                if self.controllers.shift_points != self.latest["shift_points"]:
+                    self.controllers.set_shift_points(self.latest["shift_points"])
+                    self.log.debug(
+                        "Setting shift points to new values: "
+                        + str(self.latest["shift_points"])
+                    )
+
+                # Get the RPM (smoothed to the display time) and update all
+                # light controllers
+                self.rpm_predictor.add_sample(
+                    self.latest["rpm"], self.latest["session_time"]
+                )
+                self.controllers.set_rpm(self.rpm_predictor.predict())
+                self.controllers.set_gear(self.latest["gear"])
+                self.controllers.set_flags(self.latest["flags"])
+                self.controllers.set_pit_limiter(self.latest["pit_limiter"])
+                self.controllers.update()
 
                 # Check for a new session
                 session_id = self.latest["session_id"]
@@ -179,7 +218,4 @@ class IracingWorker(threading.Thread):
 
                 # Update Redis key for streaming
                 if new_laptime:
-                    set_redis_key(
-                        "session_best_lap",
-                        schemas.LapTime.from_orm(new_laptime).json()
-                    )
+                    set_session_best_lap(new_laptime)
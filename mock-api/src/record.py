@@ -1,12 +1,14 @@
 """
 Simple websocket client to record iRacing data via the SimRig API.
 Recorded data is saved to a JSON file, and can be loaded later to
-replay the session.
+replay the session. With --msgpack, frames are received in the binary
+MessagePack encoding, which is lighter on the server and network.
 """
 
 from os import path, getcwd
 import websocket
 import argparse
+import msgpack
 import atexit
 import ujson
 
@@ -36,7 +38,10 @@ def on_message(ws, message):
     if frame_count > 0 and frame_count % 900 == 0:
         print(f"Recorded {frame_count} frames ({frame_count*0.049} MB)")
 
-    iracing_data.append(ujson.loads(message))
+    if isinstance(message, bytes):
+        iracing_data.append(msgpack.unpackb(message))
+    else:
+        iracing_data.append(ujson.loads(message))
 
 
 def on_open(ws):
@@ -58,6 +63,9 @@ if __name__ == "__main__":
         "--host", default="localhost", help="hostname of iracing server"
     )
     parser.add_argument("--port", default=8000, help="port of iracing server")
+    parser.add_argument(
+        "--msgpack", action="store_true", help="receive binary MessagePack frames"
+    )
     args = parser.parse_args()
 
     current_path = path.abspath(getcwd())
@@ -70,6 +78,7 @@ if __name__ == "__main__":
         on_message=on_message,
         on_error=on_error,
         on_close=on_close,
+        subprotocols=["msgpack"] if args.msgpack else None,
     )
 
     atexit.register(save_data)
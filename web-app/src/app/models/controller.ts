@@ -9,6 +9,10 @@ export interface Controller {
   name: string;
   ipAddress: string;
   universe: number;
+  ledCount?: number;
+  transport?: string;
+  matrixWidth?: number;
+  matrixLayout?: string;
   isAvailable?: boolean;
   state?: State;
   info?: Info;
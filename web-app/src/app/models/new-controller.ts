@@ -5,4 +5,8 @@ export interface NewController {
   name: string;
   ipAddress: string;
   universe: number;
+  ledCount?: number;
+  transport?: string;
+  matrixWidth?: number;
+  matrixLayout?: string;
 }